@@ -1,17 +1,331 @@
 import soundfile as sf
-import pyloudnorm as pyln
 import numpy as np
 import csv
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin, upfirdn, sosfilt
 from waapi import WaapiClient, CannotConnectToWaapiException
+from utils import trace
+from backend.fingerprint import pcm_digest, landmarks, landmarks_memory
 
-def analyze_loudness_detailed(audio_file_path, window_size=0.4, overlap=0.5):
+# analyze_loudness_detailed 返回的统计项（响度缓存按此判断条目是否完整）
+LOUDNESS_STATS = ("LUFS-I", "LUFS-M-MAX", "LUFS-S-MAX", "LRA", "TruePeak", "PLR")
+
+# 解码与滤波的精度；float64 为参考实现，float32 与其偏差在 0.01 LU 以内（benchmarks.bench_analysis --precision）
+# 各窗口能量由 float64 累加和求得，长文件不会累积舍入误差
+LOUDNESS_DTYPE = "float32"
+
+# 真峰值：4 倍过采样，每相 12 阶 FIR（与 BS.1770 附录 2 的 48 阶滤波器规模一致）
+TRUE_PEAK_OVERSAMPLE = 4
+TRUE_PEAK_TAPS_PER_PHASE = 12
+TRUE_PEAK_BLOCK = 1 << 16
+TRUE_PEAK_SEGMENT = 1 << 12     # 快速路径按段筛选与计算
+_true_peak_filters = {}
+_phase_matrices = {}
+
+def _true_peak_filter(oversample, dtype=np.float64):
+    key = (oversample, np.dtype(dtype))
+    taps = _true_peak_filters.get(key)
+    if taps is None:
+        taps = firwin(TRUE_PEAK_TAPS_PER_PHASE * oversample, 1.0 / oversample,
+                      window=("kaiser", 8.0)) * oversample
+        taps = taps.astype(dtype)
+        _true_peak_filters[key] = taps
+    return taps
+
+def _true_peak_phases(oversample, dtype):
+    """多相系数矩阵 (每相阶数, 相数)：第 p 列为第 p 相的系数（逆序，与按时间升序的样本窗口相乘）。"""
+    key = (oversample, np.dtype(dtype))
+    phases = _phase_matrices.get(key)
+    if phases is None:
+        taps = _true_peak_filter(oversample, dtype)
+        phases = np.ascontiguousarray(np.stack([taps[p::oversample][::-1] for p in range(oversample)], axis=1))
+        _phase_matrices[key] = phases
+    return phases
+
+def _as_frames(data):
+    x = np.asarray(data)
+    if x.ndim == 1:
+        x = x[:, None]
+    # 滤波器系数与数据同精度，float32 数据不会被提升为 float64
+    return x, (np.float32 if x.dtype == np.float32 else np.float64)
+
+def true_peak_reference(data, oversample=TRUE_PEAK_OVERSAMPLE, block_size=TRUE_PEAK_BLOCK):
+    """
+    参考实现：upfirdn 多相插值整段按块过采样，每块前接上一块末尾 (每相阶数-1) 个样本，
+    块间结果与整段处理一致。true_peak 与之比较（bench_analysis --precision）。
+    """
+    x, dtype = _as_frames(data)
+    if len(x) == 0:
+        return None
+    taps = _true_peak_filter(oversample, dtype)
+    history_len = TRUE_PEAK_TAPS_PER_PHASE - 1
+    skip = history_len * oversample
+    history = np.zeros((history_len, x.shape[1]), dtype=x.dtype)
+    peak = float(np.max(np.abs(x)))
+    for start in range(0, len(x), block_size):
+        block = x[start:start + block_size]
+        ext = np.concatenate([history, block])
+        y = upfirdn(taps, ext, up=oversample, axis=0)
+        last = start + block_size >= len(x)
+        # 非最后一块时只取完全由本块输入决定的输出，最后一块保留滤波器尾部
+        y = y[skip:] if last else y[skip:len(ext) * oversample]
+        if len(y):
+            peak = max(peak, float(np.max(np.abs(y))))
+        history = ext[-history_len:]
+    return float(20 * np.log10(max(peak, 1e-12)))
+
+def true_peak(data, oversample=TRUE_PEAK_OVERSAMPLE, segment=TRUE_PEAK_SEGMENT):
+    """
+    过采样真峰值（dBTP），结果与 true_peak_reference 相同。
+    每个插值输出是最近 12 个样本与某一相系数的内积：按段把样本窗口与系数矩阵相乘（一次 BLAS 调用得到各相输出），
+    并且输出的绝对值不超过 窗口内样本峰值 × 该相系数绝对值之和，
+    因此从样本峰值最高的段开始计算，上界不超过当前峰值的段直接跳过。
+    """
+    x, dtype = _as_frames(data)
+    if len(x) == 0:
+        return None
+    phases = _true_peak_phases(oversample, dtype)
+    history_len = TRUE_PEAK_TAPS_PER_PHASE - 1
+    # 窗口以最新样本的位置 i 编号，i 取 [0, 帧数 + 历史长度)，超出文件的样本为零（滤波器尾部）
+    count = -(-(len(x) + history_len) // segment)
+    magnitude = np.zeros(count * segment, dtype=dtype)
+    # 逐声道取最大值（沿长度为声道数的轴归约很慢）
+    for channel in range(x.shape[1]):
+        np.maximum(magnitude[:len(x)], np.abs(x[:, channel]), out=magnitude[:len(x)])
+    segment_peaks = magnitude.reshape(count, segment).max(axis=1).astype(np.float64)
+    peak = float(segment_peaks.max())
+    # 段内窗口还包含前一段末尾的样本，上界取两段峰值的较大者；系数和留少量余量抵消浮点舍入
+    gain = float(np.abs(phases).sum(axis=0).max()) * (1 + 1e-6)
+    bounds = np.maximum(segment_peaks, np.r_[0.0, segment_peaks[:-1]]) * gain
+    for index in np.argsort(bounds)[::-1]:
+        if bounds[index] <= peak:
+            break
+        first = index * segment
+        ext = np.zeros((x.shape[1], segment + history_len), dtype=dtype)
+        lo, hi = max(first - history_len, 0), min(first + segment, len(x))
+        if hi > lo:
+            ext[:, lo - (first - history_len):hi - (first - history_len)] = x[lo:hi].T
+        for channel in ext:
+            y = sliding_window_view(channel, history_len + 1) @ phases
+            peak = max(peak, float(y.max()), float(-y.min()))
+    return float(20 * np.log10(max(peak, 1e-12)))
+
+# K 加权滤波器（BS.1770，与 pyloudnorm 的参数一致）
+K_SHELF_GAIN = 4.0
+K_SHELF_Q = 1 / np.sqrt(2)
+K_SHELF_FC = 1500.0
+K_HIGHPASS_Q = 0.5
+K_HIGHPASS_FC = 38.0
+# BS.1770 各声道权重，按声道数对应 WAV 的默认声道顺序；LFE 不计入响度，环绕声道 +1.5 dB
+CHANNEL_GAINS = {
+    1: (1.0,),                                          # M
+    2: (1.0, 1.0),                                      # L, R
+    3: (1.0, 1.0, 1.0),                                 # L, R, C
+    4: (1.0, 1.0, 1.41, 1.41),                          # 四声道：L, R, Ls, Rs
+    5: (1.0, 1.0, 1.0, 1.41, 1.41),                     # L, R, C, Ls, Rs
+    6: (1.0, 1.0, 1.0, 0.0, 1.41, 1.41),                # 5.1：L, R, C, LFE, Ls, Rs
+    7: (1.0, 1.0, 1.0, 0.0, 1.41, 1.41, 1.41),          # 6.1：L, R, C, LFE, Cs, Ls, Rs
+    8: (1.0, 1.0, 1.0, 0.0, 1.0, 1.0, 1.41, 1.41),      # 7.1：L, R, C, LFE, Lb, Rb, Ls, Rs（后置 ±135° 不加权）
+}
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0          # 综合响度的相对门限
+LRA_RELATIVE_GATE = -20.0      # 响度范围的相对门限（EBU Tech 3342）
+LRA_PERCENTILES = (10, 95)
+SHORT_TERM_WINDOW = 3.0
+GATING_BLOCK = 0.4
+GATING_HOP = 0.1
+CURVE_FLOOR = -100.0           # 响度曲线中静音块的下限（LUFS），代替 -inf
+K_FILTER_BLOCK = 1 << 16     # K 加权按块滤波的帧数
+_k_filters = {}
+
+def k_weighting_sos(rate):
+    """高架 + 高通两级二阶节（按采样率缓存）。"""
+    sos = _k_filters.get(rate)
+    if sos is not None:
+        return sos
+    # 高架滤波器
+    A = 10 ** (K_SHELF_GAIN / 40.0)
+    w0 = 2.0 * np.pi * (K_SHELF_FC / rate)
+    alpha = np.sin(w0) / (2.0 * K_SHELF_Q)
+    cos_w0 = np.cos(w0)
+    shelf_b = [A * ((A + 1) + (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha),
+               -2 * A * ((A - 1) + (A + 1) * cos_w0),
+               A * ((A + 1) + (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha)]
+    shelf_a = [(A + 1) - (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha,
+               2 * ((A - 1) - (A + 1) * cos_w0),
+               (A + 1) - (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha]
+    # 高通滤波器
+    w0 = 2.0 * np.pi * (K_HIGHPASS_FC / rate)
+    alpha = np.sin(w0) / (2.0 * K_HIGHPASS_Q)
+    cos_w0 = np.cos(w0)
+    hp_b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+    hp_a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    sos = np.array([
+        np.concatenate([shelf_b, shelf_a]) / shelf_a[0],
+        np.concatenate([hp_b, hp_a]) / hp_a[0],
+    ])
+    _k_filters[rate] = sos
+    return sos
+
+_unknown_layouts = set()
+
+def channel_gains(channels):
+    """声道数对应的权重；表中没有的声道数每个声道按 1.0 计，并提示一次。"""
+    gains = CHANNEL_GAINS.get(channels)
+    if gains is None:
+        if channels not in _unknown_layouts:
+            _unknown_layouts.add(channels)
+            print(f"警告：未知的 {channels} 声道布局，各声道权重按 1.0 计算")
+        gains = (1.0,) * channels
+    return gains
+
+def k_weighted_power(data, rate):
+    """
+    K 加权后按声道增益合并的逐样本功率，返回其累加和（首项为 0），任意窗口的能量可 O(1) 取得。
+    按块滤波（状态跨块延续）并直接累加到 float64 累加和中，不保留整段的滤波结果。
+    """
+    x = np.asarray(data)
+    if x.ndim == 1:
+        x = x[:, None]
+    gains = np.array(channel_gains(x.shape[1]))
+    sos = k_weighting_sos(rate)
+    cumulative = np.empty(len(x) + 1)
+    cumulative[0] = 0.0
+    # 38 Hz 高通的极点贴近单位圆，float32 系数/状态在高采样率下误差可达 0.1 LU 以上，
+    # 因此 float32 输入也以 float64 滤波
+    zi = np.zeros((sos.shape[0], 2, x.shape[1]))
+    for start in range(0, len(x), K_FILTER_BLOCK):
+        block, zi = sosfilt(sos, x[start:start + K_FILTER_BLOCK], axis=0, zi=zi)
+        np.square(block, out=block)
+        out = cumulative[start + 1:start + 1 + len(block)]
+        np.cumsum(block @ gains, out=out)
+        out += cumulative[start]
+    return cumulative
+
+def block_power(cumulative, window, hop):
+    """窗口均方功率序列（窗口、步长单位为样本）。"""
+    total = len(cumulative) - 1
+    if total < window:
+        return np.empty(0)
+    starts = np.arange(0, total - window + 1, hop)
+    return (cumulative[starts + window] - cumulative[starts]) / window
+
+def power_to_lufs(power):
+    with np.errstate(divide="ignore"):
+        return -0.691 + 10.0 * np.log10(power)
+
+def gated_loudness(block_powers):
+    """BS.1770 双门限综合响度：先 -70 LUFS 绝对门限，再相对门限 -10 LU。"""
+    levels = power_to_lufs(block_powers)
+    above_abs = block_powers[levels >= ABSOLUTE_GATE]
+    if not len(above_abs):
+        return -np.inf
+    relative = power_to_lufs(np.mean(above_abs)) + RELATIVE_GATE
+    gated = block_powers[(levels > relative) & (levels >= ABSOLUTE_GATE)]
+    return power_to_lufs(np.mean(gated)) if len(gated) else -np.inf
+
+def loudness_range(short_term_powers):
+    """EBU Tech 3342 响度范围：短期响度经 -70 LUFS 绝对门限与 -20 LU 相对门限后取 P95 - P10。"""
+    levels = power_to_lufs(short_term_powers)
+    above_abs = levels >= ABSOLUTE_GATE
+    if not np.any(above_abs):
+        return None
+    relative = power_to_lufs(np.mean(short_term_powers[above_abs])) + LRA_RELATIVE_GATE
+    gated = levels[above_abs & (levels >= relative)]
+    if not len(gated):
+        return None
+    low, high = np.percentile(gated, LRA_PERCENTILES)
+    return float(high - low)
+
+def curve_windows(rate, window_size=0.4, overlap=0.5):
+    """瞬时、短期响度序列各自的 (窗口, 步长)，单位为样本。"""
+    window = max(1, int(rate * window_size))
+    return ((window, max(1, int(window * (1 - overlap)))),
+            (int(round(rate * SHORT_TERM_WINDOW)), max(1, int(round(rate * GATING_HOP)))))
+
+def curve_lengths(frames, rate, window_size=0.4, overlap=0.5):
+    """由文件头帧数推算瞬时、短期响度曲线的长度（与 analyze_loudness_detailed 的零填充一致）。"""
+    frames = max(frames, max(1, int(rate * max(window_size, GATING_BLOCK))))
+    return tuple((frames - window) // hop + 1 if frames >= window else 0
+                 for window, hop in curve_windows(rate, window_size, overlap))
+
+def loudness_stats(data, rate, window_size=0.4, overlap=0.5, curves=None):
+    """
+    由同一条 K 加权功率累加序列计算综合、瞬时、短期响度与响度范围。
+    curves 为 dict 时写入 "momentary" / "short_term" 两条响度曲线（LUFS，float32）。
+    """
+    with trace.span("loudness.k_weighting", "loudness", bytes=getattr(data, "nbytes", 0)):
+        cumulative = k_weighted_power(data, rate)
+    with trace.span("loudness.gating", "loudness"):
+        return _gated_stats(cumulative, rate, window_size, overlap, curves)
+
+def _curve(block_powers):
+    return np.maximum(power_to_lufs(block_powers), CURVE_FLOOR).astype(np.float32)
+
+def _gated_stats(cumulative, rate, window_size, overlap, curves=None):
+    (window, momentary_hop), (short_window, hop) = curve_windows(rate, window_size, overlap)
+    integrated = gated_loudness(block_power(cumulative, int(round(rate * GATING_BLOCK)), hop))
+
+    momentary = block_power(cumulative, window, momentary_hop)
+    # 若没有有效瞬时窗口，则回退为综合值
+    max_momentary = float(power_to_lufs(momentary.max())) if len(momentary) else integrated
+
+    # 短于 3 秒的音频没有完整的短期窗口
+    short_term = block_power(cumulative, short_window, hop)
+    max_short_term = float(power_to_lufs(short_term.max())) if len(short_term) else None
+    lra = loudness_range(short_term) if len(short_term) else None
+    if curves is not None:
+        curves["momentary"] = _curve(momentary)
+        curves["short_term"] = _curve(short_term)
+    return {
+        "LUFS-I": float(integrated),
+        "LUFS-M-MAX": max_momentary,
+        "LUFS-S-MAX": max_short_term,
+        "LRA": lra,
+    }
+
+def estimate_memory(frames, channels, rate, dtype=LOUDNESS_DTYPE, near_duplicates=False):
+    """
+    analyze_loudness_detailed 的峰值内存估计（字节），用于按内存预算调度：
+    解码数据（帧数 × 声道数 × 样本字节数）加上其后依次进行的各阶段中最大的一项：
+    真峰值的逐帧样本峰值与单声道绝对值（各 帧数 × 样本字节数），
+    近似重复检测的频谱峰值指纹（见 landmarks_memory；内容哈希不复制数据），
+    K 加权的 float64 累加和（帧数 × 8）与一块 float64 滤波输入/输出。
+    """
+    itemsize = np.dtype(dtype).itemsize
+    true_peak_stage = frames * itemsize * 2
+    fingerprint_stage = landmarks_memory(frames, channels, rate, itemsize) if near_duplicates else 0
+    k_weighting_stage = frames * 8 + min(frames, K_FILTER_BLOCK) * channels * 8 * 2
+    return frames * channels * itemsize + max(true_peak_stage, fingerprint_stage, k_weighting_stage)
+
+def analyze_loudness_detailed(audio_file_path, window_size=0.4, overlap=0.5, dtype=LOUDNESS_DTYPE,
+                              curves=None, fingerprint=None, near_duplicates=False):
+    """
+    返回 (stats, error)，stats 包含 LOUDNESS_STATS 中的各项：
+    LUFS-I、LUFS-M-MAX、LUFS-S-MAX、LRA、TruePeak（dBTP）、PLR（TruePeak - LUFS-I）。
+    dtype 为解码与滤波精度（"float32" / "float64"）；curves 见 loudness_stats。
+    fingerprint 为 dict 时写入 "digest"（解码后 PCM 的哈希）；
+    near_duplicates 为真时另写入 "hashes" / "times"（频谱峰值指纹，用于近似重复检测）。
+    """
     try:
-        data, rate = sf.read(audio_file_path, always_2d=False)
+        with trace.span("loudness.decode", "loudness") as sp:
+            data, rate = sf.read(audio_file_path, dtype=dtype, always_2d=False)
+            sp.add(bytes=data.nbytes)
     except Exception as e:
         print(f"读取文件失败: {audio_file_path}，原因: {e}")
-        return None, None, f"读取文件失败: {e}"
+        return None, f"读取文件失败: {e}"
+
+    window_samples = max(1, int(rate * max(window_size, GATING_BLOCK)))
 
-    window_samples = max(1, int(rate * window_size))
+    # 真峰值按原始长度计算（零填充不影响结果）
+    with trace.span("loudness.true_peak", "loudness"):
+        peak = true_peak(data)
+
+    if fingerprint is not None:
+        with trace.span("loudness.fingerprint", "loudness"):
+            fingerprint["digest"] = pcm_digest(data, rate)
+            if near_duplicates:
+                fingerprint["hashes"], fingerprint["times"] = landmarks(data, rate)
 
     # 若音频短于窗口，零填充到窗口长度，保证至少一个分析块
     if len(data) < window_samples:
@@ -21,31 +335,142 @@ def analyze_loudness_detailed(audio_file_path, window_size=0.4, overlap=0.5):
         else:
             data = np.pad(data, ((0, pad), (0, 0)), mode='constant')
 
-    meter = pyln.Meter(rate)
-
     try:
-        integrated = meter.integrated_loudness(data)
+        stats = loudness_stats(data, rate, window_size, overlap, curves)
     except Exception as e:
         print(f"响度分析失败: {audio_file_path}，原因: {e}")
-        return None, None, f"响度分析失败: {e}"
-
-    hop_samples = max(1, int(window_samples * (1 - overlap)))
-    momentary_levels = []
-    for i in range(0, len(data) - window_samples + 1, hop_samples):
-        chunk = data[i:i + window_samples]
-        try:
-            loudness = meter.integrated_loudness(chunk)
-            momentary_levels.append(loudness)
-        except Exception:
+        return None, f"响度分析失败: {e}"
+
+    integrated = stats["LUFS-I"]
+    if peak is None:
+        peak = -np.inf
+    stats["TruePeak"] = peak
+    stats["PLR"] = peak - integrated if np.isfinite(integrated) and np.isfinite(peak) else None
+    return stats, None
+
+def _ref_id(ref):
+    """OutputBus 等引用可能是字符串或字典。"""
+    return ref.get('id') if isinstance(ref, dict) else ref
+
+def fetch_source_info(client, source_id):
+    """
+    查询单个 AudioFileSource 的原始文件路径、父级音量链与 Output Bus 音量链，
+    返回 get_audio_sources 格式的字典列表。
+    """
+    audio_files = []
+    # 5) 拉取源自身属性（含原始文件路径、OutputBus 引用）
+    props = client.call("ak.wwise.core.object.get", {
+        "from": {"id": [source_id]},
+        "options": {"return": ["originalWavFilePath", "name", "path", "duration", "OutputBus"]}
+    })
+    for item in (props or {}).get('return', []):
+        path = item.get('originalWavFilePath')
+        if not path:
             continue
-            
-    # 若没有有效瞬时窗口，则回退为综合值
-    max_momentary = max(momentary_levels) if momentary_levels else integrated
-    return integrated, max_momentary, None
 
-def get_audio_sources(progress_callback=None, status_callback=None):
+        # 读取对象自身的 Output Bus（兼容字符串或字典）
+        bus_id = _ref_id(item.get('OutputBus'))
+
+        # 6) ancestors 列表（含每级 @Volume、@MakeUpGain、@OutputBus），用于层级列与 Output Bus 继承回退
+        ancestors_props = client.call("ak.wwise.core.object.get", {
+            "from": {"id": [source_id]},
+            "transform": [{"select": ["ancestors"]}],
+            "options": {"return": ["id", "name", "@Volume", "@MakeUpGain", "OutputBus"]}
+        })
+
+        ancestors_list = []
+        raw_ancestors = (ancestors_props or {}).get('return', [])
+        for ancestor in raw_ancestors:
+            name = ancestor.get('name')
+            vol = ancestor.get('@Volume')
+            mug = ancestor.get('@MakeUpGain')
+            if name:
+                ancestors_list.append({"id": ancestor.get('id'), "name": name, "volume": vol, "makeup": mug})
+
+        # 若对象未设置 Output Bus，则从最近父级开始寻找第一个设置了 @OutputBus 的对象
+        if not bus_id:
+            for anc in raw_ancestors:
+                anc_bus_id = _ref_id(anc.get('OutputBus'))
+                if anc_bus_id:
+                    bus_id = anc_bus_id
+                    break
+
+        # 7) 查询目标 Bus 的 BusVolume 与 Volume 以及 ancestors
+        bus_bus_volume = None
+        bus_volume = None
+        bus_ancestors_list = []
+        bus_name = ""
+        if bus_id:
+            bus_info = client.call("ak.wwise.core.object.get", {
+                "from": {"id": [bus_id]},
+                "options": {"return": ["id", "name", "@BusVolume", "@Volume"]}
+            })
+            bus_items = (bus_info or {}).get('return', [])
+            if bus_items:
+                bus_bus_volume = bus_items[0].get('@BusVolume')
+                bus_volume = bus_items[0].get('@Volume')
+                bus_name = bus_items[0].get('name', '')
+
+            # 查询 Bus 的 ancestors
+            bus_ancestors_info = client.call("ak.wwise.core.object.get", {
+                "from": {"id": [bus_id]},
+                "transform": [{"select": ["ancestors"]}],
+                "options": {"return": ["id", "name", "@BusVolume", "@Volume"]}
+            })
+            raw_bus_ancestors = (bus_ancestors_info or {}).get('return', [])
+            for ancestor in raw_bus_ancestors:
+                bus_ancestors_list.append({
+                    "id": ancestor.get('id'),
+                    "name": ancestor.get('name'),
+                    "bus_volume": ancestor.get('@BusVolume'),
+                    "volume": ancestor.get('@Volume')
+                })
+
+        audio_files.append({
+            "id": source_id,
+            "name": item.get('name', ''),
+            "wwise_path": item.get('path', ''),
+            "file_path": path,
+            "duration": item.get('duration', 0),
+            "OutputBus_id": bus_id or "",
+            "OutputBus_Name": bus_name,
+            "OutputBus_BusVolume": bus_bus_volume,
+            "OutputBus_Volume": bus_volume,
+            "OutputBus_ancestors_list": bus_ancestors_list,
+            "ancestors_list": ancestors_list,
+        })
+    return audio_files
+
+def find_audio_sources(client, ids):
+    """返回 ids 对象自身及其全部后代中的 AudioFileSource（id/name/type/path）。"""
+    # 2) 取“选中对象自身”的信息
+    selected_info = client.call("ak.wwise.core.object.get", {
+        "from": {"id": ids},
+        "options": {"return": ["id", "name", "type", "path"]}
+    })
+    selected_objects = (selected_info or {}).get('return', [])
+
+    # 3) 取“选中对象的所有后代”的信息
+    descendants_info = client.call("ak.wwise.core.object.get", {
+        "from": {"id": ids},
+        "transform": [{"select": ["descendants"]}],
+        "options": {"return": ["id", "name", "type", "path"]}
+    })
+    descendants_objects = (descendants_info or {}).get('return', [])
+
+    # 合并自身 + 后代
+    all_objects = selected_objects + descendants_objects
+
+    # 4) 过滤音频源
+    audio_sources = [obj for obj in all_objects if obj.get('type') == 'AudioFileSource']
+    return audio_sources
+
+def get_audio_sources(progress_callback=None, status_callback=None, url=None):
+    """url 为空时连接默认的 ws://127.0.0.1:8080/waapi。"""
     try:
-        with WaapiClient() as client:
+        with trace.span("waapi.get_audio_sources", "waapi"), WaapiClient(url=url) as waapi:
+            # 开启追踪时逐个记录 WAAPI 调用
+            client = trace.CallSpans(waapi, "waapi") if trace.enabled() else waapi
             # 1) 获取当前选择
             result = client.call("ak.wwise.ui.getSelectedObjects")
             selected = result.get('objects', []) if result else []
@@ -55,26 +480,7 @@ def get_audio_sources(progress_callback=None, status_callback=None):
 
             ids = [obj['id'] for obj in selected]
 
-            # 2) 取“选中对象自身”的信息
-            selected_info = client.call("ak.wwise.core.object.get", {
-                "from": {"id": ids},
-                "options": {"return": ["id", "name", "type", "path"]}
-            })
-            selected_objects = (selected_info or {}).get('return', [])
-
-            # 3) 取“选中对象的所有后代”的信息
-            descendants_info = client.call("ak.wwise.core.object.get", {
-                "from": {"id": ids},
-                "transform": [{"select": ["descendants"]}],
-                "options": {"return": ["id", "name", "type", "path"]}
-            })
-            descendants_objects = (descendants_info or {}).get('return', [])
-
-            # 合并自身 + 后代
-            all_objects = selected_objects + descendants_objects
-
-            # 4) 过滤音频源
-            audio_sources = [obj for obj in all_objects if obj.get('type') == 'AudioFileSource']
+            audio_sources = find_audio_sources(client, ids)
 
             audio_files = []
             total = len(audio_sources)
@@ -83,87 +489,7 @@ def get_audio_sources(progress_callback=None, status_callback=None):
                     progress_callback(int((idx + 1) / total * 100))
                 if status_callback:
                     status_callback(f"正在获取: {audio.get('name', '')} ({idx+1}/{total})")
-
-                # 5) 拉取源自身属性（含原始文件路径、OutputBus 引用）
-                props = client.call("ak.wwise.core.object.get", {
-                    "from": {"id": [audio['id']]},
-                    "options": {"return": ["originalWavFilePath", "name", "path", "duration", "OutputBus"]}
-                })
-                for item in (props or {}).get('return', []):
-                    path = item.get('originalWavFilePath')
-                    if not path:
-                        continue
-
-                    # 读取对象自身的 Output Bus（兼容字符串或字典）
-                    bus_ref = item.get('OutputBus')
-                    bus_id = bus_ref.get('id') if isinstance(bus_ref, dict) else bus_ref
-
-                    # 6) ancestors 列表（含每级 @Volume、@MakeUpGain、@OutputBus），用于层级列与 Output Bus 继承回退
-                    ancestors_props = client.call("ak.wwise.core.object.get", {
-                        "from": {"id": [audio['id']]},
-                        "transform": [{"select": ["ancestors"]}],
-                        "options": {"return": ["id", "name", "@Volume", "@MakeUpGain", "OutputBus"]}
-                    })
-
-                    ancestors_list = []
-                    raw_ancestors = (ancestors_props or {}).get('return', [])
-                    for ancestor in raw_ancestors:
-                        name = ancestor.get('name')
-                        vol = ancestor.get('@Volume')
-                        mug = ancestor.get('@MakeUpGain')
-                        if name:
-                            ancestors_list.append({"name": name, "volume": vol, "makeup": mug})
-
-                    # 若对象未设置 Output Bus，则从最近父级开始寻找第一个设置了 @OutputBus 的对象
-                    if not bus_id:
-                        for anc in raw_ancestors:
-                            anc_bus_ref = anc.get('OutputBus')
-                            anc_bus_id = anc_bus_ref.get('id') if isinstance(anc_bus_ref, dict) else anc_bus_ref
-                            if anc_bus_id:
-                                bus_id = anc_bus_id
-                                break
-
-                    # 7) 查询目标 Bus 的 BusVolume 与 Volume 以及 ancestors
-                    bus_bus_volume = None
-                    bus_volume = None
-                    bus_ancestors_list = []
-                    bus_name = ""
-                    if bus_id:
-                        bus_info = client.call("ak.wwise.core.object.get", {
-                            "from": {"id": [bus_id]},
-                            "options": {"return": ["id", "name", "@BusVolume", "@Volume"]}
-                        })
-                        bus_items = (bus_info or {}).get('return', [])
-                        if bus_items:
-                            bus_bus_volume = bus_items[0].get('@BusVolume')
-                            bus_volume = bus_items[0].get('@Volume')
-                            bus_name = bus_items[0].get('name', '')
-
-                        # 查询 Bus 的 ancestors
-                        bus_ancestors_info = client.call("ak.wwise.core.object.get", {
-                            "from": {"id": [bus_id]},
-                            "transform": [{"select": ["ancestors"]}],
-                            "options": {"return": ["id", "name", "@BusVolume", "@Volume"]}
-                        })
-                        raw_bus_ancestors = (bus_ancestors_info or {}).get('return', [])
-                        for ancestor in raw_bus_ancestors:
-                            bus_ancestors_list.append({
-                                "name": ancestor.get('name'),
-                                "bus_volume": ancestor.get('@BusVolume'),
-                                "volume": ancestor.get('@Volume')
-                            })
-
-                    audio_files.append({
-                        "name": item.get('name', ''),
-                        "wwise_path": item.get('path', ''),
-                        "file_path": path,
-                        "duration": item.get('duration', 0),
-                        "OutputBus_Name": bus_name,
-                        "OutputBus_BusVolume": bus_bus_volume,
-                        "OutputBus_Volume": bus_volume,
-                        "OutputBus_ancestors_list": bus_ancestors_list,
-                        "ancestors_list": ancestors_list,
-                    })
+                audio_files.extend(fetch_source_info(client, audio['id']))
             return audio_files
     except CannotConnectToWaapiException:
         print("无法连接到WAAPI，请确保Wwise已开启WAAPI。")
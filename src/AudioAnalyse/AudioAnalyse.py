@@ -11,6 +11,14 @@ import warnings
 import soundfile as sf
 from scipy import signal
 from pathlib import Path
+from backend.audio_probe import probe
+from backend.dir_scanner import (
+    DirectoryScanner, SPECTROGRAM_2D_EXTENSIONS, SPECTROGRAM_3D_EXTENSIONS, CENTROID_EXTENSIONS
+)
+from backend.output_manifest import OutputManifest, analysis_params
+
+# 绘图代码版本：修改图表样式后递增，使输出清单中的旧图片失效并重新生成
+PLOT_VERSION = 1
 
 
 
@@ -62,44 +70,43 @@ def plot_spectrogram_2d(audio_path, output_dir, sr=22050, n_fft=2048, hop_length
         return False, f"处理 {audio_path} 时出错: {str(e)}"
 
 
-def batch_process_audio_2d(input_dir, output_dir):
+def _batch_process(input_dir, output_dir, analysis_type, extensions, process, params, desc, empty_message):
     """
-    批量处理音频文件
-
-    参数:
-        input_dir (str): 输入目录路径
-        output_dir (str): 输出目录路径
+    tkinter 批量入口共用的处理循环。
+    与 AudioAnalysisThread 使用同一份输出清单：源文件（大小、修改时间、内容）与参数均未变、
+    输出仍存在的文件直接跳过，重复运行只处理新增或改动的文件。
     """
-    # 支持的音频格式
-    supported_formats = ('.wav', '.mp3', '.ogg', '.flac', '.m4a', '.aac')
-
-    # 收集所有音频文件
-    audio_files = []
-    for root, _, files in os.walk(input_dir):
-        for file in files:
-            if file.lower().endswith(supported_formats):
-                audio_files.append(os.path.join(root, file))
-
-    if not audio_files:
-        messagebox.showwarning("警告", "所选目录中没有找到支持的音频文件!")
+    entries = list(DirectoryScanner(input_dir, extensions).scan())
+
+    if not entries:
+        messagebox.showwarning("警告", empty_message)
         return
 
     # 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
+    manifest = OutputManifest(output_dir, analysis_type, params)
 
     # 使用进度条处理文件
     success_count = 0
+    skipped_count = 0
     error_messages = []
 
-    for audio_file in tqdm(audio_files, desc="正在生成频谱图", unit="文件"):
-        success, result = plot_spectrogram_2d(audio_file, output_dir)
+    for entry in tqdm(entries, desc=desc, unit="文件"):
+        if manifest.is_current(entry):
+            skipped_count += 1
+            continue
+        success, result = process(entry.path, output_dir)
         if success:
             success_count += 1
+            manifest.record(entry, result)
         else:
             error_messages.append(result)
+    manifest.save()
 
     # 显示处理结果
     result_message = f"处理完成!\n\n成功处理: {success_count} 个文件"
+    if skipped_count:
+        result_message += f"\n已是最新，跳过: {skipped_count} 个文件"
     if error_messages:
         result_message += f"\n失败: {len(error_messages)} 个文件\n\n错误详情已保存到日志文件"
 
@@ -117,6 +124,19 @@ def batch_process_audio_2d(input_dir, output_dir):
         os.system(f'open "{output_dir}"' if sys.platform == 'darwin' else f'xdg-open "{output_dir}"')
 
 
+def batch_process_audio_2d(input_dir, output_dir):
+    """
+    批量处理音频文件
+
+    参数:
+        input_dir (str): 输入目录路径
+        output_dir (str): 输出目录路径
+    """
+    _batch_process(input_dir, output_dir, "2d", SPECTROGRAM_2D_EXTENSIONS, plot_spectrogram_2d,
+                   analysis_params(plot_spectrogram_2d, version=PLOT_VERSION),
+                   "正在生成频谱图", "所选目录中没有找到支持的音频文件!")
+
+
 def select_directory_2d(title):
     """
     弹出文件夹选择对话框
@@ -129,6 +149,13 @@ def select_directory_2d(title):
 
 def process_long_audio_3d(file_path, output_dir, db_range=(-120, 9), chunk_size=30):
     try:
+        # 先读文件头确定分析参数，无法识别的文件直接跳过解码
+        info = probe(file_path)
+        if info is None:
+            raise ValueError("无法读取音频文件头")
+        duration = info.duration
+        nperseg = 512 if duration > 300 else 1024
+
         # 读取音频文件
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
@@ -138,8 +165,6 @@ def process_long_audio_3d(file_path, output_dir, db_range=(-120, 9), chunk_size=
         mono_audio = audio_data.mean(axis=1) if audio_data.ndim > 1 else audio_data
 
         # 计算频谱图
-        duration = len(mono_audio) / sample_rate
-        nperseg = 512 if duration > 300 else 1024
 
         frequencies, times, Sxx = signal.spectrogram(
             mono_audio,
@@ -251,50 +276,9 @@ def plot_spectrogram_3d(file_path, output_dir):
         return False, f"{file_path}: {e}"
 
 def batch_process_audio_3d(input_dir, output_dir):
-    supported_formats = ('.wav', '.wave', '.aiff', '.flac')
-    
-    audio_files =[]
-    for root, _,files in os.walk(input_dir):
-        for file in files:
-            if file.lower().endswith(supported_formats):
-                audio_files.append(os.path.join(root, file))
-    
-    if not audio_files:
-        messagebox.showwarning("警告", "未找到支持的音频文件")
-        return
-    
-    os.makedirs(output_dir, exist_ok=True)
-
-    # 使用进度条处理文件
-    success_count = 0
-    error_messages = []
-
-    for audio_file in tqdm(audio_files, desc="正在生成3D频谱图", unit="文件"):
-        success, result = plot_spectrogram_3d(audio_file, output_dir)
-        if success:
-            success_count += 1
-        else:
-            error_messages.append(result)
-
-    # 显示处理结果
-    result_message = f"处理完成!\n\n成功处理: {success_count} 个文件"
-    if error_messages:
-        result_message += f"\n失败: {len(error_messages)} 个文件\n\n错误详情已保存到日志文件"
-
-        # 保存错误日志
-        log_path = os.path.join(output_dir, "processing_errors.log")
-        with open(log_path, 'w', encoding='utf-8') as f:
-            f.write("\n".join(error_messages))
-
-    messagebox.showinfo("处理结果", result_message)
-
-    # 完成后打开输出文件夹
-    if os.name == 'nt':  # Windows
-        os.startfile(output_dir)
-    elif os.name == 'posix':  # macOS/Linux
-        os.system(f'open "{output_dir}"' if sys.platform == 'darwin' else f'xdg-open "{output_dir}"')
-
-
+    _batch_process(input_dir, output_dir, "3d", SPECTROGRAM_3D_EXTENSIONS, plot_spectrogram_3d,
+                   analysis_params(process_long_audio_3d, version=PLOT_VERSION),
+                   "正在生成3D频谱图", "未找到支持的音频文件")
 
 
 def select_directory_3d(title="选择文件夹", initialdir=None):
@@ -316,7 +300,7 @@ def select_directory_centroid(title="选择文件夹", initialdir=None):
     return folder_path if folder_path else None
 
 
-def analyze_audio_file_centroid(audio_path, output_dir):
+def analyze_audio_file_centroid(audio_path, output_dir, sr=22050, n_fft=2048, hop_length=512):
 
     try:
 
@@ -326,14 +310,14 @@ def analyze_audio_file_centroid(audio_path, output_dir):
         print(f"正在分析: {Path(audio_path).name}...")
 
 
-        y, sr = librosa.load(audio_path)
+        y, sr = librosa.load(audio_path, sr=sr)
 
 
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length)[0]
 
 
         frames = range(len(spectral_centroids))
-        t = librosa.frames_to_time(frames, sr=sr)
+        t = librosa.frames_to_time(frames, sr=sr, hop_length=hop_length)
 
 
         plt.figure(figsize=(14, 10), dpi=120)
@@ -350,8 +334,8 @@ def analyze_audio_file_centroid(audio_path, output_dir):
 
 
         plt.subplot(3, 1, 2)
-        D = librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
-        librosa.display.specshow(D, sr=sr, x_axis='time', y_axis='log')
+        D = librosa.amplitude_to_db(np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length)), ref=np.max)
+        librosa.display.specshow(D, sr=sr, hop_length=hop_length, x_axis='time', y_axis='log')
         plt.colorbar(format='%+2.0f dB')
         plt.title('频谱图', fontsize=12)
         plt.xlabel('时间 (秒)')
@@ -391,53 +375,7 @@ def analyze_audio_file_centroid(audio_path, output_dir):
 
 
 def batch_analyze_audio_centroid(input_dir, output_dir):
+    _batch_process(input_dir, output_dir, "centroid", CENTROID_EXTENSIONS, analyze_audio_file_centroid,
+                   analysis_params(analyze_audio_file_centroid, version=PLOT_VERSION),
+                   "正在生成频谱质心分析", "未找到任何支持的音频文件 (.wav, .mp3, .flac, .ogg, .m4a, .aac)")
 
-
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-
-
-    audio_extensions = ['.wav', '.mp3', '.flac', '.ogg', '.m4a', '.aac']
-
-
-    audio_files = []
-    for root, _, files in os.walk(input_dir):
-        for file in files:
-            if Path(file).suffix.lower() in audio_extensions:
-                audio_files.append(os.path.join(root, file))
-
-    if not audio_files:
-        messagebox.showwarning("警告", "未找到任何支持的音频文件 (.wav, .mp3, .flac, .ogg, .m4a, .aac)")
-        return
-
-
-
-    success_count = 0
-    error_messages = []
-
-    for audio_file in tqdm(audio_files, desc="正在生成频谱质心分析", unit="文件"):
-        success, result = analyze_audio_file_centroid(audio_file, output_dir)
-        if success:
-            success_count += 1
-        else:
-            error_messages.append(result)
-
-    # 显示处理结果
-    result_message = f"处理完成!\n\n成功处理: {success_count} 个文件"
-    if error_messages:
-        result_message += f"\n失败: {len(error_messages)} 个文件\n\n错误详情已保存到日志文件"
-
-        # 保存错误日志
-        log_path = os.path.join(output_dir, "processing_errors.log")
-        with open(log_path, 'w', encoding='utf-8') as f:
-            f.write("\n".join(error_messages))
-
-    messagebox.showinfo("处理结果", result_message)
-
-    # 完成后打开输出文件夹
-    if os.name == 'nt':  # Windows
-        os.startfile(output_dir)
-    elif os.name == 'posix':  # macOS/Linux
-        os.system(f'open "{output_dir}"' if sys.platform == 'darwin' else f'xdg-open "{output_dir}"')
-    
-    
-    
\ No newline at end of file
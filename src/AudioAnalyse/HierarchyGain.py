@@ -0,0 +1,212 @@
+"""
+层级增益与响度汇总引擎。
+
+把 get_audio_sources 返回的 ancestors_list / OutputBus_ancestors_list 还原成两棵树
+（Actor-Mixer 层级树与 Bus 树），每个节点的累计增益只计算一次，
+并按层级自底向上汇总所有后代音频的 LUFS-I-Ingame（最小/最大/平均）。
+实时响度索引在属性变化时用 set_property 只重算该节点所在的子树。
+"""
+import csv
+
+OBJECT_TREE = "object"
+BUS_TREE = "bus"
+
+# 参与累计增益的条目键（与 ancestors_list / OutputBus_ancestors_list 中的键一致）
+GAIN_KEYS = {OBJECT_TREE: ("volume", "makeup"), BUS_TREE: ("bus_volume", "volume")}
+
+
+def _gain(values):
+    total = 0.0
+    for val in values:
+        try:
+            total += float(val)
+        except (TypeError, ValueError):
+            pass
+    return total
+
+
+class GainNode:
+    __slots__ = ("key", "name", "kind", "parent", "children", "values", "gain", "depth", "_cumulative",
+                 "count", "total", "minimum", "maximum")
+
+    def __init__(self, key, name, kind, values):
+        self.key = key
+        self.name = name
+        self.kind = kind
+        self.parent = None
+        self.children = []
+        self.values = values
+        self.gain = _gain(values.values())
+        self.depth = 0
+        self._cumulative = None
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add_value(self, value, count=1, total=None, minimum=None, maximum=None):
+        self.count += count
+        self.total += value if total is None else total
+        lo = value if minimum is None else minimum
+        hi = value if maximum is None else maximum
+        self.minimum = lo if self.minimum is None else min(self.minimum, lo)
+        self.maximum = hi if self.maximum is None else max(self.maximum, hi)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def path(self):
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name or "")
+            node = node.parent
+        return "\\" + "\\".join(reversed(names))
+
+
+class GainTree:
+    """
+    ancestors 列表按“最近父级在前”排列，相邻两项即为子→父关系。
+    没有 id 的旧数据以“父级键 + 名称”作为节点键。
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self._source_nodes = {}   # id(audio) -> (对象树父节点, Bus 节点)
+
+    def _node(self, kind, obj_id, name, values, parent_key_hint):
+        key = (kind, obj_id) if obj_id else (kind, parent_key_hint, name)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = GainNode(key, name, kind, values)
+        return node
+
+    def _chain(self, kind, entries):
+        """由近到远建立节点链，返回最近的节点。"""
+        # 从根开始建立，保证无 id 的同名节点按父级区分
+        parent = None
+        for entry in reversed(entries):
+            node = self._node(kind, entry.get("id"), entry.get("name"),
+                              {k: entry.get(k) for k in GAIN_KEYS[kind]},
+                              parent.key if parent else None)
+            if node.parent is None and parent is not None:
+                node.parent = parent
+                parent.children.append(node)
+            parent = node
+        return parent
+
+    def add_source(self, audio):
+        obj_parent = self._chain(OBJECT_TREE, audio.get("ancestors_list", []))
+        bus_entries = list(audio.get("OutputBus_ancestors_list", []))
+        if audio.get("OutputBus_Name") or audio.get("OutputBus_id"):
+            bus_entries.insert(0, {
+                "id": audio.get("OutputBus_id"),
+                "name": audio.get("OutputBus_Name"),
+                "bus_volume": audio.get("OutputBus_BusVolume"),
+                "volume": audio.get("OutputBus_Volume"),
+            })
+        bus_node = self._chain(BUS_TREE, bus_entries)
+        self._source_nodes[id(audio)] = (obj_parent, bus_node)
+
+    @classmethod
+    def from_audio_files(cls, audio_files):
+        tree = cls()
+        for audio in audio_files:
+            tree.add_source(audio)
+        tree._finalize()
+        return tree
+
+    def _finalize(self):
+        """计算每个节点的深度与累计增益，每个节点只计算一次。"""
+        for node in self.nodes.values():
+            pending = []
+            while node is not None and node._cumulative is None:
+                pending.append(node)
+                node = node.parent
+            for item in reversed(pending):
+                parent = item.parent
+                item.depth = parent.depth + 1 if parent else 0
+                item._cumulative = item.gain + (parent._cumulative if parent else 0.0)
+
+    def set_property(self, kind, obj_id, key, value) -> bool:
+        """
+        更新一个节点的增益属性，只重算该节点及其子树的累计增益。
+        树中没有该节点（不在索引范围内）时返回 False。
+        """
+        node = self.nodes.get((kind, obj_id))
+        if node is None or key not in node.values:
+            return False
+        node.values[key] = value
+        node.gain = _gain(node.values.values())
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            item._cumulative = item.gain + self.cumulative(item.parent)
+            stack.extend(item.children)
+        return True
+
+    @staticmethod
+    def cumulative(node):
+        return node._cumulative if node is not None else 0.0
+
+    def offset(self, audio):
+        """音频源的游戏内增益：父级链累计增益 + Bus 链累计增益。"""
+        obj_parent, bus_node = self._source_nodes.get(id(audio), (None, None))
+        return self.cumulative(obj_parent) + self.cumulative(bus_node)
+
+    def rollup(self, values):
+        """
+        values: [(audio, LUFS-I-Ingame)]。
+        先把值记到每个音频的直接父节点/Bus 节点，再按深度自底向上合并到父节点，O(节点数)。
+        """
+        for node in self.nodes.values():
+            node.count, node.total, node.minimum, node.maximum = 0, 0.0, None, None
+        for audio, value in values:
+            obj_parent, bus_node = self._source_nodes.get(id(audio), (None, None))
+            for node in (obj_parent, bus_node):
+                if node is not None:
+                    node.add_value(value)
+        buckets = {}
+        for node in self.nodes.values():
+            buckets.setdefault(node.depth, []).append(node)
+        for depth in sorted(buckets, reverse=True):
+            for node in buckets[depth]:
+                if node.parent is not None and node.count:
+                    node.parent.add_value(None, node.count, node.total, node.minimum, node.maximum)
+        return self.rows()
+
+    def rows(self):
+        rows = []
+        for node in self.nodes.values():
+            if not node.count:
+                continue
+            rows.append({
+                "类型": "Bus" if node.kind == BUS_TREE else "对象",
+                "路径": node.path(),
+                "层级": node.depth,
+                "累计增益": node._cumulative,
+                "音频数": node.count,
+                "LUFS-I-Ingame-MIN": node.minimum,
+                "LUFS-I-Ingame-MAX": node.maximum,
+                "LUFS-I-Ingame-MEAN": node.mean,
+            })
+        rows.sort(key=lambda r: (r["类型"], r["路径"]))
+        return rows
+
+
+ROLLUP_FIELDS = ["类型", "路径", "层级", "累计增益", "音频数",
+                 "LUFS-I-Ingame-MIN", "LUFS-I-Ingame-MAX", "LUFS-I-Ingame-MEAN"]
+
+
+def rollup_csv_path(csv_path):
+    base = csv_path[:-4] if csv_path.lower().endswith(".csv") else csv_path
+    return base + "_层级汇总.csv"
+
+
+def write_rollup_csv(csv_path, rows):
+    with open(csv_path, "w", newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=ROLLUP_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
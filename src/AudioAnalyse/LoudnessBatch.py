@@ -0,0 +1,209 @@
+"""
+批量响度分析与 CSV 报告（不依赖 Qt）。
+
+    run_loudness_analysis   多进程分析 audio_files，写出主 CSV、层级汇总 CSV、响度曲线与重复文件报告
+    analyse_one             子进程入口：分析单个文件，曲线写入共享的 ResultArena
+
+LufsAnalysisThread 与离线入口（python -m backend.wwise_project）都调用这里，
+进度、状态与取消通过回调传入。
+"""
+import csv
+import psutil
+from concurrent.futures import ProcessPoolExecutor
+from AudioAnalyse import AnalyseLUFS_Game_Wwise as lufs_game_wwise
+from AudioAnalyse.HierarchyGain import GainTree, rollup_csv_path, write_rollup_csv
+from backend.audio_probe import probe
+from backend.progress import ProgressModel
+from backend.scheduler import Job, MemoryBudgetScheduler
+from backend import result_arena
+from backend.result_arena import ResultArena
+from backend.curve_store import CURVE_NAMES, CURVE_DTYPE, curve_store_paths, write_index
+from backend.fingerprint import FingerprintIndex, identical_files, duplicates_csv_path, write_duplicates_csv
+from utils.config import ANALYSIS_WORKERS, ANALYSIS_MEMORY_FRACTION, NEAR_DUPLICATE_DETECTION
+from utils import trace
+
+
+class AnalysisCancelled(Exception):
+    """is_cancelled 回调返回 True 时抛出。"""
+
+
+def analyse_one(index, path, handle, near_duplicates=False):
+    """
+    子进程：只接收序号与路径，响度曲线写入共享的 ResultArena，返回值中不含数组。
+    指纹（内容哈希；开启近似重复检测时另有每秒几十个 uint32 哈希）体积很小，随结果返回。
+    """
+    try:
+        curves = {}
+        fingerprint = {}
+        stats, error = lufs_game_wwise.analyze_loudness_detailed(
+            path, curves=curves, fingerprint=fingerprint, near_duplicates=near_duplicates)
+        lengths = result_arena.write(handle, [curves[name] for name in CURVE_NAMES]) if curves else None
+        return (index, stats, error, lengths, fingerprint or None)
+    except Exception as e:
+        return (index, None, str(e), None, None)
+
+
+def report_fieldnames(audio_files):
+    """基础列 + 音频对象层级列 + Bus层级列，层级列数取所有音频中最深的一条链。"""
+    max_depth = max((len(a.get("ancestors_list", [])) for a in audio_files), default=0)
+    max_bus_depth = max((len(a.get("OutputBus_ancestors_list", [])) for a in audio_files), default=0)
+    base_fields = [
+        "name", "wwise_path", "file_path", "LUFS-I", "LUFS-M-MAX", "LUFS-S-MAX", "LRA", "TruePeak", "PLR", "音频时长",
+        "OutPutBus_Name", "OutPutBus_BusVolume", "OutPutBus_Volume"
+    ]
+    bus_level_fields = []
+    for i in range(1, max_bus_depth + 1):
+        bus_level_fields.append(f"OutputBus父{i}名")
+        bus_level_fields.append(f"Bus_BusVolume{i}")
+        bus_level_fields.append(f"Bus_Volume{i}")
+    level_fields = []
+    for i in range(1, max_depth + 1):
+        level_fields.append(f"父级名{i}")
+        level_fields.append(f"父级音量{i}")
+        level_fields.append(f"父级MakeUpGain{i}")
+    fieldnames = ["LUFS-I-Ingame", "LUFS-M-MAX-Ingame", "TruePeak-Ingame"] + base_fields + bus_level_fields + level_fields
+    return fieldnames, max_depth, max_bus_depth
+
+
+def _blank(value):
+    return "" if value is None else value
+
+
+def report_row(audio, stats, duration, offset, max_depth, max_bus_depth):
+    """组装一行报告；offset 为 Bus 链与父级链的累计增益（GainTree.offset）。"""
+    integrated = stats["LUFS-I"]
+    max_momentary = stats["LUFS-M-MAX"]
+    row = {
+        "LUFS-I-Ingame": (integrated if integrated is not None else 0) + offset,
+        "LUFS-M-MAX-Ingame": (max_momentary if max_momentary is not None else 0) + offset,
+        "TruePeak-Ingame": stats["TruePeak"] + offset,
+        "name": audio['name'],
+        "wwise_path": audio['wwise_path'],
+        "file_path": audio['file_path'],
+        "LUFS-I": integrated,
+        "LUFS-M-MAX": max_momentary,
+        "LUFS-S-MAX": _blank(stats["LUFS-S-MAX"]),
+        "LRA": _blank(stats["LRA"]),
+        "TruePeak": stats["TruePeak"],
+        "PLR": _blank(stats["PLR"]),
+        "音频时长": audio['duration'] if duration is None else duration,
+        "OutPutBus_Name": audio.get('OutputBus_Name', ''),
+        "OutPutBus_BusVolume": _blank(audio.get('OutputBus_BusVolume')),
+        "OutPutBus_Volume": _blank(audio.get('OutputBus_Volume')),
+    }
+    # Bus层级
+    bus_ancestors = audio.get("OutputBus_ancestors_list", [])
+    for i in range(max_bus_depth):
+        node = bus_ancestors[i] if i < len(bus_ancestors) else {}
+        row[f"OutputBus父{i+1}名"] = node.get("name", "")
+        row[f"Bus_BusVolume{i+1}"] = _blank(node.get("bus_volume"))
+        row[f"Bus_Volume{i+1}"] = _blank(node.get("volume"))
+    # 音频对象层级
+    ancestors = audio.get("ancestors_list", [])
+    for i in range(max_depth):
+        node = ancestors[i] if i < len(ancestors) else {}
+        row[f"父级名{i+1}"] = node.get("name", "")
+        row[f"父级音量{i+1}"] = _blank(node.get("volume"))
+        row[f"父级MakeUpGain{i+1}"] = _blank(node.get("makeup"))
+    return row
+
+
+def run_loudness_analysis(audio_files, csv_path, progress_callback=None, status_callback=None, is_cancelled=None):
+    """
+    分析 audio_files 并写出 csv_path 及其附属文件（层级汇总、响度曲线、重复文件）。
+    返回分析失败的 [(file_path, 错误信息)]；is_cancelled() 为真时抛出 AnalysisCancelled。
+    """
+    fieldnames, max_depth, max_bus_depth = report_fieldnames(audio_files)
+    gain_tree = GainTree.from_audio_files(audio_files)
+    results = []
+    ingame_values = []
+    failed_files = []
+    total = len(audio_files)
+    finished = 0
+
+    # 读文件头：时长用于按时长加权的进度，帧数 × 声道数用于估计每个任务的内存，
+    # 帧数与采样率用于预先分配响度曲线的共享区段
+    if status_callback:
+        status_callback("正在读取音频信息...")
+    infos = [probe(audio['file_path']) for audio in audio_files]
+    durations = [info.duration if info else None for info in infos]
+    # 同一文件被多个音频源引用、或不同文件名下字节完全相同时，每组只分析第一个
+    with trace.span("duplicates.exact", "io", files=total):
+        groups = identical_files([audio['file_path'] for audio in audio_files])
+    members = {group[0]: group for group in groups}
+    curves_path, index_path = curve_store_paths(csv_path)
+    arena = ResultArena(
+        [lufs_game_wwise.curve_lengths(info.frames, info.samplerate) if info and i in members else (0, 0)
+         for i, info in enumerate(infos)],
+        dtype=CURVE_DTYPE, path=curves_path
+    )
+    jobs = [
+        Job(i, lufs_game_wwise.estimate_memory(infos[i].frames, infos[i].channels, infos[i].samplerate,
+                                               near_duplicates=NEAR_DUPLICATE_DETECTION) if infos[i] else 0,
+            (i, audio_files[i]['file_path'], arena.handle(i), NEAR_DUPLICATE_DETECTION))
+        for i in members
+    ]
+    curve_entries = {}
+    fingerprints = FingerprintIndex()
+    progress = ProgressModel(total, sum(map(ProgressModel.weight, durations)))
+
+    # 多进程并发分析，执行中任务的预计内存之和不超过可用内存的 ANALYSIS_MEMORY_FRACTION
+    budget = int(psutil.virtual_memory().available * ANALYSIS_MEMORY_FRACTION)
+    with ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS) as executor:
+        scheduler = MemoryBudgetScheduler(executor, ANALYSIS_WORKERS, budget, submit=trace.submit)
+        scheduled = scheduler.run(analyse_one, jobs)
+        for job, future in scheduled:
+            if is_cancelled and is_cancelled():
+                scheduled.close()
+                raise AnalysisCancelled("用户取消操作")
+            index, stats, error, lengths, fingerprint = trace.result(future)
+            if fingerprint:
+                path = audio_files[index]['file_path']
+                aliases = {audio_files[m]['file_path'] for m in members[index]} - {path}
+                fingerprints.add(path, fingerprint["digest"], fingerprint.get("hashes", ()),
+                                 fingerprint.get("times", ()), sorted(aliases))
+            if lengths and infos[index]:
+                rate = infos[index].samplerate
+                hops = [hop / rate for _, hop in lufs_game_wwise.curve_windows(rate)]
+            for member in members[index]:
+                # 使用原对象，GainTree 以对象本身索引音频源
+                audio = audio_files[member]
+                duration = durations[member]
+                if lengths and infos[index]:
+                    # 重复文件共用同一段曲线数据
+                    curve_entries[audio['file_path']] = (index, lengths, hops)
+                progress.advance(duration)
+                finished += 1
+                if progress.due(force=finished == total):
+                    if status_callback:
+                        status_callback(f"分析({finished}/{total}): {audio['name']}\n{progress.describe()}")
+                    if progress_callback:
+                        progress_callback(progress.percent)
+                if error or stats is None or stats["LUFS-I"] is None:
+                    failed_files.append((audio['file_path'], error or "未知错误"))
+                else:
+                    # 前三列：Bus 链与父级链的累计增益（每个层级节点只计算一次）
+                    row = report_row(audio, stats, duration, gain_tree.offset(audio), max_depth, max_bus_depth)
+                    results.append(row)
+                    ingame_values.append((audio, row["LUFS-I-Ingame"]))
+
+    # 写入CSV
+    with trace.span("csv.write", "io", rows=len(results)) as sp:
+        with open(csv_path, "w", newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in results:
+                writer.writerow(row)
+            sp.add(bytes=f.tell())
+    # 各容器 / Bus 的 LUFS-I-Ingame 汇总
+    with trace.span("csv.rollup", "io"):
+        write_rollup_csv(rollup_csv_path(csv_path), gain_tree.rollup(ingame_values))
+    # 响度曲线已由子进程写入数据文件，这里只写索引
+    with trace.span("curves.index", "io", rows=len(curve_entries)):
+        arena.close()
+        write_index(index_path, arena, curve_entries)
+    # 完全相同的源文件；开启近似重复检测时另列出相似的文件对
+    with trace.span("duplicates.near", "io", files=len(fingerprints.paths)):
+        near = fingerprints.near_duplicates() if NEAR_DUPLICATE_DETECTION else []
+        write_duplicates_csv(duplicates_csv_path(csv_path), fingerprints.exact_duplicates(), near)
+    return failed_files
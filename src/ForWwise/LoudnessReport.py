@@ -1,21 +1,34 @@
+import os
 import sys
 import socket
 import pandas as pd
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLineEdit, QTableWidget, QTableWidgetItem,
     QHBoxLayout, QLabel, QHeaderView, QPushButton, QFileDialog,QMessageBox,QMenu,
-    QColorDialog, QDialog  
+    QColorDialog, QDialog, QTreeWidget, QTreeWidgetItem
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QColor, QBrush
 from waapi import WaapiClient, CannotConnectToWaapiException
+from backend.loudness_index import LoudnessIndex, LoudnessCache
+from utils.live_loudness_thread import LiveLoudnessThread
+from utils.config import LOUDNESS_CACHE_FILE
+from AudioAnalyse.HierarchyGain import rollup_csv_path, ROLLUP_FIELDS
+from AudioAnalyse.AnalyseLUFS_Game_Wwise import LOUDNESS_STATS
+from backend.curve_store import CurveStore
+
+REPORT_COLUMNS = ["LUFS-I-Ingame", "LUFS-M-MAX-Ingame", "name", "wwise_path"]
+# 真峰值与 PLR：旧版本生成的 CSV 没有这两列，显示为空
+EXTRA_COLUMNS = ["TruePeak-Ingame", "PLR"]
+# CSV 中可选读取的列：用于实时更新时复用已分析的响度
+OPTIONAL_COLUMNS = ["file_path"] + list(LOUDNESS_STATS)
 
 
 class NumericItem(QTableWidgetItem):
-    """用于数字排序的表格项：按数值排序，文本显示保留两位小数"""
+    """用于数字排序的表格项：按数值排序，文本显示保留两位小数，缺失值显示为空"""
     def __init__(self, value: float):
-        self._value = float(value)
-        super().__init__(f"{self._value:.2f}")
+        self._value = float("nan") if value is None or pd.isna(value) else float(value)
+        super().__init__("" if self._value != self._value else f"{self._value:.2f}")
 
     def __lt__(self, other):
         if isinstance(other, NumericItem):
@@ -37,8 +50,11 @@ class LoudnessSearchUI(QWidget):
         self.highlighted_paths = {}          # 路径 -> 行高亮颜色
         self.highlight_color = QColor(255, 200, 200)
         self.csv_path = None
+        self.curve_store = None             # 分析时保存的响度曲线（打开 CSV 时加载索引）
         self._name_col_auto_sized = False
         self._path_col_auto_sized = False
+        self.live_index = None
+        self.live_thread = None
 
         # 搜索框和范围筛选
         self.filter_layout = QHBoxLayout()
@@ -49,6 +65,17 @@ class LoudnessSearchUI(QWidget):
         self.filter_layout.addWidget(self.open_btn)
         self.open_btn.clicked.connect(self.open_csv)
 
+        # 实时更新：订阅 Wwise 变化，只刷新受影响的行
+        self.live_btn = QPushButton("实时更新", self)
+        self.live_btn.setCheckable(True)
+        self.filter_layout.addWidget(self.live_btn)
+        self.live_btn.toggled.connect(self.toggle_live_update)
+
+        # 层级汇总：按容器 / Bus 查看 LUFS-I-Ingame 的最小/最大/平均值
+        self.rollup_btn = QPushButton("层级汇总", self)
+        self.filter_layout.addWidget(self.rollup_btn)
+        self.rollup_btn.clicked.connect(self.show_rollup)
+
         self.search_box = QLineEdit(self)
         self.search_box.setPlaceholderText("输入关键字搜索")
         self.filter_layout.addWidget(self.search_box)
@@ -75,6 +102,23 @@ class LoudnessSearchUI(QWidget):
         self.lufs_m_max.setFixedWidth(60)
         self.filter_layout.addWidget(self.lufs_m_max)
 
+        self.filter_layout.addWidget(QLabel("TP上限:"))
+        self.tp_max = QLineEdit(self)
+        self.tp_max.setPlaceholderText("dBTP")
+        self.tp_max.setFixedWidth(60)
+        self.filter_layout.addWidget(self.tp_max)
+
+        self.filter_layout.addWidget(QLabel("PLR范围:"))
+        self.plr_min = QLineEdit(self)
+        self.plr_min.setPlaceholderText("最小值")
+        self.plr_min.setFixedWidth(60)
+        self.filter_layout.addWidget(self.plr_min)
+        self.filter_layout.addWidget(QLabel("~"))
+        self.plr_max = QLineEdit(self)
+        self.plr_max.setPlaceholderText("最大值")
+        self.plr_max.setFixedWidth(60)
+        self.filter_layout.addWidget(self.plr_max)
+
         # 添加高亮按钮
         self.highlight_btn = QPushButton("设置颜色", self)
         self.filter_layout.addWidget(self.highlight_btn)
@@ -101,9 +145,12 @@ class LoudnessSearchUI(QWidget):
         self.lufs_i_max.returnPressed.connect(self.on_search)
         self.lufs_m_min.returnPressed.connect(self.on_search)
         self.lufs_m_max.returnPressed.connect(self.on_search)
+        self.tp_max.returnPressed.connect(self.on_search)
+        self.plr_min.returnPressed.connect(self.on_search)
+        self.plr_max.returnPressed.connect(self.on_search)
 
         # 默认无数据
-        self.df = pd.DataFrame(columns=["LUFS-I-Ingame", "LUFS-M-MAX-Ingame", "name", "wwise_path"])
+        self.df = pd.DataFrame(columns=REPORT_COLUMNS + EXTRA_COLUMNS)
         self.show_data(self.df)
 
         # 表格设置...
@@ -252,31 +299,231 @@ class LoudnessSearchUI(QWidget):
         if file_path:
             self.csv_path = file_path
             try:
-                # 只读取需要的 4 列，并显式指定类型，关闭 low_memory 分块推断
+                # 只读取需要的列，并显式指定类型，关闭 low_memory 分块推断
+                wanted = set(REPORT_COLUMNS + EXTRA_COLUMNS + OPTIONAL_COLUMNS)
                 df = pd.read_csv(
                     file_path,
-                    usecols=["LUFS-I-Ingame", "LUFS-M-MAX-Ingame", "name", "wwise_path"],
+                    usecols=lambda c: c in wanted,
                     dtype={
                         "LUFS-I-Ingame": "float64",
                         "LUFS-M-MAX-Ingame": "float64",
                         "name": "string",
                         "wwise_path": "string",
+                        "file_path": "string",
                     },
                     low_memory=False,
                 )
 
                 df["LUFS-I-Ingame"] = df["LUFS-I-Ingame"].astype(float)
                 df["LUFS-M-MAX-Ingame"] = df["LUFS-M-MAX-Ingame"].astype(float)
+                for col in EXTRA_COLUMNS:
+                    df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else float("nan")
 
                 self.df = df
+                self.curve_store = CurveStore.open(file_path)
                 self.highlighted_paths.clear()
                 self._name_col_auto_sized = False
                 self._path_col_auto_sized = False
                 self.show_data(self.df)
             except Exception as e:
-                self.df = pd.DataFrame(columns=["LUFS-I-Ingame", "LUFS-M-MAX-Ingame", "name", "wwise_path"])
+                self.df = pd.DataFrame(columns=REPORT_COLUMNS + EXTRA_COLUMNS)
                 self.show_data(self.df)
                 print("CSV读取失败：", e)
+    def show_rollup(self):
+        """读取分析时一并生成的 *_层级汇总.csv，以树形显示各层级的响度分布"""
+        rollup_path = rollup_csv_path(self.csv_path) if self.csv_path else None
+        if not rollup_path or not os.path.exists(rollup_path):
+            QMessageBox.information(self, "提示", "未找到层级汇总文件，请先打开由响度分析生成的CSV。")
+            return
+        try:
+            df = pd.read_csv(rollup_path, dtype={"类型": "string", "路径": "string"})
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"层级汇总读取失败：{e}")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("层级汇总")
+        dialog.resize(900, 600)
+        layout = QVBoxLayout(dialog)
+        tree = QTreeWidget(dialog)
+        columns = ["名称"] + ROLLUP_FIELDS[3:]
+        tree.setColumnCount(len(columns))
+        tree.setHeaderLabels(columns)
+        layout.addWidget(tree)
+
+        # 路径按层级排序后，父节点总是先于子节点出现
+        items = {}
+        df = df.sort_values(["类型", "层级"])
+        for row in df.itertuples(index=False):
+            kind, path = row[0], row[1]
+            parent_path = path.rsplit("\\", 1)[0]
+            parent = items.get((kind, parent_path))
+            values = [path.rsplit("\\", 1)[-1]]
+            for val in row[3:]:
+                values.append("" if pd.isna(val) else (f"{val:.2f}" if isinstance(val, float) else str(val)))
+            if parent is None:
+                parent = items.get((kind, None))
+                if parent is None:
+                    parent = items[(kind, None)] = QTreeWidgetItem(tree, [kind])
+            items[(kind, path)] = QTreeWidgetItem(parent, values)
+        tree.expandToDepth(1)
+        tree.resizeColumnToContents(0)
+        dialog.exec_()
+
+    def show_curves(self, wwise_path, name=""):
+        """绘制分析时保存的瞬时/短期响度曲线（文件自身响度，未计入层级增益），标出最大瞬时响度位置。"""
+        match = self.df[self.df["wwise_path"] == wwise_path]
+        file_path = match["file_path"].iloc[0] if len(match) and "file_path" in match.columns else None
+        curves = self.curve_store.get(file_path) if self.curve_store and isinstance(file_path, str) else None
+        if not curves:
+            QMessageBox.information(self, "提示", "该音频没有保存的响度曲线，请重新进行响度分析。")
+            return
+
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"响度曲线 - {name or os.path.basename(file_path)}")
+        dialog.resize(900, 450)
+        layout = QVBoxLayout(dialog)
+        figure = Figure(figsize=(9, 4), tight_layout=True)
+        canvas = FigureCanvasQTAgg(figure)
+        layout.addWidget(NavigationToolbar2QT(canvas, dialog))
+        layout.addWidget(canvas)
+
+        ax = figure.add_subplot(111)
+        times, values = curves["momentary"]
+        ax.plot(times, values, linewidth=1, label="瞬时响度 (400ms)")
+        if len(curves["short_term"][0]):
+            ax.plot(*curves["short_term"], linewidth=1.5, label="短期响度 (3s)")
+        if len(values):
+            peak = int(values.argmax())
+            ax.plot(times[peak], values[peak], "rv")
+            ax.annotate(f"{values[peak]:.1f} LUFS @ {times[peak]:.1f}s", (times[peak], values[peak]),
+                        textcoords="offset points", xytext=(6, 6))
+        if "LUFS-I" in match.columns and not pd.isna(match["LUFS-I"].iloc[0]):
+            ax.axhline(float(match["LUFS-I"].iloc[0]), color="g", linestyle="--", linewidth=1, label="综合响度")
+        ax.set_ylim(bottom=max(float(values.min()) - 3, -70) if len(values) else -70)
+        ax.set_xlabel("时间 (秒)")
+        ax.set_ylabel("LUFS")
+        ax.grid(True, linestyle="--", alpha=0.5)
+        ax.legend(loc="lower right")
+        canvas.draw()
+        dialog.exec_()
+
+    def toggle_live_update(self, checked):
+        if not checked:
+            if self.live_thread and self.live_thread.isRunning():
+                # 线程退出前禁用按钮，避免在旧线程仍在停止时重新开启
+                self.live_btn.setEnabled(False)
+                self.live_thread.stop()
+            return
+        if not self._is_waapi_port_open():
+            QMessageBox.warning(self, "WAAPI 未连接", "未检测到 Wwise 的 WAAPI 端口（127.0.0.1:8080）。")
+            self.live_btn.setChecked(False)
+            return
+        if self.live_thread and self.live_thread.isRunning():
+            return
+
+        if self.live_index is None:
+            self.live_index = LoudnessIndex(LoudnessCache(LOUDNESS_CACHE_FILE))
+            self._seed_live_cache()
+
+        self.live_thread = LiveLoudnessThread(self.live_index, self)
+        self.live_thread.rows_updated.connect(self._on_live_rows)
+        self.live_thread.status.connect(lambda msg: self.setWindowTitle(f"响度报告 - {msg}"))
+        self.live_thread.failed.connect(self._on_live_failed)
+        self.live_thread.finished.connect(self._on_live_finished)
+        self.live_thread.start()
+
+    def _seed_live_cache(self):
+        """
+        已打开的 CSV 中的响度直接写入缓存，避免重新分析。
+        只写入 CSV 生成之后未再改动的文件；之后重新导入或编辑过的文件留给索引重新分析。
+        """
+        if not self.csv_path or not all(c in self.df.columns for c in OPTIONAL_COLUMNS):
+            return
+        try:
+            csv_mtime = os.stat(self.csv_path).st_mtime
+        except OSError:
+            return
+        for record in self.df[OPTIONAL_COLUMNS].to_dict("records"):
+            path = record.pop("file_path")
+            if not isinstance(path, str) or pd.isna(record["LUFS-I"]) \
+                    or self.live_index.cache.is_current(path):
+                continue
+            try:
+                if os.stat(path).st_mtime > csv_mtime:
+                    continue
+            except OSError:
+                continue
+            self.live_index.cache.put(path, {
+                k: (None if pd.isna(v) else float(v)) for k, v in record.items()
+            })
+
+    def _on_live_finished(self):
+        self.setWindowTitle("响度报告")
+        self.live_btn.setEnabled(True)
+        if self.live_btn.isChecked():
+            # 线程因错误退出时按钮状态与实际一致
+            self.live_btn.setChecked(False)
+
+    def _on_live_failed(self, msg):
+        self.live_btn.setChecked(False)
+        QMessageBox.warning(self, "实时更新失败", msg)
+
+    def _has_filters(self):
+        return any(w.text().strip() for w in (
+            self.search_box, self.lufs_i_min, self.lufs_i_max, self.lufs_m_min, self.lufs_m_max,
+            self.tp_max, self.plr_min, self.plr_max
+        ))
+
+    def _on_live_rows(self, rows, removed_paths):
+        """合并实时索引推送的行：只更新受影响的表格行，有增删或筛选条件时才整体刷新。"""
+        df = self.df
+        if removed_paths:
+            df = df[~df["wwise_path"].isin(removed_paths)]
+        added = False
+        if rows:
+            new = pd.DataFrame(rows)
+            added = not new["wwise_path"].isin(df["wwise_path"]).all()
+            keep = df[~df["wwise_path"].isin(new["wwise_path"])]
+            df = pd.concat([keep, new[[c for c in new.columns if c in df.columns or c in REPORT_COLUMNS]]],
+                           ignore_index=True)
+        self.df = df
+
+        if removed_paths or added or self._has_filters():
+            self.on_search()
+            return
+
+        row_of = {}
+        for r in range(self.table.rowCount()):
+            item = self.table.item(r, 3)
+            if item:
+                row_of[item.text()] = r
+        sort_enabled = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        for data in rows:
+            r = row_of.get(data["wwise_path"])
+            if r is None:
+                continue
+            self.table.setItem(r, 0, NumericItem(data["LUFS-I-Ingame"]))
+            self.table.setItem(r, 1, NumericItem(data["LUFS-M-MAX-Ingame"]))
+            self.table.setItem(r, 4, NumericItem(data.get("TruePeak-Ingame")))
+            self.table.setItem(r, 5, NumericItem(data.get("PLR")))
+        self._apply_backgrounds()
+        self.table.setSortingEnabled(sort_enabled)
+        if sort_enabled:
+            header = self.table.horizontalHeader()
+            if header.sortIndicatorSection() >= 0:
+                self.table.sortItems(header.sortIndicatorSection(), header.sortIndicatorOrder())
+
+    def closeEvent(self, event):
+        if self.live_thread and self.live_thread.isRunning():
+            self.live_thread.stop()
+            self.live_thread.wait(2000)
+        super().closeEvent(event)
+
     def on_table_context_menu(self, pos):
         """表格右键菜单：复制 name / 路径，或为选中行设置颜色"""
         item = self.table.itemAt(pos)
@@ -308,6 +555,10 @@ class LoudnessSearchUI(QWidget):
         if wwise_path:
             act_copy_path = menu.addAction("复制路径")
 
+        act_curve = None
+        if wwise_path and self.curve_store is not None:
+            act_curve = menu.addAction("查看响度曲线")
+
         if menu.actions():
             menu.addSeparator()
 
@@ -325,6 +576,8 @@ class LoudnessSearchUI(QWidget):
             clipboard.setText(name)
         elif selected == act_copy_path:
             clipboard.setText(wwise_path)
+        elif selected == act_curve:
+            self.show_curves(wwise_path, name)
         elif selected == act_color_row:
             # 以点击行的已有颜色或默认颜色作为初始值
             base_color = self.highlighted_paths.get(wwise_path, self.highlight_color)
@@ -360,9 +613,9 @@ class LoudnessSearchUI(QWidget):
         self.table.setSortingEnabled(False)
         self.table.clearContents()
         self.table.setRowCount(len(df))
-        self.table.setColumnCount(4)
+        self.table.setColumnCount(6)
         self.table.setHorizontalHeaderLabels(
-            ["LUFS-I-Ingame", "LUFS-M-Ingame", "name", "wwise_path"]
+            ["LUFS-I-Ingame", "LUFS-M-Ingame", "name", "wwise_path", "TruePeak-Ingame", "PLR"]
         )
 
         for row, (_, data) in enumerate(df.iterrows()):
@@ -386,6 +639,8 @@ class LoudnessSearchUI(QWidget):
             self.table.setItem(row, 1, item1)
             self.table.setItem(row, 2, item2)
             self.table.setItem(row, 3, item3)
+            self.table.setItem(row, 4, NumericItem(data.get("TruePeak-Ingame")))
+            self.table.setItem(row, 5, NumericItem(data.get("PLR")))
                 # 仅第一次载入数据时，让 name 和 wwise_path 列按内容自动调宽
         if len(df) > 0:
             if not self._name_col_auto_sized:
@@ -434,8 +689,12 @@ class LoudnessSearchUI(QWidget):
         i_max_txt = self.lufs_i_max.text().strip()
         m_min_txt = self.lufs_m_min.text().strip()
         m_max_txt = self.lufs_m_max.text().strip()
+        tp_max_txt = self.tp_max.text().strip()
+        plr_min_txt = self.plr_min.text().strip()
+        plr_max_txt = self.plr_max.text().strip()
 
-        if not (has_keyword or i_min_txt or i_max_txt or m_min_txt or m_max_txt):
+        if not (has_keyword or i_min_txt or i_max_txt or m_min_txt or m_max_txt
+                or tp_max_txt or plr_min_txt or plr_max_txt):
             self.show_data(self.df)
             return
 
@@ -470,6 +729,21 @@ class LoudnessSearchUI(QWidget):
             df = df[df["LUFS-M-MAX-Ingame"] <= lufs_m_max]
         except ValueError:
             pass
+        try:
+            tp_max = float(tp_max_txt)
+            df = df[df["TruePeak-Ingame"] <= tp_max]
+        except ValueError:
+            pass
+        try:
+            plr_min = float(plr_min_txt)
+            df = df[df["PLR"] >= plr_min]
+        except ValueError:
+            pass
+        try:
+            plr_max = float(plr_max_txt)
+            df = df[df["PLR"] <= plr_max]
+        except ValueError:
+            pass
 
         self.show_data(df)
     def highlight_in_range_rows(self):
@@ -516,6 +790,18 @@ class LoudnessSearchUI(QWidget):
             lufs_m_max = float(self.lufs_m_max.text())
         except ValueError:
             lufs_m_max = None
+        try:
+            tp_max = float(self.tp_max.text())
+        except ValueError:
+            tp_max = None
+        try:
+            plr_min = float(self.plr_min.text())
+        except ValueError:
+            plr_min = None
+        try:
+            plr_max = float(self.plr_max.text())
+        except ValueError:
+            plr_max = None
 
         # 只更新字典，让 _apply_backgrounds 统一上色
         for row in range(self.table.rowCount()):
@@ -523,6 +809,8 @@ class LoudnessSearchUI(QWidget):
                 lufs_i = float(self.table.item(row, 0).text())
                 lufs_m = float(self.table.item(row, 1).text())
                 wwise_path = self.table.item(row, 3).text()
+                tp = self.table.item(row, 4)._value
+                plr = self.table.item(row, 5)._value
             except Exception:
                 continue
 
@@ -535,6 +823,13 @@ class LoudnessSearchUI(QWidget):
                 in_range = False
             if lufs_m_max is not None and lufs_m > lufs_m_max:
                 in_range = False
+            # 缺失的真峰值 / PLR（NaN）不满足任何范围条件
+            if tp_max is not None and not tp <= tp_max:
+                in_range = False
+            if plr_min is not None and not plr >= plr_min:
+                in_range = False
+            if plr_max is not None and not plr <= plr_max:
+                in_range = False
 
             if in_range:
                 self.highlighted_paths[wwise_path] = color
@@ -552,7 +847,9 @@ class LoudnessSearchUI(QWidget):
                 "LUFS-I-Ingame": lufs_i,
                 "LUFS-M-MAX-Ingame": lufs_m,
                 "name": name,
-                "wwise_path": wwise_path
+                "wwise_path": wwise_path,
+                "TruePeak-Ingame": self.table.item(row, 4)._value,
+                "PLR": self.table.item(row, 5)._value,
             })
         return pd.DataFrame(rows)
 
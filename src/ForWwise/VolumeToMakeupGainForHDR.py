@@ -1,82 +1,164 @@
 from waapi import WaapiClient, CannotConnectToWaapiException
 
-def get_selected_and_descendants_volume_makeup():
+# 每次 ak.wwise.core.object.set 提交的对象数量
+SET_BATCH_SIZE = 500
+# ak.wwise.core.object.set 从 Wwise 2022.1 起提供，更早的版本逐个对象 setProperty
+OBJECT_SET_MIN_YEAR = 2022
+UNDO_NAME = "Volume转MakeUpGain(HDR)"
+
+
+class GainChange:
+    """单个对象的 Volume/MakeUpGain 修改：Volume 归零，原 Volume 并入 MakeUpGain。"""
+    __slots__ = ("id", "name", "path", "old_volume", "old_makeup", "new_volume", "new_makeup")
+
+    def __init__(self, obj_id, name, path, old_volume, old_makeup):
+        self.id = obj_id
+        self.name = name
+        self.path = path
+        self.old_volume = old_volume
+        self.old_makeup = old_makeup
+        self.new_volume = 0.0
+        self.new_makeup = old_volume + old_makeup
+
+    def describe(self) -> str:
+        return (f"{self.path}: Volume {self.old_volume:g} → {self.new_volume:g}, "
+                f"MakeUpGain {self.old_makeup:g} → {self.new_makeup:g}")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_selected_and_descendants(client):
+    """取当前选中对象及其全部后代的 Volume/MakeUpGain（按 id 去重）。"""
+    result = client.call("ak.wwise.ui.getSelectedObjects")
+    selected = result.get('objects', []) if result else []
+    if not selected:
+        return []
+    ids = [obj['id'] for obj in selected]
+    returns = ["id", "name", "type", "path", "@Volume", "@MakeUpGain"]
+
+    self_info = client.call("ak.wwise.core.object.get", {
+        "from": {"id": ids},
+        "options": {"return": returns}
+    })
+    descendants_info = client.call("ak.wwise.core.object.get", {
+        "from": {"id": ids},
+        "transform": [{"select": ["descendants"]}],
+        "options": {"return": returns}
+    })
+    objects = (self_info or {}).get('return', []) + (descendants_info or {}).get('return', [])
+    return list({obj['id']: obj for obj in objects}.values())
+
+
+def compute_hdr_gain_changes(objects):
+    """
+    本地计算所有修改，不访问 Wwise。
+    只处理同时具有 Volume 与 MakeUpGain 的对象（否则 Volume 归零会丢失增益），
+    Volume 已为 0 的对象无需修改。
+    返回 (changes, skipped)，skipped 为缺少 MakeUpGain 而跳过的对象路径。
+    """
+    changes = []
+    skipped = []
+    for obj in objects:
+        volume = _to_float(obj.get("@Volume"))
+        makeup = _to_float(obj.get("@MakeUpGain"))
+        if volume is None:
+            continue
+        if makeup is None:
+            if volume != 0:
+                skipped.append(obj.get("path") or obj.get("name", ""))
+            continue
+        if volume == 0:
+            continue
+        changes.append(GainChange(obj['id'], obj.get("name", ""), obj.get("path", ""), volume, makeup))
+    return changes, skipped
+
+
+def format_diff(changes, skipped=None) -> str:
+    lines = [f"共 {len(changes)} 个对象将被修改："]
+    lines += [c.describe() for c in changes]
+    if skipped:
+        lines.append("")
+        lines.append(f"以下 {len(skipped)} 个对象没有 MakeUpGain，已跳过：")
+        lines += skipped
+    return "\n".join(lines)
+
+
+def supports_object_set(client) -> bool:
+    """通过 ak.wwise.core.getInfo 判断 Wwise 版本是否支持批量 ak.wwise.core.object.set。"""
+    info = client.call("ak.wwise.core.getInfo")
+    year = ((info or {}).get("version") or {}).get("year")
+    return isinstance(year, int) and year >= OBJECT_SET_MIN_YEAR
+
+
+def _set_batch(client, batch):
+    result = client.call("ak.wwise.core.object.set", {
+        "objects": [
+            {"object": c.id, "@Volume": c.new_volume, "@MakeUpGain": c.new_makeup}
+            for c in batch
+        ]
+    })
+    return [] if result is not None else [c.path for c in batch]
+
+
+def _set_properties(client, batch):
+    failed = []
+    for c in batch:
+        ok = all(
+            client.call("ak.wwise.core.object.setProperty",
+                        {"object": c.id, "property": prop, "value": value}) is not None
+            for prop, value in (("Volume", c.new_volume), ("MakeUpGain", c.new_makeup))
+        )
+        if not ok:
+            failed.append(c.path)
+    return failed
+
+
+def apply_hdr_gain_changes(client, changes, batch_size=SET_BATCH_SIZE, progress_callback=None):
+    """
+    通过批量 ak.wwise.core.object.set 写入（Wwise 2022.1 之前的版本回退为逐个 setProperty），
+    全部修改放在同一个撤销组内；写入期间开启自动化模式，避免 Wwise 弹窗打断。
+    返回写入失败的对象路径列表。
+    """
+    failed = []
+    total = len(changes)
+    # 进入撤销组之前确定写入方式，避免旧版本在中途才发现接口不存在
+    write = _set_batch if supports_object_set(client) else _set_properties
+    client.call("ak.wwise.debug.enableAutomationMode", {"enable": True})
+    client.call("ak.wwise.core.undo.beginGroup")
+    try:
+        for start in range(0, total, batch_size):
+            batch = changes[start:start + batch_size]
+            failed.extend(write(client, batch))
+            if progress_callback:
+                progress_callback(int(min(start + batch_size, total) / total * 100))
+    finally:
+        client.call("ak.wwise.core.undo.endGroup", {"displayName": UNDO_NAME})
+        client.call("ak.wwise.debug.enableAutomationMode", {"enable": False})
+    return failed
+
+
+def get_selected_and_descendants_volume_makeup(dry_run=False):
     try:
         with WaapiClient() as client:
-    
-            result = client.call("ak.wwise.ui.getSelectedObjects")
-            selected = result.get('objects', []) if result else []
-            if not selected:
+            objects = get_selected_and_descendants(client)
+            if not objects:
                 print("未选中任何对象。")
                 return []
-
-            ids = [obj['id'] for obj in selected]
-
-           
-            all_objects_info_descendants = client.call("ak.wwise.core.object.get", {
-                "from": {"id": ids},
-                "transform": [{"select": ["descendants"]}],
-                "options": {"return": ["id", "name", "type", "path", "@Volume", "@MakeUpGain"]}
-            })
-            descendants_objects = (all_objects_info_descendants or {}).get('return', [])
-            
-            
-            all_objects_info_self = client.call("ak.wwise.core.object.get", {
-                "from": {"id": ids},
-                "options": {"return": ["id", "name", "type", "path", "@Volume", "@MakeUpGain"]}
-            })
-            self_objects = (all_objects_info_self or {}).get('return', [])
-            
-            all_objects = {obj['id']: obj for obj in self_objects + descendants_objects}
-
-     
-            for obj in all_objects.values():
-                volume = obj.get("@Volume")
-                makeup_gain = obj.get("@MakeUpGain")
-                name = obj.get("name")
-               
-                if volume is not None or makeup_gain is not None:
-                    try:
-                        volume_f = float(volume) if volume is not None else 0
-                    except (TypeError, ValueError):
-                        volume_f = 0
-                    try:
-                        makeup_gain_f = float(makeup_gain) if makeup_gain is not None else 0
-                    except (TypeError, ValueError):
-                        makeup_gain_f = 0
-                    new_makeup_gain = volume_f + makeup_gain_f
-                    
-                    print(name,volume_f, makeup_gain_f, new_makeup_gain)
-                    
-                   
-                    if volume is not None:
-                        try:
-                            client.call("ak.wwise.core.object.setProperty", {
-                                "object": obj['id'],
-                                "property": "Volume",
-                                "value": 0
-                            })
-                        except Exception as e:
-                            print(f"{obj.get('name')}: 设置Volume失败，原因：{e}")
-
-                   
-                    if makeup_gain is not None:
-                        try:
-                            client.call("ak.wwise.core.object.setProperty", {
-                                "object": obj['id'],
-                                "property": "MakeUpGain",
-                                "value": new_makeup_gain
-                            })
-                        except Exception as e:
-                            print(f"{obj.get('name')}: 设置MakeUpGain失败，原因：{e}")
-
-                    print(f"{obj.get('name')}: Volume设为0，MakeUpGain设为{new_makeup_gain}")
-                else:
-                    print(f"{obj.get('name')}: 无Volume和MakeUpGain属性，跳过。")
-
+            changes, skipped = compute_hdr_gain_changes(objects)
+            print(format_diff(changes, skipped))
+            if not dry_run and changes:
+                failed = apply_hdr_gain_changes(client, changes)
+                for path in failed:
+                    print(f"{path}: 设置失败")
+            return changes
     except CannotConnectToWaapiException:
         print("无法连接到WAAPI，请确保Wwise已开启WAAPI。")
         return []
 
 if __name__ == "__main__":
-    get_selected_and_descendants_volume_makeup()
\ No newline at end of file
+    get_selected_and_descendants_volume_makeup()
@@ -3,7 +3,6 @@ import traceback
 from reapy import reascript_api as rpp
 import stat
 import os
-import time
 import asyncio
 
 from matplotlib import rcParams
@@ -14,20 +13,24 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QPixmap, QIcon, QPalette, QBrush, QFont
 from PyQt5.QtCore import Qt, QTimer, QSettings, QThread, pyqtSignal
 from utils.config import (
-    APP_VERSION, CONFIG_FILE, VERSION_FILE_URL,
+    APP_VERSION, CONFIG_FILE, VERSION_FILE_URL, WWU_INDEX_CACHE_FILE,
     GITHUB_OWNER, GITHUB_REPO, RELEASE_ASSET_EXE, TAG_PREFIX
 )
 from backend.wwise_service import WwiseService
 from backend.reaper_service import ReaperService
+from backend.render_planner import plan_renders
 from backend.updater import Updater
 from utils.download_thread import DownloadThread
 from utils.resources import resource_path
 from utils.update_runner import replace_and_restart
+from utils import trace, profiler
 from AudioAnalyse import AudioAnalyse as audio_analysis
 from AudioAnalyse.AudioAnalysisThread import AudioAnalysisThread
 from AudioAnalyse import AnalyseLUFS_Game_Wwise as lufs_game_wwise
 from AudioAnalyse.AudioAnalysisThread import AudioAnalysisThread, LufsAnalysisThread
 from ForWwise.LoudnessReport import show_loudness_report
+from ForWwise import VolumeToMakeupGainForHDR as hdr_gain
+from waapi import WaapiClient, CannotConnectToWaapiException
 
 rcParams['font.sans-serif'] = ['SimHei']  # 使用黑体
 rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
@@ -38,8 +41,28 @@ class GetAudioSourcesThread(QThread):
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
 
+    def __init__(self, project_path=None, scope=None, parent=None):
+        super().__init__(parent)
+        # project_path 不为空时离线读取 .wwu 工程，不经过 WAAPI
+        self.project_path = project_path
+        self.scope = scope
+
+    @profiler.worker
     def run(self):
         try:
+            if self.project_path:
+                from backend.wwise_project import load_audio_sources
+                audio_files = load_audio_sources(
+                    self.project_path, self.scope,
+                    cache_path=WWU_INDEX_CACHE_FILE,
+                    progress_callback=self.progress.emit,
+                    status_callback=self.status.emit
+                )
+                if not audio_files:
+                    self.failed.emit("未找到音频源文件。")
+                else:
+                    self.finished_ok.emit(audio_files)
+                return
             # 关键：为当前线程创建事件循环
             try:
                 asyncio.set_event_loop(asyncio.new_event_loop())
@@ -61,6 +84,43 @@ class GetAudioSourcesThread(QThread):
 
 
 
+class HdrGainThread(QThread):
+    """
+    Volume转MakeUpGain（HDR）：
+    changes 为空时读取选中对象并本地计算修改（预览），否则批量写入 changes。
+    """
+    computed = pyqtSignal(list, list)   # changes, skipped
+    applied = pyqtSignal(list)          # failed paths
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int)
+
+    def __init__(self, changes=None, parent=None):
+        super().__init__(parent)
+        self.changes = changes
+
+    @profiler.worker
+    def run(self):
+        try:
+            try:
+                asyncio.set_event_loop(asyncio.new_event_loop())
+            except Exception:
+                pass
+            with WaapiClient() as client:
+                if self.changes is None:
+                    objects = hdr_gain.get_selected_and_descendants(client)
+                    changes, skipped = hdr_gain.compute_hdr_gain_changes(objects)
+                    self.computed.emit(changes, skipped)
+                else:
+                    failed = hdr_gain.apply_hdr_gain_changes(
+                        client, self.changes, progress_callback=self.progress.emit
+                    )
+                    self.applied.emit(failed)
+        except CannotConnectToWaapiException:
+            self.failed.emit("无法连接到Wwise，请确保Wwise已启动并启用WAAPI。")
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
 class GetSelectedFilesThread(QThread):
     finished_ok = pyqtSignal(list)
     failed = pyqtSignal(str)
@@ -69,6 +129,7 @@ class GetSelectedFilesThread(QThread):
         super().__init__(parent)
         self.service = service
 
+    @profiler.worker
     def run(self):
         try:
             files = self.service.get_selected_audio_files()
@@ -76,15 +137,37 @@ class GetSelectedFilesThread(QThread):
         except Exception as e:
             self.failed.emit(str(e))
 
+
+class GetSelectedDurationsThread(QThread):
+    # 路径列表 + WAAPI 返回的 {路径: duration}
+    finished_ok = pyqtSignal(list, dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, service, parent=None):
+        super().__init__(parent)
+        self.service = service
+
+    @profiler.worker
+    def run(self):
+        try:
+            durations = self.service.get_selected_audio_durations() or {}
+            self.finished_ok.emit(list(durations), durations)
+        except Exception as e:
+            self.failed.emit(str(e))
+
 class Wreaper(QWidget):
     # 前端（UI）
     def __init__(self):
         super().__init__()
         self.settings = QSettings("Wreaper", "WreaperApp")
+        if self.settings.value("trace_enabled", False, type=bool):
+            trace.enable()
         # 后端服务实例
         self.wwise_service = WwiseService()
         self.reaper_service = ReaperService()
         self.updater = Updater(VERSION_FILE_URL, "")
+        # 等待 Reaper 就绪的轮询定时器，同一时间只有一个
+        self.reaper_wait_timer = None
 
         # 下载相关
         self.download_thread = None
@@ -114,25 +197,40 @@ class Wreaper(QWidget):
         menubar = QMenuBar(self)
         menu = menubar.addMenu("功能")
         act_config = menu.addAction("配置Reaper启动路径")
+        act_region_layout = menu.addAction("区间导入设置")
+        act_hdr_gain = menu.addAction("Volume转MakeUpGain（HDR）")
         act_bg = menu.addAction("更换背景图")
         act_checkupdate = menu.addAction("检查更新")
+        act_trace = menu.addAction("记录耗时追踪")
+        act_trace.setCheckable(True)
+        act_trace.setChecked(trace.enabled())
+        # 隐藏项：按住 Shift 打开菜单时才显示
+        self.act_profile = menu.addAction("分析下一个操作（cProfile）")
+        self.act_profile.setCheckable(True)
+        menu.aboutToShow.connect(self._sync_profile_action)
 
         menu_audio = menubar.addMenu("音频分析")
         act_audio_centroid = menu_audio.addAction("音频频谱质心分析")
         act_audio_3d = menu_audio.addAction("音频3D频谱分析")
         act_audio_2d = menu_audio.addAction("音频2D频谱分析")
         act_audio_lufs = menu_audio.addAction("响度数据（Wwise项目）")
+        act_audio_lufs_offline = menu_audio.addAction("响度数据（离线Wwise工程）")
         act_loudness_report = menu_audio.addAction("响度报告")
         
-        # QAction.triggered 会传 bool(checked)，用 lambda 吞掉并传手动标记
-        act_config.triggered.connect(lambda checked=False: self.Select_reaperconfig())
-        act_bg.triggered.connect(lambda checked=False: self.change_background_image())
-        act_checkupdate.triggered.connect(lambda checked=False: self.check_update_and_prompt_async(manual=True))
-        act_audio_centroid.triggered.connect(lambda checked=False: self.audio_analysis_centroid())
-        act_audio_3d.triggered.connect(lambda checked=False: self.audio_analysis_3d())
-        act_audio_2d.triggered.connect(lambda checked=False: self.audio_analysis_2d())
-        act_audio_lufs.triggered.connect(lambda checked=False: self._analyse_audio_files_game_wwise())
-        act_loudness_report.triggered.connect(lambda checked=False: self.open_loudness_report())
+        # QAction.triggered 会传 bool(checked)，由 _profiled 吞掉
+        act_config.triggered.connect(self._profiled(self.Select_reaperconfig))
+        act_region_layout.triggered.connect(self._profiled(self.configure_region_layout))
+        act_hdr_gain.triggered.connect(self._profiled(self.convert_volume_to_makeup_gain))
+        act_bg.triggered.connect(self._profiled(self.change_background_image))
+        act_checkupdate.triggered.connect(self._profiled(self.check_update_and_prompt_async, manual=True))
+        act_trace.toggled.connect(self.set_trace_enabled)
+        self.act_profile.toggled.connect(self.set_profile_next_action)
+        act_audio_centroid.triggered.connect(self._profiled(self.audio_analysis_centroid))
+        act_audio_3d.triggered.connect(self._profiled(self.audio_analysis_3d))
+        act_audio_2d.triggered.connect(self._profiled(self.audio_analysis_2d))
+        act_audio_lufs.triggered.connect(self._profiled(self._analyse_audio_files_game_wwise))
+        act_audio_lufs_offline.triggered.connect(self._profiled(self.analyse_wwise_project_offline))
+        act_loudness_report.triggered.connect(self._profiled(self.open_loudness_report))
 
         main_layout.setMenuBar(menubar)
 
@@ -163,23 +261,23 @@ class Wreaper(QWidget):
         button_layout.setSpacing(12)
 
         self.button2 = self.create_anime_button("启动Reaper", "#000000", "#5E9DD1")
-        self.button2.clicked.connect(self.StartReaper)
+        self.button2.clicked.connect(self._profiled(self.StartReaper))
         button_layout.addWidget(self.button2, 0, 0, 1, 2)  # 第一行，跨两列居中
 
         self.button3 = self.create_anime_button("导入Reaper", "#000000", "#5E9DD1")
-        self.button3.clicked.connect(self.start_reaper_and_open_audio)
+        self.button3.clicked.connect(self._profiled(self.start_reaper_and_open_audio))
         button_layout.addWidget(self.button3, 1, 0)  # 第二行左
 
         self.button4 = self.create_anime_button("所选Item渲染回Wwise", "#000000", "#5E9DD1")
-        self.button4.clicked.connect(self.execute_rendering)
+        self.button4.clicked.connect(self._profiled(self.execute_rendering))
         button_layout.addWidget(self.button4, 2, 0)  # 第二行右
 
         self.button5 = self.create_anime_button("区间导入Reaper", "#000000", "#FF3848")
-        self.button5.clicked.connect(self.import_wwise_files_and_create_regions)
+        self.button5.clicked.connect(self._profiled(self.import_wwise_files_and_create_regions))
         button_layout.addWidget(self.button5, 1, 1)  # 第三行左
 
         self.button6 = self.create_anime_button("区间渲染回Wwise", "#000000", "#FF3848")
-        self.button6.clicked.connect(self.Region_rendering)
+        self.button6.clicked.connect(self._profiled(self.Region_rendering))
         button_layout.addWidget(self.button6, 2, 1)  # 第三行右
 
         main_layout.addLayout(button_layout)
@@ -235,6 +333,26 @@ class Wreaper(QWidget):
             dlg.exec_()
 
 
+    def confirm_long_message(self, title, message, ok_text="确定"):
+        dlg = QDialog(self)
+        dlg.setWindowTitle(title)
+        dlg.setMinimumSize(600, 400)
+        layout = QVBoxLayout(dlg)
+        text_edit = QTextEdit()
+        text_edit.setReadOnly(True)
+        text_edit.setText(message)
+        layout.addWidget(text_edit)
+        btn_layout = QHBoxLayout()
+        btn_ok = QPushButton(ok_text)
+        btn_ok.clicked.connect(dlg.accept)
+        btn_cancel = QPushButton("取消")
+        btn_cancel.clicked.connect(dlg.reject)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_ok)
+        btn_layout.addWidget(btn_cancel)
+        layout.addLayout(btn_layout)
+        return dlg.exec_() == QDialog.Accepted
+
     def load_logo(self):
         logo_path = resource_path("WwiseLogo.png")
         pix = QPixmap(logo_path)
@@ -410,6 +528,49 @@ class Wreaper(QWidget):
         else:
             QMessageBox.information(self, "文件路径已配置", f"Reaper 文件路径已配置：\n{reaper_path}")
 
+    def set_trace_enabled(self, checked):
+        """开启后各长任务结束时把分阶段耗时写入 logs 目录（Chrome trace JSON + 汇总表）。"""
+        trace.enable(checked)
+        self.settings.setValue("trace_enabled", bool(checked))
+
+    def _sync_profile_action(self):
+        shift = bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
+        self.act_profile.setVisible(shift or profiler.armed())
+        self.act_profile.setChecked(profiler.armed())
+
+    def set_profile_next_action(self, checked):
+        """开启后，下一次点击的菜单项/按钮连同其后台线程与进程池任务一起做 cProfile，结果写入 logs 目录。"""
+        if not checked:
+            profiler.disarm()
+        elif not profiler.armed():
+            profiler.arm(self._on_profile_finished)
+
+    def _on_profile_finished(self, path):
+        self.act_profile.setChecked(False)
+        if path:
+            QMessageBox.information(self, "性能分析", f"已写入：\n{os.path.abspath(path)}")
+
+    def _profiled(self, handler, *args, **kwargs):
+        """菜单项/按钮的槽：吞掉 checked 参数，已开启“分析下一个操作”时对本次操作做分析。"""
+        def slot(checked=False):
+            with profiler.action(handler.__name__):
+                handler(*args, **kwargs)
+        return slot
+
+    def configure_region_layout(self):
+        gap = float(self.settings.value("region_gap", 1.0))
+        tracks = int(self.settings.value("region_tracks", 0))
+        gap, ok = QInputDialog.getDouble(self, "区间导入设置", "区间间隔 (秒):", gap, 0.0, 600.0, 2)
+        if not ok:
+            return
+        tracks, ok = QInputDialog.getInt(
+            self, "区间导入设置", "打包轨道数 (0 = 每个音频一条新轨道):", tracks, 0, 64
+        )
+        if not ok:
+            return
+        self.settings.setValue("region_gap", gap)
+        self.settings.setValue("region_tracks", tracks)
+
     def StartReaper(self):
         try:
             reaper_path = self.get_default_reaper_path()
@@ -423,7 +584,6 @@ class Wreaper(QWidget):
                 QMessageBox.information(self, "提示", "Reaper 已经在运行。")
             else:
                 self.reaper_service.start_reaper(reaper_path)
-                time.sleep(1)
         except Exception as e:
             self.show_error_message("启动Reaper时出错", str(e))
             print(f"错误详情: {traceback.format_exc()}")
@@ -447,24 +607,65 @@ class Wreaper(QWidget):
 
             if not self.reaper_service.is_reaper_running():
                 self.reaper_service.start_reaper(reaper_path)
-                time.sleep(1)
-
-            # 子线程获取，避免阻塞
-            self.fetch_dialog = QProgressDialog("正在从 Wwise 获取选中对象...", None, 0, 0, self)
-            self.fetch_dialog.setWindowTitle("请稍候")
-            self.fetch_dialog.setCancelButton(None)
-            self.fetch_dialog.setWindowModality(Qt.WindowModal)
-            self.fetch_dialog.show()
-
-            self.wwise_thread = GetSelectedFilesThread(self.wwise_service, self)
-            self.wwise_thread.finished_ok.connect(self._on_got_wwise_files)
-            self.wwise_thread.failed.connect(self._on_wwise_files_failed)
-            self.wwise_thread.start()
+            # 等待 reapy 桥接真正可用后再从 Wwise 获取
+            self._when_reaper_ready(lambda: self._fetch_wwise_files(GetSelectedFilesThread, self._on_got_wwise_files))
 
         except Exception as e:
             self.show_error_message("启动Reaper时出错", str(e))
             print(f"错误详情: {traceback.format_exc()}")
 
+    def _when_reaper_ready(self, on_ready, timeout_ms=15000, interval_ms=250):
+        """
+        用 QTimer 轮询 Reaper 是否可接受 API 调用，就绪后调用 on_ready。
+        轮询期间界面保持响应，超时则提示错误；已有等待进行中时忽略重复点击。
+        """
+        if self.reaper_wait_timer is not None:
+            print("正在等待 Reaper 启动，忽略重复操作。")
+            return
+        if self.reaper_service.is_reaper_ready():
+            on_ready()
+            return
+
+        dialog = QProgressDialog("正在等待 Reaper 启动...", None, 0, 0, self)
+        dialog.setWindowTitle("请稍候")
+        dialog.setCancelButton(None)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.show()
+
+        timer = self.reaper_wait_timer = QTimer(self)
+        timer.setInterval(interval_ms)
+        remaining = [max(1, timeout_ms // interval_ms)]
+
+        def poll():
+            ready = self.reaper_service.is_reaper_ready()
+            remaining[0] -= 1
+            if not ready and remaining[0] > 0:
+                return
+            timer.stop()
+            timer.deleteLater()
+            self.reaper_wait_timer = None
+            dialog.close()
+            if ready:
+                on_ready()
+            else:
+                self.show_error_message("Reaper未就绪", "Reaper 未能在规定时间内响应 API 调用，请确认 reapy 已配置后重试。")
+
+        timer.timeout.connect(poll)
+        timer.start()
+
+    def _fetch_wwise_files(self, thread_cls, on_files):
+        # 子线程获取，避免阻塞
+        self.fetch_dialog = QProgressDialog("正在从 Wwise 获取选中对象...", None, 0, 0, self)
+        self.fetch_dialog.setWindowTitle("请稍候")
+        self.fetch_dialog.setCancelButton(None)
+        self.fetch_dialog.setWindowModality(Qt.WindowModal)
+        self.fetch_dialog.show()
+
+        self.wwise_thread = thread_cls(self.wwise_service, self)
+        self.wwise_thread.finished_ok.connect(on_files)
+        self.wwise_thread.failed.connect(self._on_wwise_files_failed)
+        self.wwise_thread.start()
+
     def _on_got_wwise_files(self, selected_audio_files):
         if getattr(self, "fetch_dialog", None):
             self.fetch_dialog.close()
@@ -488,7 +689,7 @@ class Wreaper(QWidget):
     # Reaper -> Wwise（覆盖渲染）
     def execute_rendering(self):
         # 检查 Reaper 是否运行
-        if not self.reaper_service.is_reaper_running():
+        if not self.reaper_service.is_reaper_ready():
             QMessageBox.warning(self, "Reaper未运行", "请先启动 Reaper 再进行渲染操作。")
             return
         
@@ -506,49 +707,33 @@ class Wreaper(QWidget):
             return
     
         selected_audio_files = self.get_selected_audio_files()
-        num_items = rpp.CountSelectedMediaItems(0)
-        if num_items == 0:
+        items = self.reaper_service.get_selected_items()
+        if not items:
             rpp.ShowConsoleMsg("没有选中任何音频！\n")
             return
 
+        # 按目标目录与格式分组，一次脚本执行内逐组渲染到各自目录
         wwise_map = {os.path.basename(p): p for p in selected_audio_files}
-        unmatched = []
-        should_render = False
-
-        
-        
-        for i in range(num_items):
-            item = rpp.GetSelectedMediaItem(0, i)
-            take = rpp.GetActiveTake(item)
-            if not take:
-                continue
-            take_name = rpp.GetTakeName(take)
-            if take_name in wwise_map:
-                source_path = wwise_map[take_name]
-                parent_dir = os.path.dirname(source_path)
-                if not os.access(parent_dir, os.W_OK):
-                    self.show_error_message("目录不可写", parent_dir)
-                    return
-                rpp.GetSetProjectInfo(0, "RENDER_SETTINGS", 32, True)
-                rpp.GetSetProjectInfo_String(0, "RENDER_FILE", parent_dir, True)
-                rpp.GetSetProjectInfo_String(0, "RENDER_PATTERN", "$item", True)
-                rpp.ShowConsoleMsg(f"已覆盖渲染: {source_path}\n")
-                rpp.GetSetProjectInfo(0, "RENDER_SRATE", int(sr), True)      # 设置采样率
-                rpp.GetSetProjectInfo(0, "RENDER_CHANNELS", int(ch), True) 
-                should_render = True
-            else:
-                unmatched.append(take_name)
+        plan = plan_renders(items, wwise_map, int(sr), int(ch))
+        if plan.unwritable:
+            self.show_error_message("目录不可写", "\n".join(plan.unwritable))
+            return
 
-        if unmatched:
-            self.show_error_message("文件名不匹配", "以下Reaper选中项未在Wwise中选中：\n" + "\n".join(unmatched))
+        if plan.unmatched:
+            self.show_error_message("文件名不匹配", "以下Reaper选中项未在Wwise中选中：\n" + "\n".join(plan.unmatched))
 
-        if should_render:
-            rpp.Main_OnCommand(41824, 0)
+        if plan.groups:
+            try:
+                self.reaper_service.render_item_groups(plan.groups)
+            except Exception as e:
+                self.show_error_message("渲染失败", str(e))
+                return
+            rpp.ShowConsoleMsg(plan.summary() + "\n")
 
 ###########################################################################################
     # 区间渲染相关
     #Wwise-->reaper
-    def _on_got_wwise_files_Region(self, selected_audio_files):
+    def _on_got_wwise_files_Region(self, selected_audio_files, durations):
         if getattr(self, "fetch_dialog", None):
             self.fetch_dialog.close()
             self.fetch_dialog = None
@@ -556,7 +741,12 @@ class Wreaper(QWidget):
             for file_path in selected_audio_files:
                 self.remove_readonly_attribute(file_path)
             try:
-                self.reaper_service.open_audioRegion_in_reaper(selected_audio_files)
+                self.reaper_service.open_audioRegion_in_reaper(
+                    selected_audio_files,
+                    gap=float(self.settings.value("region_gap", 1.0)),
+                    tracks=int(self.settings.value("region_tracks", 0)),
+                    known_durations=durations,
+                )
             except Exception as e:
                 self.show_error_message("导入音频到Reaper时出错", f"{e}\n请尝试重启Wreaper")
         else:
@@ -573,19 +763,8 @@ class Wreaper(QWidget):
 
             if not self.reaper_service.is_reaper_running():
                 self.reaper_service.start_reaper(reaper_path)
-                time.sleep(1)
-
-            # 子线程获取，避免阻塞
-            self.fetch_dialog = QProgressDialog("正在从 Wwise 获取选中对象...", None, 0, 0, self)
-            self.fetch_dialog.setWindowTitle("请稍候")
-            self.fetch_dialog.setCancelButton(None)
-            self.fetch_dialog.setWindowModality(Qt.WindowModal)
-            self.fetch_dialog.show()
-
-            self.wwise_thread = GetSelectedFilesThread(self.wwise_service, self)
-            self.wwise_thread.finished_ok.connect(self._on_got_wwise_files_Region)
-            self.wwise_thread.failed.connect(self._on_wwise_files_failed)
-            self.wwise_thread.start()
+            # 等待 reapy 桥接真正可用后再从 Wwise 获取
+            self._when_reaper_ready(lambda: self._fetch_wwise_files(GetSelectedDurationsThread, self._on_got_wwise_files_Region))
 
         except Exception as e:
             self.show_error_message("启动Reaper时出错", str(e))
@@ -593,7 +772,7 @@ class Wreaper(QWidget):
 
     #reaper-->Wwise
     def Region_rendering(self):
-        if not self.reaper_service.is_reaper_running():
+        if not self.reaper_service.is_reaper_ready():
             QMessageBox.warning(self, "Reaper未运行", "请先启动 Reaper 再进行渲染操作。")
             return
 
@@ -613,41 +792,26 @@ class Wreaper(QWidget):
         
         selected_audio_files = self.get_selected_audio_files()
         wwise_map = {os.path.splitext(os.path.basename(p))[0]: p for p in selected_audio_files}
-        unmatched = []
-        should_render = False
-        num_regions = rpp.CountProjectMarkers(0, 0, 0)
-        output_dir = None
-
-        for i in range(num_regions[3]+1):
-            fs = rpp.SNM_CreateFastString("")
-            rpp.SNM_GetProjectMarkerName(0, i, 1, fs)
-            region_name = rpp.SNM_GetFastString(fs)
-            if region_name in wwise_map:
-                source_path = wwise_map[region_name]
-                parent_dir = os.path.dirname(source_path)
-                if not os.access(parent_dir, os.W_OK):
-                    self.show_error_message("目录不可写", parent_dir)
-                    rpp.SNM_DeleteFastString(fs)
-                    return
-                output_dir = parent_dir 
-                should_render = True
-            else:
-                if region_name:
-                    unmatched.append(region_name)
-            
 
-        if unmatched:
-            self.show_error_message("文件名不匹配", "以下Reaper区间未在Wwise中选中，请全部选中后覆盖渲染：\n" + "\n".join(unmatched))
+        # 区间索引一次性取回，再按目标目录分组，每组渲染到各自目录
+        regions = self.reaper_service.get_regions()
+        plan = plan_renders(
+            [(number, name) for number, name, _, _ in regions], wwise_map, int(sr), int(ch)
+        )
+        if plan.unwritable:
+            self.show_error_message("目录不可写", "\n".join(plan.unwritable))
+            return
 
-        if should_render and output_dir:
-            
-            rpp.GetSetProjectInfo(0, "RENDER_SETTINGS", 0, True)
-            rpp.GetSetProjectInfo(0, "RENDER_BOUNDSFLAG", 3, True)
-            rpp.GetSetProjectInfo_String(0, "RENDER_FILE", output_dir, True)
-            rpp.GetSetProjectInfo_String(0, "RENDER_PATTERN", "$region", True)
-            rpp.GetSetProjectInfo(0, "RENDER_SRATE", int(sr), True)      # 设置采样率
-            rpp.GetSetProjectInfo(0, "RENDER_CHANNELS", int(ch), True) 
-            rpp.Main_OnCommand(41824, 0)
+        if plan.unmatched:
+            self.show_error_message("文件名不匹配", "以下Reaper区间未在Wwise中选中，请全部选中后覆盖渲染：\n" + "\n".join(plan.unmatched))
+
+        if plan.groups:
+            try:
+                self.reaper_service.render_region_groups(plan.groups)
+            except Exception as e:
+                self.show_error_message("渲染失败", str(e))
+                return
+            rpp.ShowConsoleMsg(plan.summary() + "\n")
 
 
 
@@ -769,9 +933,29 @@ class Wreaper(QWidget):
             QMessageBox.information(self, "已取消", "音频分析已取消。")
 
     
-    def _analyse_audio_files_game_wwise(self):
-    # 先检测 Wwise 端口
-        if not self.wwise_service._is_wwise_port_open():
+    def analyse_wwise_project_offline(self):
+        """直接解析 .wwu 工作单元获取音频对象，无需启动 Wwise"""
+        last_project = self.settings.value("wwise_project_path", "")
+        project_path, _ = QFileDialog.getOpenFileName(
+            self, "选择Wwise工程", last_project, "Wwise工程 (*.wproj)"
+        )
+        if not project_path:
+            return
+        self.settings.setValue("wwise_project_path", project_path)
+        scope, ok = QInputDialog.getText(
+            self, "分析范围",
+            "Wwise路径前缀（留空分析整个工程）：\n例如 \\Actor-Mixer Hierarchy\\Default Work Unit",
+            text=self.settings.value("wwise_project_scope", "")
+        )
+        if not ok:
+            return
+        scope = scope.strip()
+        self.settings.setValue("wwise_project_scope", scope)
+        self._analyse_audio_files_game_wwise(project_path, scope or None)
+
+    def _analyse_audio_files_game_wwise(self, project_path=None, scope=None):
+    # 先检测 Wwise 端口（离线工程无需连接）
+        if not project_path and not self.wwise_service._is_wwise_port_open():
             QMessageBox.warning(self, "Wwise未连接", "无法连接到Wwise，请确保Wwise已启动并启用WAAPI。")
             return
 
@@ -784,7 +968,7 @@ class Wreaper(QWidget):
         self.audio_fetch_dialog.show()
 
         # 用线程异步获取音频对象
-        self.audio_fetch_thread = GetAudioSourcesThread()
+        self.audio_fetch_thread = GetAudioSourcesThread(project_path, scope)
         self.audio_fetch_thread.progress.connect(self.audio_fetch_dialog.setValue)
         self.audio_fetch_thread.status.connect(self.audio_fetch_dialog.setLabelText)
         def on_audio_files_ok(audio_files):
@@ -854,6 +1038,60 @@ class Wreaper(QWidget):
         self.audio_fetch_thread.failed.connect(on_audio_files_failed)
         self.audio_fetch_dialog.canceled.connect(self.audio_fetch_thread.terminate)
         self.audio_fetch_thread.start()
+    # Volume转MakeUpGain（HDR）：先预览修改，确认后批量写入
+    def convert_volume_to_makeup_gain(self):
+        if not self.wwise_service._is_wwise_port_open():
+            QMessageBox.warning(self, "Wwise未连接", "无法连接到Wwise，请确保Wwise已启动并启用WAAPI。")
+            return
+
+        self.hdr_dialog = QProgressDialog("正在读取选中对象...", None, 0, 0, self)
+        self.hdr_dialog.setWindowTitle("Volume转MakeUpGain")
+        self.hdr_dialog.setCancelButton(None)
+        self.hdr_dialog.setWindowModality(Qt.WindowModal)
+        self.hdr_dialog.show()
+
+        self.hdr_thread = HdrGainThread(parent=self)
+        self.hdr_thread.computed.connect(self._on_hdr_gain_computed)
+        self.hdr_thread.failed.connect(self._on_hdr_gain_failed)
+        self.hdr_thread.start()
+
+    def _on_hdr_gain_computed(self, changes, skipped):
+        self.hdr_dialog.close()
+        if not changes:
+            msg = "没有需要修改的对象。"
+            if skipped:
+                msg = hdr_gain.format_diff(changes, skipped)
+            self.show_long_message("Volume转MakeUpGain", msg)
+            return
+        if not self.confirm_long_message("预览修改", hdr_gain.format_diff(changes, skipped), "应用"):
+            return
+
+        self.hdr_dialog = QProgressDialog("正在写入...", None, 0, 100, self)
+        self.hdr_dialog.setWindowTitle("Volume转MakeUpGain")
+        self.hdr_dialog.setCancelButton(None)
+        self.hdr_dialog.setWindowModality(Qt.WindowModal)
+        self.hdr_dialog.setMinimumDuration(0)
+        self.hdr_dialog.show()
+
+        self.hdr_thread = HdrGainThread(changes, self)
+        self.hdr_thread.progress.connect(self.hdr_dialog.setValue)
+        self.hdr_thread.applied.connect(
+            lambda failed: self._on_hdr_gain_applied(len(changes), failed)
+        )
+        self.hdr_thread.failed.connect(self._on_hdr_gain_failed)
+        self.hdr_thread.start()
+
+    def _on_hdr_gain_applied(self, total, failed):
+        self.hdr_dialog.close()
+        if failed:
+            self.show_long_message("部分写入失败", f"以下 {len(failed)} 个对象写入失败：\n" + "\n".join(failed))
+        else:
+            QMessageBox.information(self, "完成", f"已修改 {total} 个对象，可在 Wwise 中一次撤销。")
+
+    def _on_hdr_gain_failed(self, msg):
+        self.hdr_dialog.close()
+        QMessageBox.critical(self, "Volume转MakeUpGain失败", msg)
+
     def open_loudness_report(self):
         # 保证窗口不会被垃圾回收
         if not hasattr(self, "_loudness_report_win") or self._loudness_report_win is None:
@@ -0,0 +1,56 @@
+import os
+import threading
+import soundfile as sf
+
+
+class AudioInfo:
+    """音频文件头信息：时长、采样率、通道数等，不解码音频数据。"""
+    __slots__ = ("path", "duration", "samplerate", "channels", "frames", "format", "subtype")
+
+    def __init__(self, path, duration, samplerate, channels, frames, format, subtype):
+        self.path = path
+        self.duration = duration
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frames = frames
+        self.format = format
+        self.subtype = subtype
+
+
+_cache = {}     # path -> (mtime, size, AudioInfo)
+_lock = threading.Lock()
+
+
+def probe(path):
+    """
+    通过 soundfile.info 只读取文件头（WAV/FLAC/OGG 等），按 (mtime, size) 缓存。
+    文件不存在或无法识别时返回 None。
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_mtime, st.st_size)
+    with _lock:
+        entry = _cache.get(path)
+    if entry and entry[:2] == key:
+        return entry[2]
+    try:
+        info = sf.info(path)
+    except Exception:
+        return None
+    result = AudioInfo(path, info.duration, info.samplerate, info.channels,
+                       info.frames, info.format, info.subtype)
+    with _lock:
+        _cache[path] = (key[0], key[1], result)
+    return result
+
+
+def probe_duration(path, default=None):
+    info = probe(path)
+    return info.duration if info else default
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
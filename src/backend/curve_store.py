@@ -0,0 +1,75 @@
+import os
+import json
+import numpy as np
+
+CURVE_NAMES = ("momentary", "short_term")
+# 曲线为 LUFS 值（-100 ~ 0 附近），float16 在该范围内的量化误差不超过 0.03 LU，足够绘图
+CURVE_DTYPE = np.float16
+INDEX_VERSION = 1
+
+
+def curve_store_paths(csv_path):
+    """响度 CSV 对应的曲线数据文件与索引：<名称>_响度曲线.bin / .json。"""
+    base = csv_path[:-4] if csv_path.lower().endswith(".csv") else csv_path
+    return base + "_响度曲线.bin", base + "_响度曲线.json"
+
+
+def write_index(index_path, arena, entries):
+    """
+    entries: {file_path: (任务序号, 各曲线长度, 各曲线步长秒数)}。
+    索引记录每个文件各条曲线在数据文件中的 [偏移, 长度, 步长秒数]。
+    """
+    files = {}
+    for path, (index, lengths, hops) in entries.items():
+        files[path] = {
+            name: [offset, length, hop]
+            for name, (offset, _), length, hop in zip(CURVE_NAMES, arena.offsets[index], lengths, hops)
+        }
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "dtype": arena.dtype.str, "files": files}, f, ensure_ascii=False)
+
+
+class CurveStore:
+    """
+    读取响度分析时保存的逐块响度曲线，无需重新解码音频。
+    每次 get() 临时映射数据文件并复制所需区段，不长期占用文件（重新分析时可以覆盖）。
+    """
+
+    def __init__(self, data_path, index):
+        self.data_path = data_path
+        self.dtype = np.dtype(index.get("dtype", CURVE_DTYPE))
+        self.files = index.get("files", {})
+
+    @classmethod
+    def open(cls, csv_path):
+        """返回 csv_path 对应的曲线存储；文件不存在或索引无法读取时返回 None。"""
+        data_path, index_path = curve_store_paths(csv_path)
+        if not (os.path.exists(data_path) and os.path.exists(index_path)):
+            return None
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != INDEX_VERSION:
+            return None
+        return cls(data_path, index)
+
+    def __contains__(self, file_path):
+        return file_path in self.files
+
+    def get(self, file_path):
+        """返回 {曲线名: (时间秒数组, LUFS 数组)}；没有该文件时返回 None。"""
+        entry = self.files.get(file_path)
+        if entry is None:
+            return None
+        data = np.memmap(self.data_path, dtype=self.dtype, mode="r")
+        try:
+            curves = {}
+            for name in CURVE_NAMES:
+                offset, length, hop = entry[name]
+                values = np.array(data[offset:offset + length], dtype=np.float32)
+                curves[name] = (np.arange(length) * hop, values)
+            return curves
+        finally:
+            del data
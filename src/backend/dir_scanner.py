@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+
+# 各分析类型支持的音频格式
+SPECTROGRAM_2D_EXTENSIONS = ('.wav', '.mp3', '.ogg', '.flac', '.m4a', '.aac')
+SPECTROGRAM_3D_EXTENSIONS = ('.wav', '.wave', '.aiff', '.flac')
+CENTROID_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a', '.aac')
+
+_DONE = object()
+
+
+class ScanEntry:
+    __slots__ = ("path", "size", "mtime")
+
+    def __init__(self, path, size, mtime):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+
+class DirectoryScanner:
+    """
+    基于 os.scandir 的目录扫描：后台线程遍历目录，scan() 边扫描边产出匹配的文件，
+    调用方无需等待整棵目录遍历完成即可开始处理。
+    扫描过程中按扩展名建立索引（by_extension）；产出的 (path, size, mtime)
+    供输出清单（backend.output_manifest）判断文件是否需要重新处理。
+    """
+
+    def __init__(self, root, extensions):
+        self.root = root
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.by_extension = {}
+        self.found = 0
+        self.finished = False
+
+    def _walk(self, out, stop):
+        stack = [self.root]
+        while stack and not stop.is_set():
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext not in self.extensions:
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                self.by_extension.setdefault(ext, []).append(entry.path)
+                out.put(ScanEntry(entry.path, st.st_size, st.st_mtime))
+            # 逆序入栈，子目录按字母顺序深度优先遍历
+            stack.extend(reversed(subdirs))
+        out.put(_DONE)
+
+    def scan(self):
+        """逐个产出 ScanEntry；生成器被提前关闭时后台扫描随之停止。"""
+        out = queue.Queue(maxsize=1024)
+        stop = threading.Event()
+        worker = threading.Thread(target=self._walk, args=(out, stop), daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    break
+                self.found += 1
+                yield item
+            self.finished = True
+        finally:
+            stop.set()
+            # 放空队列，避免后台线程阻塞在 put 上
+            while worker.is_alive():
+                try:
+                    out.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+
+    def paths(self):
+        return [entry.path for entry in self.scan()]
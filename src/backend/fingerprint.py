@@ -0,0 +1,248 @@
+"""
+音频指纹与重复检测。
+
+    pcm_digest   解码后 PCM 的哈希：内容完全相同（文件名、元数据不同）即视为完全重复，开销很小，始终计算
+    landmarks    频谱峰值对哈希（f1, f2, Δt）：对增益、重采样、重新编码与首尾裁剪保持稳定，
+                 需要降采样与 STFT，只在开启近似重复检测（NEAR_DUPLICATE_DETECTION）时计算
+    FingerprintIndex
+                 哈希 -> (文件, 帧) 的倒排索引；同一对文件在相同时间偏移上共享的哈希越多越相似
+
+    identical_files
+                 分析前按文件大小 + SHA-1 找出字节完全相同的文件，每组只需分析一次
+
+指纹在响度分析的子进程中由已解码的数据计算，不额外读取文件。
+"""
+import os
+import csv
+import hashlib
+import numpy as np
+from math import gcd
+from backend.output_manifest import file_hash
+from scipy.signal import resample_poly, firwin
+from scipy.ndimage import maximum_filter
+
+FP_RATE = 8000              # 指纹计算采样率（单声道）
+FP_FFT = 512                # 64 ms
+FP_HOP = 256                # 32 ms，约 31 帧/秒
+PEAK_NEIGHBORHOOD = (15, 7)  # 峰值须为 (频率 bin, 帧) 邻域内的最大值
+PEAK_FLOOR_DB = -60.0       # 低于整段最大值 60 dB 的峰值忽略
+PEAKS_PER_SECOND = 10       # 峰值密度上限（按幅度保留最强的）
+FAN_OUT = 5                 # 每个锚点与其后最多 5 个峰值配对
+MAX_DT = 63                 # 配对的最大帧间隔；哈希中按 2 帧量化，容忍峰值在相邻帧间跳动
+MAX_POSTING = 64            # 出现在过多文件中的哈希区分度低（静音、底噪），比较时忽略
+NEAR_MIN_SCORE = 0.3        # 对齐后共享哈希数 / 较短文件的哈希数
+NEAR_MIN_MATCHES = 8
+LANDMARK_BYTES_PER_SAMPLE = 56  # landmarks 在 8 kHz 上的临时数组（降采样、分帧、FFT、峰值）每个样本约占的字节数
+RESAMPLE_HALF_LENGTH = 4    # 降采样低通滤波器半长（× 抽取倍数）；scipy 默认为 10，指纹不需要那么陡的过渡带
+
+_window = np.hanning(FP_FFT).astype(np.float32)
+_resample_filters = {}
+
+
+def pcm_digest(data, rate):
+    """解码后数据的内容哈希（含采样率与声道数）。"""
+    x = np.ascontiguousarray(data)
+    h = hashlib.sha1()
+    h.update(f"{rate}:{x.shape[1] if x.ndim > 1 else 1}:{x.dtype.str}".encode())
+    h.update(x.data)
+    return h.hexdigest()
+
+
+def identical_files(paths):
+    """
+    返回分组列表，每组为 paths 中的下标，组内文件字节完全相同（同一路径必然同组）。
+    只对大小相同的文件计算哈希；无法读取的文件单独成组。
+    """
+    by_size = {}
+    groups = []
+    for i, path in enumerate(paths):
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            groups.append([i])
+            continue
+        by_size.setdefault(size, []).append(i)
+    for members in by_size.values():
+        if len(members) == 1:
+            groups.append(members)
+            continue
+        by_content = {}
+        digests = {}
+        for i in members:
+            path = paths[i]
+            if path not in digests:
+                try:
+                    digests[path] = file_hash(path)
+                except OSError:
+                    digests[path] = path
+            by_content.setdefault(digests[path], []).append(i)
+        groups.extend(by_content.values())
+    groups.sort(key=lambda g: g[0])
+    return groups
+
+
+def _resample_filter(up, down):
+    h = _resample_filters.get((up, down))
+    if h is None:
+        limit = max(up, down)
+        h = (firwin(2 * RESAMPLE_HALF_LENGTH * limit + 1, 1.0 / limit, window=("kaiser", 5.0)) * up).astype(np.float32)
+        _resample_filters[(up, down)] = h
+    return h
+
+
+def landmarks_memory(frames, channels, rate, itemsize=4):
+    """
+    landmarks 的峰值内存估计（字节），不含输入数据本身：
+    单声道混音（float32；非 float32 的多声道输入另有一份 float32 副本）加上 8 kHz 上的各临时数组。
+    """
+    mono = frames * 4 if channels > 1 else 0
+    converted = frames * channels * 4 if itemsize != 4 else 0
+    return mono + converted + int(frames * FP_RATE / max(rate, FP_RATE)) * LANDMARK_BYTES_PER_SAMPLE
+
+
+def _spectrogram(data, rate):
+    x = np.asarray(data, dtype=np.float32)
+    if x.ndim > 1:
+        # 逐声道相加（沿长度为声道数的轴求均值很慢）
+        mono = x[:, 0].copy()
+        for channel in range(1, x.shape[1]):
+            mono += x[:, channel]
+        mono *= 1.0 / x.shape[1]
+        x = mono
+    if rate != FP_RATE:
+        g = gcd(int(rate), FP_RATE)
+        up, down = FP_RATE // g, int(rate) // g
+        x = resample_poly(x, up, down, window=_resample_filter(up, down)).astype(np.float32)
+    if len(x) < FP_FFT:
+        return np.empty((FP_FFT // 2 + 1, 0), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(x, FP_FFT)[::FP_HOP] * _window
+    magnitude = np.abs(np.fft.rfft(frames, axis=1)).T
+    return 20 * np.log10(magnitude + 1e-10)
+
+
+def landmarks(data, rate):
+    """返回 (hashes uint32, times int32)：每个峰值对的哈希与锚点帧号。"""
+    spec = _spectrogram(data, rate)
+    empty = (np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int32))
+    if spec.shape[1] == 0:
+        return empty
+    peaks = (spec == maximum_filter(spec, size=PEAK_NEIGHBORHOOD)) & (spec > spec.max() + PEAK_FLOOR_DB)
+    freqs, times = np.nonzero(peaks)
+    limit = max(1, int(spec.shape[1] * FP_HOP / FP_RATE * PEAKS_PER_SECOND))
+    if len(freqs) > limit:
+        keep = np.argpartition(spec[freqs, times], -limit)[-limit:]
+        freqs, times = freqs[keep], times[keep]
+    order = np.lexsort((freqs, times))
+    freqs, times = freqs[order], times[order]
+    hashes, anchors = [], []
+    for k in range(1, FAN_OUT + 1):
+        dt = times[k:] - times[:-k]
+        ok = (dt >= 1) & (dt <= MAX_DT)
+        f1, f2 = freqs[:-k][ok], freqs[k:][ok]
+        hashes.append((f1.astype(np.uint32) << 15) | (f2.astype(np.uint32) << 6) | (dt[ok] // 2).astype(np.uint32))
+        anchors.append(times[:-k][ok].astype(np.int32))
+    if not hashes:
+        return empty
+    return np.concatenate(hashes), np.concatenate(anchors)
+
+
+class FingerprintIndex:
+    """倒排索引：按哈希排序的 (哈希, 文件序号, 帧) 三列，同一哈希的记录相邻。"""
+
+    def __init__(self):
+        self.paths = []
+        self.digests = []
+        self.aliases = []       # 与该文件字节完全相同、未单独计算指纹的其他路径
+        self._hashes = []
+        self._times = []
+
+    def add(self, path, digest, hashes, times, aliases=()):
+        self.paths.append(path)
+        self.digests.append(digest)
+        self.aliases.append(list(aliases))
+        self._hashes.append(np.asarray(hashes, dtype=np.uint32))
+        self._times.append(np.asarray(times, dtype=np.int32))
+
+    def exact_duplicates(self):
+        """内容完全相同的文件组（每组至少两个路径）。"""
+        groups = {}
+        for path, digest, aliases in zip(self.paths, self.digests, self.aliases):
+            group = groups.setdefault(digest or path, [])
+            group.append(path)
+            group.extend(aliases)
+        return [paths for paths in groups.values() if len(paths) > 1]
+
+    def near_duplicates(self, min_score=NEAR_MIN_SCORE, min_matches=NEAR_MIN_MATCHES):
+        """
+        返回 [(路径 A, 路径 B, 相似度, B 相对 A 的偏移秒数)]，不含完全相同的文件对。
+        相似度为同一时间偏移上共享的哈希数除以两者中较少的哈希数。
+        """
+        if len(self.paths) < 2:
+            return []
+        counts = np.array([len(h) for h in self._hashes])
+        hashes = np.concatenate(self._hashes)
+        times = np.concatenate(self._times).astype(np.int64)
+        files = np.repeat(np.arange(len(self.paths), dtype=np.int64), counts)
+        order = np.argsort(hashes)
+        hashes, times, files = hashes[order], times[order], files[order]
+
+        # 各哈希在排序后数组中的区段
+        starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+        sizes = np.diff(np.r_[starts, len(hashes)])
+        keys = []
+        for size in np.unique(sizes):
+            if size < 2 or size > MAX_POSTING:
+                continue
+            group = starts[sizes == size][:, None] + np.arange(size)
+            i, j = np.triu_indices(size, 1)
+            a, b = files[group[:, i]].ravel(), files[group[:, j]].ravel()
+            offset = (times[group[:, j]] - times[group[:, i]]).ravel()
+            # 统一为 a < b，偏移相应取反
+            swap = a > b
+            a, b = np.where(swap, b, a), np.where(swap, a, b)
+            offset = np.where(swap, -offset, offset)
+            same = a == b
+            keys.append((a[~same] << 42) | (b[~same] << 21) | (offset[~same] + (1 << 20)))
+        if not keys:
+            return []
+        pair_keys, matches = np.unique(np.concatenate(keys), return_counts=True)
+        # 裁剪量不是帧长整数倍时峰值会落在相邻帧：相邻偏移的匹配数合并计算
+        nxt = np.searchsorted(pair_keys, pair_keys + 1)
+        nxt = np.minimum(nxt, len(pair_keys) - 1)
+        matches = matches + np.where(pair_keys[nxt] == pair_keys + 1, matches[nxt], 0)
+        pairs = pair_keys >> 21
+        # 每对文件取共享哈希最多的偏移
+        order = np.lexsort((matches, pairs))
+        last = np.r_[pairs[order][1:] != pairs[order][:-1], True]
+        best = order[last]
+        pair_keys, matches = pair_keys[best], matches[best]
+        a, b = pair_keys >> 42, (pair_keys >> 21) & 0x1FFFFF
+        scores = matches / np.maximum(np.minimum(counts[a], counts[b]), 1)
+        keep = np.flatnonzero((matches >= min_matches) & (scores >= min_score))
+
+        results = []
+        for k in keep:
+            i, j = int(a[k]), int(b[k])
+            if self.digests[i] and self.digests[i] == self.digests[j]:
+                continue
+            offset = int(pair_keys[k] & 0x1FFFFF) - (1 << 20)
+            results.append((self.paths[i], self.paths[j], float(min(scores[k], 1.0)), offset * FP_HOP / FP_RATE))
+        results.sort(key=lambda r: -r[2])
+        return results
+
+
+def duplicates_csv_path(csv_path):
+    base = csv_path[:-4] if csv_path.lower().endswith(".csv") else csv_path
+    return base + "_重复音频.csv"
+
+
+def write_duplicates_csv(csv_path, exact_groups, near_pairs):
+    """完全重复按组列出（与每组第一个文件比较），近似重复按相似度从高到低列出。"""
+    with open(csv_path, "w", newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(["类型", "文件A", "文件B", "相似度", "偏移(秒)"])
+        for paths in exact_groups:
+            for other in paths[1:]:
+                writer.writerow(["完全相同", paths[0], other, 1.0, 0.0])
+        for a, b, score, offset in near_pairs:
+            writer.writerow(["近似", a, b, round(score, 3), round(offset, 2)])
@@ -0,0 +1,242 @@
+import os
+import json
+import threading
+from AudioAnalyse import AnalyseLUFS_Game_Wwise as lufs_game_wwise
+from AudioAnalyse.HierarchyGain import GainTree, OBJECT_TREE, BUS_TREE
+from backend.output_manifest import file_hash
+
+# WAAPI 属性名 -> 层级条目中的键（分别对应父级对象、父级 Bus、Output Bus 自身）
+_OBJECT_PROPS = {"Volume": "volume", "MakeUpGain": "makeup"}
+_BUS_PROPS = {"BusVolume": "bus_volume", "Volume": "volume"}
+_OUTPUT_BUS_PROPS = {"BusVolume": "OutputBus_BusVolume", "Volume": "OutputBus_Volume"}
+
+WATCHED_PROPERTIES = ("Volume", "MakeUpGain", "BusVolume")
+
+
+class LoudnessCache:
+    """
+    文件响度缓存：file_path -> (mtime, size, 响度统计, SHA-1)。
+    文件未改动且统计项齐全时直接复用，避免重复解码分析；
+    新文件与已缓存文件字节完全相同（复制、改名）时复用其统计。
+    """
+
+    def __init__(self, cache_path: str = None):
+        self.cache_path = cache_path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        # 文件大小 -> 路径，按内容查找重复文件时只比较大小相同的条目
+        self._by_size = {}
+        for path, entry in self._entries.items():
+            self._by_size.setdefault(entry[1], set()).add(path)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime, st.st_size
+
+    def get(self, path):
+        stat = self._stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if stat is None or not entry or (entry[0], entry[1]) != stat:
+            return None
+        stats = entry[2]
+        if not isinstance(stats, dict) or any(k not in stats for k in lufs_game_wwise.LOUDNESS_STATS):
+            return None
+        return stats
+
+    def put(self, path, stats, digest=None):
+        stat = self._stat(path)
+        if stat is None:
+            return
+        with self._lock:
+            old = self._entries.get(path)
+            if old:
+                self._by_size.get(old[1], set()).discard(path)
+            self._entries[path] = [stat[0], stat[1], dict(stats), digest]
+            self._by_size.setdefault(stat[1], set()).add(path)
+
+    def match_content(self, path, digest):
+        """返回与 path 字节完全相同（大小与 SHA-1 一致）且仍有效的缓存条目的统计，没有时返回 None。"""
+        stat = self._stat(path)
+        if stat is None:
+            return None
+        with self._lock:
+            candidates = [p for p in self._by_size.get(stat[1], ())
+                          if p != path and len(self._entries[p]) > 3 and self._entries[p][3] == digest]
+        for other in candidates:
+            stats = self.get(other)
+            if stats is not None:
+                return stats
+        return None
+
+    def is_current(self, path) -> bool:
+        return self.get(path) is not None
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = dict(self._entries)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+
+class LoudnessIndex:
+    """
+    本地响度索引：音频源（get_audio_sources 格式）、层级增益与缓存的响度。
+    游戏内增益与批量分析共用 GainTree：属性变化时只重算该节点的子树，
+    结构变化时重建整棵树；游戏内响度按需重算，无需重新解码。
+    """
+
+    def __init__(self, cache: LoudnessCache = None):
+        self.cache = cache or LoudnessCache()
+        self.root_ids = []      # 索引范围：建立索引时选中的对象
+        self.sources = {}       # source id -> audio dict
+        self._refs = {}         # (object id, WAAPI 属性名) -> [(dict, key, source id)]
+        self.tree = GainTree()
+        self._lock = threading.RLock()
+
+    def _add_ref(self, obj_id, prop, target, key, source_id):
+        if obj_id:
+            self._refs.setdefault((obj_id, prop), []).append((target, key, source_id))
+
+    def _index_source(self, audio):
+        source_id = audio["id"]
+        for anc in audio.get("ancestors_list", []):
+            for prop, key in _OBJECT_PROPS.items():
+                self._add_ref(anc.get("id"), prop, anc, key, source_id)
+        for anc in audio.get("OutputBus_ancestors_list", []):
+            for prop, key in _BUS_PROPS.items():
+                self._add_ref(anc.get("id"), prop, anc, key, source_id)
+        for prop, key in _OUTPUT_BUS_PROPS.items():
+            self._add_ref(audio.get("OutputBus_id"), prop, audio, key, source_id)
+
+    def _rebuild_refs(self):
+        self._refs = {}
+        for audio in self.sources.values():
+            self._index_source(audio)
+        self.tree = GainTree.from_audio_files(self.sources.values())
+
+    def load(self, audio_files):
+        with self._lock:
+            self.sources = {audio["id"]: audio for audio in audio_files if audio.get("id")}
+            self._rebuild_refs()
+
+    def replace_sources(self, audio_files, removed_ids=()):
+        """结构变化后替换/新增/移除部分音频源，返回受影响的 source id。"""
+        with self._lock:
+            for source_id in removed_ids:
+                self.sources.pop(source_id, None)
+            for audio in audio_files:
+                if audio.get("id"):
+                    self.sources[audio["id"]] = audio
+            self._rebuild_refs()
+        return set(removed_ids) | {a["id"] for a in audio_files if a.get("id")}
+
+    def set_property(self, obj_id, prop, value):
+        """对象属性变化：更新所有引用它的层级条目，返回受影响的 source id。"""
+        with self._lock:
+            affected = set()
+            for target, key, source_id in self._refs.get((obj_id, prop), []):
+                target[key] = value
+                affected.add(source_id)
+            # 层级对象与 Bus 的 id 不会重复，两棵树中最多只有一个节点会被更新
+            if prop in _OBJECT_PROPS:
+                self.tree.set_property(OBJECT_TREE, obj_id, _OBJECT_PROPS[prop], value)
+            if prop in _BUS_PROPS:
+                self.tree.set_property(BUS_TREE, obj_id, _BUS_PROPS[prop], value)
+            return affected
+
+    def sources_under(self, obj_ids):
+        """返回 obj_ids 自身或其后代中的音频源：{source id: wwise_path}。"""
+        with self._lock:
+            return {
+                sid: audio["wwise_path"] for sid, audio in self.sources.items()
+                if sid in obj_ids or any(a.get("id") in obj_ids for a in audio.get("ancestors_list", []))
+            }
+
+    def contains_object(self, obj_id) -> bool:
+        with self._lock:
+            return obj_id in self.sources or any(k[0] == obj_id for k in self._refs)
+
+    def stale_paths(self):
+        """返回缓存缺失或文件已变化（重新导入）的文件路径。"""
+        with self._lock:
+            paths = {audio["file_path"] for audio in self.sources.values()}
+        return [p for p in paths if not self.cache.is_current(p)]
+
+    def reuse_cached(self, paths):
+        """
+        与已缓存文件字节完全相同的文件直接复用其统计。
+        返回 (仍需解码分析的 {path: SHA-1}, 读取失败的 {path: 错误信息})。
+        """
+        pending, errors = {}, {}
+        for path in paths:
+            try:
+                digest = file_hash(path)
+            except OSError as e:
+                errors[path] = f"读取文件失败: {e}"
+                continue
+            stats = self.cache.match_content(path, digest)
+            if stats is None:
+                pending[path] = digest
+            else:
+                self.cache.put(path, stats, digest)
+        return pending, errors
+
+    def store(self, path, stats, error, digest=None):
+        """写入一个文件的分析结果，返回错误信息或 None。"""
+        if error or not stats or stats["LUFS-I"] is None:
+            return error or "未知错误"
+        self.cache.put(path, stats, digest)
+        return None
+
+    def sources_for_paths(self, paths):
+        paths = set(paths)
+        with self._lock:
+            return {sid for sid, audio in self.sources.items() if audio["file_path"] in paths}
+
+    def row(self, source_id):
+        """返回单个音频源的报告行；尚无响度数据时返回 None。"""
+        with self._lock:
+            audio = self.sources.get(source_id)
+            if audio is None:
+                return None
+            stats = self.cache.get(audio["file_path"])
+            if stats is None:
+                return None
+            offset = self.tree.offset(audio)
+            return {
+                "LUFS-I-Ingame": stats["LUFS-I"] + offset,
+                "LUFS-M-MAX-Ingame": stats["LUFS-M-MAX"] + offset,
+                "TruePeak-Ingame": stats["TruePeak"] + offset,
+                "PLR": stats["PLR"],
+                "name": audio["name"],
+                "wwise_path": audio["wwise_path"],
+                "file_path": audio["file_path"],
+            }
+
+    def rows(self, source_ids=None):
+        with self._lock:
+            ids = list(self.sources) if source_ids is None else list(source_ids)
+        return [r for r in (self.row(sid) for sid in ids) if r is not None]
+
+
+def analyse_file(path):
+    """子进程：解码分析单个文件，返回 (stats, error)。"""
+    try:
+        return lufs_game_wwise.analyze_loudness_detailed(path)
+    except Exception as e:
+        return None, str(e)
@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import inspect
+
+MANIFEST_FILE = ".wreaper_manifest_{}.json"
+HASH_CHUNK = 1 << 20
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def analysis_params(func, **extra):
+    """分析函数的参数默认值（n_fft、hop_length、sr、dB 范围等），修改默认值即视为参数变化。"""
+    params = {
+        name: p.default for name, p in inspect.signature(func).parameters.items()
+        if p.default is not inspect.Parameter.empty
+    }
+    params.update(extra)
+    # 统一为 JSON 可比较的形式（元组 -> 列表）
+    return json.loads(json.dumps(params))
+
+
+class OutputManifest:
+    """
+    输出目录中的清单：源文件 -> (size, mtime, sha1, 分析参数, 输出文件)。
+    源文件未变、参数一致且输出文件仍存在时，视为已是最新，可跳过重新生成。
+    不同子目录中的同名源文件会写到同一个输出文件，每个输出文件只记在最后写入它的源文件下。
+    """
+
+    def __init__(self, output_dir, analysis_type, params):
+        self.path = os.path.join(output_dir, MANIFEST_FILE.format(analysis_type))
+        self.params = params
+        self._entries = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def is_current(self, entry) -> bool:
+        """entry 需提供 path / size / mtime（如 ScanEntry）。"""
+        record = self._entries.get(entry.path)
+        if not record or record.get("params") != self.params:
+            return False
+        if not os.path.exists(record.get("output", "")):
+            return False
+        if record["size"] != entry.size:
+            return False
+        if record["mtime"] == entry.mtime:
+            return True
+        # 只有修改时间变化（如复制、touch）时比较内容哈希
+        try:
+            same = record.get("sha1") and file_hash(entry.path) == record["sha1"]
+        except OSError:
+            return False
+        if same:
+            record["mtime"] = entry.mtime
+            self._dirty = True
+        return bool(same)
+
+    def output_of(self, path):
+        record = self._entries.get(path)
+        return record.get("output") if record else None
+
+    def record(self, entry, output_path):
+        try:
+            digest = file_hash(entry.path)
+        except OSError:
+            digest = None
+        # 该输出文件已被覆盖，之前写入它的其他源文件不再是最新
+        key = os.path.normcase(os.path.abspath(output_path))
+        for path in [p for p, r in self._entries.items()
+                     if p != entry.path and r.get("output")
+                     and os.path.normcase(os.path.abspath(r["output"])) == key]:
+            del self._entries[path]
+        self._entries[entry.path] = {
+            "size": entry.size,
+            "mtime": entry.mtime,
+            "sha1": digest,
+            "params": self.params,
+            "output": output_path,
+        }
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,113 @@
+import time
+
+# 每个文件的固定开销（打开、读文件头、进程间传递），折算为音频秒，避免大量短文件时进度与剩余时间失真
+FILE_OVERHEAD_SECONDS = 0.25
+EMIT_INTERVAL = 0.1         # 秒，两次界面更新之间的最短间隔
+WARMUP_SECONDS = 1.0        # 开始后这段时间内吞吐量不稳定，不显示剩余时间
+
+
+class ProgressModel:
+    """
+    按音频时长加权的进度模型：完成比例、吞吐量（音频秒/秒、文件/秒）与剩余时间估计。
+    总时长未知（边扫描边处理）时按已完成文件的平均时长估算尚未处理的文件。
+    due() 用于节流：高频完成的短文件不会每个都向界面线程发信号。
+    """
+
+    def __init__(self, total_files=0, total_weight=None, clock=time.monotonic):
+        self.total_files = total_files
+        self.total_weight = total_weight    # 全部待处理文件的 weight() 之和，未知时为 None
+        self.done_files = 0
+        self.done_seconds = 0.0             # 已完成的音频时长
+        self.done_weight = 0.0
+        self.skipped = 0
+        self._clock = clock
+        self._start = clock()
+        self._last_emit = None
+
+    @staticmethod
+    def weight(duration):
+        return max(duration or 0.0, 0.0) + FILE_OVERHEAD_SECONDS
+
+    def set_total(self, files=None, weight=None):
+        if files is not None:
+            self.total_files = files
+        if weight is not None:
+            self.total_weight = weight
+
+    def advance(self, duration):
+        self.done_files += 1
+        self.done_seconds += max(duration or 0.0, 0.0)
+        self.done_weight += self.weight(duration)
+
+    def skip(self):
+        """不需要处理的文件（如输出已是最新）：不计入工作量，也不影响吞吐量。"""
+        self.skipped += 1
+
+    @property
+    def pending_files(self):
+        return max(self.total_files - self.skipped, 0)
+
+    @property
+    def estimated_total(self):
+        if self.total_weight is not None:
+            return self.total_weight
+        if not self.done_files:
+            return None
+        return self.done_weight / self.done_files * max(self.pending_files, self.done_files)
+
+    @property
+    def fraction(self):
+        total = self.estimated_total
+        if total:
+            return min(self.done_weight / total, 1.0)
+        if self.pending_files:
+            return min(self.done_files / self.pending_files, 1.0)
+        return 1.0 if self.skipped else 0.0
+
+    @property
+    def percent(self):
+        return int(self.fraction * 100)
+
+    @property
+    def elapsed(self):
+        return self._clock() - self._start
+
+    def throughput(self):
+        """(音频秒/秒, 文件/秒)。"""
+        elapsed = self.elapsed
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return self.done_seconds / elapsed, self.done_files / elapsed
+
+    def eta(self):
+        """剩余秒数；刚开始或尚无完成的文件时返回 None。"""
+        total = self.estimated_total
+        elapsed = self.elapsed
+        if total is None or elapsed < WARMUP_SECONDS or self.done_weight <= 0:
+            return None
+        return max(total - self.done_weight, 0.0) * elapsed / self.done_weight
+
+    def due(self, force=False):
+        """距上次更新已超过 EMIT_INTERVAL（或 force）时返回 True 并记下时间。"""
+        now = self._clock()
+        if force or self._last_emit is None or now - self._last_emit >= EMIT_INTERVAL:
+            self._last_emit = now
+            return True
+        return False
+
+    def describe(self):
+        seconds_rate, files_rate = self.throughput()
+        text = f"{seconds_rate:.1f} 音频秒/秒，{files_rate:.1f} 文件/秒"
+        eta = self.eta()
+        if eta is not None:
+            text += f"，剩余约 {format_duration(eta)}"
+        return text
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
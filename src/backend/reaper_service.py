@@ -1,44 +1,311 @@
 import os
 import subprocess
 import psutil
+import reapy
 from reapy import reascript_api as rpp
+from backend.reascript_runner import ReaScript, ReaScriptRunner
+from backend.region_layout import read_durations, plan_region_layout
+from utils import trace
+
+REAPER_PROCESS_NAME = "reaper.exe"
+
+# 批量导入：每个文件插入到新轨道
+IMPORT_ITEMS_SCRIPT = ReaScript("wreaper_import_items", """
+for _, path in ipairs(payload.paths) do
+  reaper.InsertMedia(path, 1)
+  emit(path)
+end
+""", undo_label="Wreaper: 导入音频")
+
+# 批量区间导入：排布已在 Python 侧按文件头时长算好，这里只按位置插入并创建区间。
+# tracks=0 时每个音频各插入到一条新轨道；否则插入到新建的 tracks 条轨道上，
+# 多轨打包时区间会在时间上重叠，因此为每个区间设置渲染矩阵只渲染其所在轨道。
+# pending 中是无法读取时长的文件，插入到末尾并在 Reaper 内读取实际长度。
+IMPORT_REGIONS_SCRIPT = ReaScript("wreaper_import_regions", """
+local base = reaper.GetCursorPosition()
+local lane_tracks = {}
+if payload.tracks > 0 then
+  local first = reaper.CountTracks(0)
+  for t = 1, payload.tracks do
+    reaper.InsertTrackAtIndex(first + t - 1, true)
+    lane_tracks[t] = reaper.GetTrack(0, first + t - 1)
+  end
+end
+-- InsertMedia 之后只有新插入的 Item 处于选中状态，返回该 Item
+local function insert_at(path, track, pos)
+  reaper.SetEditCurPos(pos, false, false)
+  if track then
+    reaper.SetOnlyTrackSelected(track)
+    reaper.InsertMedia(path, 0)
+  else
+    reaper.InsertMedia(path, 1)
+  end
+  return reaper.GetSelectedMediaItem(0, 0)
+end
+local tail = base
+for _, slot in ipairs(payload.slots) do
+  local track = lane_tracks[slot.track]
+  local start, stop = base + slot.start, base + slot["end"]
+  insert_at(slot.path, track, start)
+  local idx = reaper.AddProjectMarker2(0, true, start, stop, slot.name, -1, 0)
+  if track and payload.tracks > 1 then
+    reaper.SetRegionRenderMatrix(0, idx, track, 1)
+  end
+  if stop + payload.gap > tail then tail = stop + payload.gap end
+  emit(slot.path, idx, start, stop)
+end
+for _, entry in ipairs(payload.pending) do
+  local track = lane_tracks[1]
+  local item = insert_at(entry.path, track, tail)
+  local stop = tail + (item and reaper.GetMediaItemInfo_Value(item, "D_LENGTH") or 0)
+  local idx = reaper.AddProjectMarker2(0, true, tail, stop, entry.name, -1, 0)
+  if track and payload.tracks > 1 then
+    reaper.SetRegionRenderMatrix(0, idx, track, 1)
+  end
+  emit(entry.path, idx, tail, stop)
+  tail = stop + payload.gap
+end
+reaper.SetEditCurPos(base, false, false)
+""", undo_label="Wreaper: 区间导入音频")
+
+# 列出当前选中的 Item：GUID 与激活 Take 名
+SELECTED_ITEMS_SCRIPT = ReaScript("wreaper_selected_items", """
+for i = 0, reaper.CountSelectedMediaItems(0) - 1 do
+  local item = reaper.GetSelectedMediaItem(0, i)
+  local take = reaper.GetActiveTake(item)
+  if take then
+    local _, guid = reaper.GetSetMediaItemInfo_String(item, "GUID", "", false)
+    emit(guid, reaper.GetTakeName(take))
+  end
+end
+""")
+
+# 按组渲染选中 Item：每组只选中组内 Item，设置目标目录与格式后渲染一次，结束后恢复原选择
+RENDER_ITEM_GROUPS_SCRIPT = ReaScript("wreaper_render_item_groups", """
+local by_guid, was_selected = {}, {}
+for i = 0, reaper.CountMediaItems(0) - 1 do
+  local item = reaper.GetMediaItem(0, i)
+  local _, guid = reaper.GetSetMediaItemInfo_String(item, "GUID", "", false)
+  by_guid[guid] = item
+  was_selected[item] = reaper.IsMediaItemSelected(item)
+end
+for _, group in ipairs(payload.groups) do
+  reaper.SelectAllMediaItems(0, false)
+  local count = 0
+  for _, guid in ipairs(group.keys) do
+    local item = by_guid[guid]
+    if item then
+      reaper.SetMediaItemSelected(item, true)
+      count = count + 1
+    end
+  end
+  if count > 0 then
+    reaper.GetSetProjectInfo(0, "RENDER_SETTINGS", 32, true)
+    reaper.GetSetProjectInfo_String(0, "RENDER_FILE", group.dir, true)
+    reaper.GetSetProjectInfo_String(0, "RENDER_PATTERN", "$item", true)
+    reaper.GetSetProjectInfo(0, "RENDER_SRATE", group.srate, true)
+    reaper.GetSetProjectInfo(0, "RENDER_CHANNELS", group.channels, true)
+    reaper.Main_OnCommand(41824, 0)
+  end
+  emit(group.dir, count)
+end
+for item, selected in pairs(was_selected) do
+  reaper.SetMediaItemSelected(item, selected)
+end
+reaper.UpdateArrange()
+""")
+
+# 一次性枚举工程内所有区间：编号、名称、起止时间
+REGION_INDEX_SCRIPT = ReaScript("wreaper_region_index", """
+local _, num_markers, num_regions = reaper.CountProjectMarkers(0)
+for i = 0, num_markers + num_regions - 1 do
+  local _, isrgn, pos, rgnend, name, number = reaper.EnumProjectMarkers3(0, i)
+  if isrgn then
+    emit(number, name, pos, rgnend)
+  end
+end
+""")
+
+# 按组渲染区间：借助区间渲染矩阵，每组只让组内区间参与渲染并输出到各自目录。
+# 已有的矩阵条目（如多轨打包导入时设置的轨道）会先保存并清空，组内区间沿用其原轨道，
+# 没有条目的区间使用主轨道；全部渲染完成后恢复原矩阵。
+RENDER_REGION_GROUPS_SCRIPT = ReaScript("wreaper_render_region_groups", """
+local master = reaper.GetMasterTrack(0)
+local saved = {}
+local _, num_markers, num_regions = reaper.CountProjectMarkers(0)
+for i = 0, num_markers + num_regions - 1 do
+  local _, isrgn, _, _, _, number = reaper.EnumProjectMarkers3(0, i)
+  if isrgn then
+    local tracks, j = {}, 0
+    while true do
+      local track = reaper.EnumRegionRenderMatrix(0, number, j)
+      if not track then break end
+      tracks[#tracks + 1] = track
+      j = j + 1
+    end
+    saved[number] = tracks
+    for _, track in ipairs(tracks) do
+      reaper.SetRegionRenderMatrix(0, number, track, -1)
+    end
+  end
+end
+local function region_tracks(number)
+  local tracks = saved[number]
+  if tracks and #tracks > 0 then return tracks end
+  return {master}
+end
+for _, group in ipairs(payload.groups) do
+  for _, number in ipairs(group.keys) do
+    for _, track in ipairs(region_tracks(number)) do
+      reaper.SetRegionRenderMatrix(0, number, track, 1)
+    end
+  end
+  reaper.GetSetProjectInfo(0, "RENDER_SETTINGS", 8, true)
+  reaper.GetSetProjectInfo(0, "RENDER_BOUNDSFLAG", 3, true)
+  reaper.GetSetProjectInfo_String(0, "RENDER_FILE", group.dir, true)
+  reaper.GetSetProjectInfo_String(0, "RENDER_PATTERN", "$region", true)
+  reaper.GetSetProjectInfo(0, "RENDER_SRATE", group.srate, true)
+  reaper.GetSetProjectInfo(0, "RENDER_CHANNELS", group.channels, true)
+  reaper.Main_OnCommand(41824, 0)
+  for _, number in ipairs(group.keys) do
+    for _, track in ipairs(region_tracks(number)) do
+      reaper.SetRegionRenderMatrix(0, number, track, -1)
+    end
+  end
+  emit(group.dir, #group.keys)
+end
+for number, tracks in pairs(saved) do
+  for _, track in ipairs(tracks) do
+    reaper.SetRegionRenderMatrix(0, number, track, 1)
+  end
+end
+""")
 
 class ReaperService:
     """
     封装 Reaper 相关操作。
     """
 
-    def is_reaper_running(self) -> bool:
+    def __init__(self, runner: ReaScriptRunner = None):
+        self.runner = runner or ReaScriptRunner()
+        # 缓存上次找到的 Reaper 进程 PID，命中时只需校验该进程，无需遍历全部进程
+        self._reaper_pid = None
+        # reapy 桥接已确认可用时记录对应的 PID，进程变化后需重新探测
+        self._ready_pid = None
+
+    def _is_reaper_process(self, pid) -> bool:
+        try:
+            proc = psutil.Process(pid)
+            return proc.is_running() and proc.name().lower() == REAPER_PROCESS_NAME
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+
+    def _find_reaper_pid(self):
         for p in psutil.process_iter(['name']):
-            if p.info['name'] and p.info['name'].lower() == 'reaper.exe':
-                return True
-        return False
+            if p.info['name'] and p.info['name'].lower() == REAPER_PROCESS_NAME:
+                return p.pid
+        return None
+
+    def is_reaper_running(self) -> bool:
+        # 1) 先校验缓存的 PID（单个进程查询，开销极小）
+        if self._reaper_pid is not None and self._is_reaper_process(self._reaper_pid):
+            return True
+        # 2) 缓存失效时才做一次全量扫描
+        self._reaper_pid = self._find_reaper_pid()
+        if self._reaper_pid is None:
+            self._ready_pid = None
+        return self._reaper_pid is not None
 
     def start_reaper(self, reaper_path: str):
         if not reaper_path or not os.path.exists(reaper_path):
             raise FileNotFoundError("未找到有效的 Reaper 启动文件路径")
-        subprocess.Popen([reaper_path])
+        proc = subprocess.Popen([reaper_path])
+        self._reaper_pid = proc.pid
+        self._ready_pid = None
+
+    def is_reaper_ready(self) -> bool:
+        """
+        探测 reapy 桥接是否已可响应 API 调用。
+        同一 Reaper 进程确认可用后不再重复探测。
+        """
+        if not self.is_reaper_running():
+            return False
+        if self._ready_pid == self._reaper_pid:
+            return True
+        try:
+            rpp.GetAppVersion()
+        except Exception:
+            # Reaper 刚启动时 reapy 处于断开状态，重连后再试一次
+            try:
+                reapy.reconnect()
+                rpp.GetAppVersion()
+            except Exception:
+                return False
+        self._ready_pid = self._reaper_pid
+        return True
 
     def open_audio_in_reaper(self, audio_paths):
-        for audio_path in audio_paths:
-            rpp.InsertMedia(audio_path, 1)
-    
-    def open_audioRegion_in_reaper(self, audio_paths):
-        last_end = None
-        for audio_path in audio_paths:
-            # 插入音频
-            rpp.InsertMedia(audio_path, 1)
-            # 获取最后一个插入的 item
-            num_items = rpp.CountMediaItems(0)
-            item = rpp.GetMediaItem(0, num_items - 1)
-            length = rpp.GetMediaItemInfo_Value(item, "D_LENGTH")
-            if last_end is None:
-                start = rpp.GetMediaItemInfo_Value(item, "D_POSITION")
-            else:
-                start = last_end + 1.0  # 上一个区间结束后1秒
-                rpp.SetMediaItemInfo_Value(item, "D_POSITION", start)
-            end = start + length
-            last_end = end
-            region_name = os.path.splitext(os.path.basename(audio_path))[0]
-            rpp.AddProjectMarker2(0, True, start, end, region_name, -1, 0)
-                
\ No newline at end of file
+        """
+        一次性把文件列表交给 Reaper 批量插入（单个撤销块，插入期间暂停界面刷新）。
+        """
+        if not audio_paths:
+            return []
+        with trace.job("reaper_import"):
+            return self.runner.run(IMPORT_ITEMS_SCRIPT, {"paths": list(audio_paths)})
+
+    def open_audioRegion_in_reaper(self, audio_paths, gap: float = 1.0, tracks: int = 0, known_durations=None):
+        """
+        批量插入音频并为每个音频创建同名区间，区间之间间隔 gap 秒。
+        排布由文件头时长（读取失败时用 known_durations，即 WAAPI 时长）预先算好（见 region_layout），插入与建区间一次性在 Reaper 内完成。
+        tracks > 1 时把音频打包到多条轨道上。
+        返回 [路径, 区间编号, 起点, 终点] 列表。
+        """
+        if not audio_paths:
+            return []
+        with trace.job("reaper_import_regions"):
+            with trace.span("region.durations", "io", files=len(audio_paths)):
+                durations = read_durations(audio_paths, known_durations)
+            with trace.span("region.layout", "reaper"):
+                slots, missing = plan_region_layout(audio_paths, durations, gap=gap, tracks=tracks)
+            payload = {
+                "slots": [slot.to_payload() for slot in slots],
+                "pending": [{"path": p, "name": os.path.splitext(os.path.basename(p))[0]} for p in missing],
+                "gap": float(gap),
+                "tracks": max(0, int(tracks)),
+            }
+            return self.runner.run(IMPORT_REGIONS_SCRIPT, payload)
+
+    def get_selected_items(self):
+        """返回选中 Item 的 [(GUID, Take名)]。"""
+        return [(row[0], row[1] if len(row) > 1 else "") for row in self.runner.run(SELECTED_ITEMS_SCRIPT)]
+
+    def render_item_groups(self, groups):
+        """
+        在一次脚本执行中按组渲染 Item，每组输出到各自的目标目录。
+        返回 [目录, 渲染数量] 列表。
+        """
+        if not groups:
+            return []
+        with trace.job("reaper_render_items"):
+            return self.runner.run(RENDER_ITEM_GROUPS_SCRIPT, {"groups": [g.to_payload() for g in groups]})
+
+    def get_regions(self):
+        """
+        一次调用取回工程内全部区间，返回 [(区间编号, 名称, 起点, 终点)]。
+        """
+        regions = []
+        for row in self.runner.run(REGION_INDEX_SCRIPT):
+            if len(row) < 4:
+                continue
+            regions.append((int(float(row[0])), row[1], float(row[2]), float(row[3])))
+        return regions
+
+    def render_region_groups(self, groups):
+        """
+        在一次脚本执行中按组渲染区间，每组输出到各自的目标目录。
+        返回 [目录, 渲染数量] 列表。
+        """
+        if not groups:
+            return []
+        with trace.job("reaper_render_regions"):
+            return self.runner.run(RENDER_REGION_GROUPS_SCRIPT, {"groups": [g.to_payload() for g in groups]})
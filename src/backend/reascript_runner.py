@@ -0,0 +1,133 @@
+import os
+from reapy import reascript_api as rpp
+from utils import trace
+from utils.config import LOG_DIR
+
+# 生成的 Lua 脚本与结果文件放在固定目录下，按脚本名覆盖，不会随会话累积
+REASCRIPT_DIR = os.path.join(LOG_DIR, "reascript")
+
+
+class ReaScript:
+    """
+    一段在 Reaper 进程内执行的 Lua 脚本。
+    body 中可直接使用：
+      - payload : Python 传入的数据（已转换为 Lua table）
+      - emit(...) : 输出一行结果，各字段以制表符分隔回传给 Python
+    """
+    def __init__(self, name: str, body: str, undo_label: str = None):
+        self.name = name
+        self.body = body
+        self.undo_label = undo_label
+
+
+_PRELUDE = """
+local payload = {payload}
+local __out = io.open({result_path}, "w")
+local function emit(...)
+  local fields = {{...}}
+  for i = 1, #fields do
+    fields[i] = tostring(fields[i]):gsub("[\\t\\r\\n]", " ")
+  end
+  __out:write(table.concat(fields, "\\t"), "\\n")
+end
+"""
+
+_UNDO_BEGIN = """
+reaper.Undo_BeginBlock()
+reaper.PreventUIRefresh(1)
+"""
+
+_UNDO_END = """
+reaper.PreventUIRefresh(-1)
+reaper.UpdateArrange()
+reaper.Undo_EndBlock({undo_label}, -1)
+"""
+
+_EPILOGUE = """
+__out:close()
+"""
+
+
+def to_lua(value) -> str:
+    """把 Python 基础类型（None/bool/数字/字符串/list/dict）转换为 Lua 字面量。"""
+    if value is None:
+        return "nil"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        out = ['"']
+        for ch in value:
+            if ch == "\\":
+                out.append("\\\\")
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\r":
+                out.append("\\r")
+            elif ord(ch) < 32:
+                out.append(f"\\{ord(ch):03d}")
+            else:
+                out.append(ch)
+        out.append('"')
+        return "".join(out)
+    if isinstance(value, (list, tuple)):
+        return "{" + ", ".join(to_lua(v) for v in value) + "}"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"[{to_lua(str(k))}] = {to_lua(v)}" for k, v in value.items()) + "}"
+    raise TypeError(f"无法转换为 Lua 的类型: {type(value).__name__}")
+
+
+class ReaScriptRunner:
+    """
+    把整段逻辑和数据一次性发送给 Reaper，在其进程内执行。
+    相比逐个 RPC 调用，只需注册/执行/注销三次往返。
+    """
+
+    def __init__(self, work_dir: str = None):
+        # Reaper 进程的工作目录与本进程不同，脚本与结果路径必须是绝对路径
+        self.work_dir = os.path.abspath(work_dir or REASCRIPT_DIR)
+
+    def build_source(self, script: ReaScript, payload, result_path: str) -> str:
+        parts = [_PRELUDE.format(payload=to_lua(payload), result_path=to_lua(result_path))]
+        if script.undo_label:
+            parts.append(_UNDO_BEGIN)
+        parts.append(script.body)
+        if script.undo_label:
+            parts.append(_UNDO_END.format(undo_label=to_lua(script.undo_label)))
+        parts.append(_EPILOGUE)
+        return "\n".join(parts)
+
+    def run(self, script: ReaScript, payload=None):
+        """
+        执行脚本并返回 emit 输出的结果行（每行为字符串字段列表）。
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        script_path = os.path.join(self.work_dir, f"{script.name}.lua")
+        result_path = os.path.join(self.work_dir, f"{script.name}.out")
+        if os.path.exists(result_path):
+            os.remove(result_path)
+
+        with trace.span(f"reascript.{script.name}", "reaper") as sp:
+            source = self.build_source(script, payload, result_path)
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            sp.add(bytes=len(source))
+
+            command_id = rpp.AddRemoveReaScript(True, 0, script_path, True)
+            if not command_id:
+                raise RuntimeError(f"注册 ReaScript 失败: {script_path}")
+            try:
+                with trace.span("reascript.execute", "reaper"):
+                    rpp.Main_OnCommand(command_id, 0)
+            finally:
+                rpp.AddRemoveReaScript(False, 0, script_path, True)
+
+            if not os.path.exists(result_path):
+                raise RuntimeError(f"ReaScript 未返回结果: {script.name}")
+            with open(result_path, "r", encoding="utf-8") as f:
+                rows = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+            sp.add(rows=len(rows))
+            return rows
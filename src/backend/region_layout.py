@@ -0,0 +1,72 @@
+import os
+from backend.audio_probe import probe_duration
+
+
+class RegionSlot:
+    """区间排布结果：一个音频在时间线上的位置（相对起点，单位秒）。"""
+    __slots__ = ("path", "name", "track", "start", "end")
+
+    def __init__(self, path, name, track, start, end):
+        self.path = path
+        self.name = name
+        self.track = track
+        self.start = start
+        self.end = end
+
+    def to_payload(self) -> dict:
+        return {"path": self.path, "name": self.name, "track": self.track,
+                "start": self.start, "end": self.end}
+
+
+def _waapi_duration(value):
+    """WAAPI duration 可能是数值，也可能是 {"min","max","type"} 字典。"""
+    if isinstance(value, dict):
+        if value.get("type") == "Infinite":
+            return None
+        value = value.get("max", value.get("min"))
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def read_durations(audio_paths, known_durations=None):
+    """
+    读取每个文件的时长（秒），只解析文件头，不解码音频。
+    头信息读取失败时回退到 known_durations（如 WAAPI 返回的 duration）。
+    WAAPI 的 duration 已计入 Sound 的裁剪、音高与循环设置，而 Reaper 插入的是源文件本身，
+    因此只作为回退，不能优先使用。
+    """
+    known_durations = known_durations or {}
+    durations = {}
+    for path in audio_paths:
+        duration = probe_duration(path)
+        durations[path] = duration if duration is not None else _waapi_duration(known_durations.get(path))
+    return durations
+
+
+def plan_region_layout(audio_paths, durations, gap: float = 1.0, tracks: int = 0):
+    """
+    预先计算区间排布。
+    - tracks <= 1：全部首尾相接，依次间隔 gap 秒（tracks=0 时每个音频各占一条新轨道）
+    - tracks > 1 ：打包到 tracks 条轨道，每个音频放到最早空闲的轨道上
+    缺少时长的文件无法排布，会放入返回值的 missing 列表。
+    返回 (slots, missing)。
+    """
+    lanes = max(1, int(tracks))
+    lane_free = [0.0] * lanes
+    slots = []
+    missing = []
+    for path in audio_paths:
+        length = durations.get(path)
+        if not length:
+            missing.append(path)
+            continue
+        lane = min(range(lanes), key=lambda i: lane_free[i])
+        start = lane_free[lane]
+        end = start + length
+        lane_free[lane] = end + gap
+        name = os.path.splitext(os.path.basename(path))[0]
+        slots.append(RegionSlot(path, name, lane + 1, start, end))
+    return slots, missing
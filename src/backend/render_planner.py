@@ -0,0 +1,68 @@
+import os
+
+
+class RenderGroup:
+    """同一目标目录、同一格式的一组渲染对象（Item GUID 或区间编号）。"""
+
+    def __init__(self, target_dir: str, srate: int, channels: int):
+        self.target_dir = target_dir
+        self.srate = srate
+        self.channels = channels
+        self.keys = []
+        self.targets = []
+
+    def add(self, key, target_path: str):
+        self.keys.append(key)
+        self.targets.append(target_path)
+
+    def to_payload(self) -> dict:
+        return {"dir": self.target_dir, "srate": self.srate, "channels": self.channels, "keys": self.keys}
+
+
+class RenderPlan:
+    """
+    渲染计划：按 (目标目录, 采样率, 通道数) 分组，
+    unmatched 为未在 Wwise 中选中的名称，unwritable 为不可写的目标目录。
+    """
+
+    def __init__(self):
+        self.groups = []
+        self.unmatched = []
+        self.unwritable = []
+
+    @property
+    def total(self) -> int:
+        return sum(len(g.keys) for g in self.groups)
+
+    def summary(self) -> str:
+        lines = [f"共渲染 {self.total} 个文件，{len(self.groups)} 个目录："]
+        for group in self.groups:
+            lines.append(f"{group.target_dir}  ({len(group.keys)} 个, {group.srate} Hz, {group.channels} ch)")
+        return "\n".join(lines)
+
+
+def plan_renders(entries, wwise_map, srate: int, channels: int) -> RenderPlan:
+    """
+    entries: [(key, name)]，key 为 Item GUID 或区间编号，name 为 Take 名或区间名。
+    wwise_map: {name: Wwise 源文件路径}
+    """
+    plan = RenderPlan()
+    groups = {}
+    for key, name in entries:
+        source_path = wwise_map.get(name)
+        if not source_path:
+            if name:
+                plan.unmatched.append(name)
+            continue
+        target_dir = os.path.dirname(source_path)
+        group_key = (os.path.normcase(target_dir), srate, channels)
+        group = groups.get(group_key)
+        if group is None:
+            if not os.access(target_dir, os.W_OK):
+                if target_dir not in plan.unwritable:
+                    plan.unwritable.append(target_dir)
+                continue
+            group = groups[group_key] = RenderGroup(target_dir, srate, channels)
+            plan.groups.append(group)
+        group.add(key, source_path)
+    return plan
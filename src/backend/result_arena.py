@@ -0,0 +1,71 @@
+import os
+import tempfile
+import numpy as np
+
+
+class ResultArena:
+    """
+    子进程向父进程传递大数组（如逐帧响度曲线）：父进程按各任务预计的数组长度
+    预先分配一个内存映射文件，每个任务得到一个只含路径与区段的句柄；
+    子进程把数组直接写入自己的区段，只返回实际长度，父进程按长度取视图，数组不经过 pickle。
+
+    capacities[i] 为第 i 个任务各数组的容量（元素数）；实际长度超过容量的部分被截断。
+    """
+
+    def __init__(self, capacities, dtype=np.float32, path=None):
+        self.dtype = np.dtype(dtype)
+        self.offsets = []
+        total = 0
+        for caps in capacities:
+            spans = []
+            for cap in caps:
+                spans.append((total, cap))
+                total += cap
+            self.offsets.append(spans)
+        self.size = total
+        self._owns = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="wreaper_", suffix=".arena")
+            os.close(fd)
+        self.path = path
+        # 长度为 0 时 np.memmap 无法映射，至少保留一个元素
+        self.data = np.memmap(path, dtype=self.dtype, mode="w+", shape=(max(total, 1),))
+
+    def handle(self, index):
+        """传给子进程的句柄：(路径, dtype, 总长度, [(偏移, 容量), ...])。"""
+        return self.path, self.dtype.str, len(self.data), self.offsets[index]
+
+    def view(self, index, lengths):
+        """第 index 个任务写入的各数组（内存映射视图，不复制）。"""
+        return [self.data[offset:offset + min(length, cap)]
+                for (offset, cap), length in zip(self.offsets[index], lengths)]
+
+    def close(self):
+        """释放映射并删除临时文件（view() 返回的数组仍被引用时映射在其释放后才关闭）。"""
+        if self.data is not None:
+            self.data.flush()
+            self.data = None
+        if self._owns:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+_mapped = {}    # 子进程中已打开的映射：路径 -> memmap
+
+
+def write(handle, arrays):
+    """在子进程中把 arrays 依次写入句柄对应的区段，返回各数组写入的长度。"""
+    path, dtype, size, spans = handle
+    data = _mapped.get(path)
+    if data is None:
+        # 同一进程池中的任务共用一个映射，避免每个任务重新 mmap
+        _mapped.clear()
+        data = _mapped[path] = np.memmap(path, dtype=dtype, mode="r+", shape=(size,))
+    lengths = []
+    for (offset, cap), array in zip(spans, arrays):
+        n = min(len(array), cap)
+        data[offset:offset + n] = array[:n]
+        lengths.append(n)
+    return lengths
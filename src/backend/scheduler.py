@@ -0,0 +1,73 @@
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+
+
+class Job:
+    """一个待提交的任务：cost 为预计峰值内存（字节），args 为传给任务函数的参数。"""
+    __slots__ = ("key", "cost", "args")
+
+    def __init__(self, key, cost, args):
+        self.key = key
+        self.cost = cost
+        self.args = args
+
+
+def _submit(executor, func, *args):
+    return executor.submit(func, *args)
+
+
+class MemoryBudgetScheduler:
+    """
+    按内存预算向进程池提交任务，代替“一次提交全部 + as_completed”：
+    执行中的任务预计内存之和不超过 budget，避免多个长的多声道高采样率文件同时落到各进程上耗尽内存。
+
+    任务按 cost 从大到小排列，轮流从两端取：长文件尽早开始（不会全部拖到最后），
+    短文件填补预算余量，使各进程保持忙碌。单个任务超出预算时等其他任务全部结束后单独执行。
+    """
+
+    def __init__(self, executor, workers, budget, submit=_submit):
+        self.executor = executor
+        self.workers = workers
+        self.budget = budget
+        self.submit = submit
+        self.in_use = 0
+        self.peak = 0       # 执行中任务预计内存之和的最大值
+
+    def run(self, func, jobs):
+        """按完成顺序产出 (job, future)；生成器被提前关闭时取消尚未开始的任务。"""
+        queue = deque(sorted(jobs, key=lambda job: job.cost, reverse=True))
+        running = {}
+        # 进程池在各进程之外还会预取任务，多留一倍名额避免进程等待父进程提交
+        slots = self.workers * 2
+        take_large = True
+        try:
+            while queue or running:
+                while queue and len(running) < slots:
+                    job = self._next(queue, take_large, not running)
+                    if job is None:
+                        break
+                    take_large = not take_large
+                    future = self.submit(self.executor, func, *job.args)
+                    running[future] = job
+                    self.in_use += job.cost
+                    self.peak = max(self.peak, self.in_use)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    self.in_use -= job.cost
+                    yield job, future
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _next(self, queue, take_large, idle):
+        free = self.budget - self.in_use
+        large = (0, queue.popleft)
+        small = (-1, queue.pop)
+        for end, take in ((large, small) if take_large else (small, large)):
+            if queue[end].cost <= free:
+                return take()
+        # 没有任务在执行时，即使超出预算也要执行最大的一个，否则永远无法完成
+        if idle:
+            return queue.popleft()
+        return None
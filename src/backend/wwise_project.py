@@ -0,0 +1,277 @@
+import os
+import json
+import xml.etree.ElementTree as ET
+
+# 工作单元顶层节点 -> 层级根目录名（与 WAAPI 路径一致）
+HIERARCHY_ROOTS = {
+    "AudioObjects": "Actor-Mixer Hierarchy",
+    "InteractiveMusic": "Interactive Music Hierarchy",
+    "Busses": "Master-Mixer Hierarchy",
+}
+# 只解析参与 LUFS 游戏内计算的属性
+GAIN_PROPERTIES = ("Volume", "MakeUpGain", "BusVolume")
+WWU_DIRS = ("Actor-Mixer Hierarchy", "Interactive Music Hierarchy", "Master-Mixer Hierarchy", "Containers", "Busses")
+
+
+def _property_value(elem):
+    """<Property Value="x"/> 或 <Property><ValueList><Value>x</Value></ValueList></Property>。"""
+    value = elem.get("Value")
+    if value is None:
+        for child in elem.iter("Value"):
+            value = child.text
+            break
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_work_unit(wwu_path):
+    """
+    流式解析单个 .wwu，返回对象记录列表：
+    {id, name, type, parent, root, props, output_bus, language, audio_file, persist}
+    parent 为 None 的对象是该文件的顶层工作单元，其父级由引用它的上级工作单元决定。
+    """
+    records = []
+    tags = []       # 当前元素路径（标签名）
+    objects = []    # 当前对象栈：(元素深度, 记录)
+    root = None
+    for event, elem in ET.iterparse(wwu_path, events=("start", "end")):
+        if event == "start":
+            parent_tag = tags[-1] if tags else None
+            tags.append(elem.tag)
+            if elem.tag in HIERARCHY_ROOTS and root is None:
+                root = HIERARCHY_ROOTS[elem.tag]
+            elif root and (parent_tag == "ChildrenList" or parent_tag in HIERARCHY_ROOTS) and elem.get("ID"):
+                record = {
+                    "id": elem.get("ID"),
+                    "name": elem.get("Name", ""),
+                    "type": elem.tag,
+                    "parent": objects[-1][1]["id"] if objects else None,
+                    "root": root,
+                    "props": {},
+                    "output_bus": None,
+                    "persist": elem.get("PersistMode"),
+                }
+                objects.append((len(tags), record))
+                records.append(record)
+            continue
+
+        # end 事件
+        depth = len(tags)
+        owner = objects[-1] if objects else None
+        if owner:
+            rel = depth - owner[0]   # 相对当前对象的层级
+            record = owner[1]
+            if elem.tag == "Property" and rel == 2 and tags[-2] == "PropertyList":
+                name = elem.get("Name")
+                if name in GAIN_PROPERTIES:
+                    record["props"][name] = _property_value(elem)
+            elif elem.tag == "Reference" and rel == 2 and elem.get("Name") == "OutputBus":
+                ref = elem.find("ObjectRef")
+                if ref is not None:
+                    record["output_bus"] = ref.get("ID")
+            elif rel == 1 and elem.tag in ("Language", "AudioFile"):
+                record["language" if elem.tag == "Language" else "audio_file"] = (elem.text or "").strip()
+            elif rel == 0:
+                objects.pop()
+                elem.clear()   # 对象解析完毕即释放，保持内存占用与文件大小无关
+        tags.pop()
+    return records
+
+
+class WorkUnitCache:
+    """按工作单元 (mtime, size) 缓存解析结果，未改动的 .wwu 不再重新解析。"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self._entries = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def records(self, wwu_path):
+        st = os.stat(wwu_path)
+        entry = self._entries.get(wwu_path)
+        if entry and entry[0] == st.st_mtime and entry[1] == st.st_size:
+            return entry[2], False
+        records = parse_work_unit(wwu_path)
+        self._entries[wwu_path] = [st.st_mtime, st.st_size, records]
+        return records, True
+
+    def prune(self, project_dir, wwu_paths):
+        """移除本工程中已删除的工作单元，其他工程的条目保留。"""
+        keep = set(wwu_paths)
+        prefix = os.path.join(project_dir, "")
+        for path in [p for p in self._entries if p.startswith(prefix) and p not in keep]:
+            del self._entries[path]
+
+    def save(self):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+
+class WwiseProjectIndex:
+    """
+    离线 Wwise 工程索引：直接读取 .wwu 工作单元，不需要运行 Wwise / WAAPI。
+    audio_files() 返回与 get_audio_sources 相同结构的字典列表。
+    """
+
+    def __init__(self, project_path, cache_path=None, originals_dir=None):
+        self.project_dir = os.path.dirname(os.path.abspath(project_path))
+        self.originals_dir = originals_dir or os.path.join(self.project_dir, "Originals")
+        self.cache = WorkUnitCache(cache_path)
+        self.objects = {}
+
+    def work_units(self):
+        paths = []
+        for sub in WWU_DIRS:
+            top = os.path.join(self.project_dir, sub)
+            for dirpath, _, filenames in os.walk(top):
+                paths.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(".wwu"))
+        return sorted(paths)
+
+    def refresh(self, status_callback=None):
+        """重新加载工作单元，只解析有改动的文件；返回重新解析的文件数。"""
+        objects = {}
+        stubs = {}   # 被引用的子工作单元 id -> 上级对象 id
+        parsed = 0
+        paths = self.work_units()
+        for idx, path in enumerate(paths):
+            if status_callback:
+                status_callback(f"读取工作单元({idx + 1}/{len(paths)}): {os.path.basename(path)}")
+            records, reparsed = self.cache.records(path)
+            parsed += reparsed
+            for record in records:
+                if record.get("persist") == "Reference":
+                    stubs[record["id"]] = record["parent"]
+                else:
+                    objects[record["id"]] = record
+        # 子工作单元挂到引用它的位置上
+        for wu_id, parent in stubs.items():
+            if wu_id in objects and parent:
+                objects[wu_id] = dict(objects[wu_id], parent=parent)
+        self.objects = objects
+        self.cache.prune(self.project_dir, paths)
+        self.cache.save()
+        return parsed
+
+    def _chain(self, obj_id):
+        """obj_id 的父级链（由近到远，不含自身）。"""
+        chain = []
+        seen = set()
+        parent = self.objects.get(obj_id, {}).get("parent")
+        while parent and parent in self.objects and parent not in seen:
+            seen.add(parent)
+            chain.append(self.objects[parent])
+            parent = self.objects[parent]["parent"]
+        return chain
+
+    def wwise_path(self, record):
+        names = [record["name"]] + [r["name"] for r in self._chain(record["id"])]
+        return "\\" + "\\".join([record["root"]] + list(reversed(names)))
+
+    def source_file(self, record):
+        language = record.get("language") or "SFX"
+        audio_file = (record.get("audio_file") or "").replace("\\", os.sep)
+        if language == "SFX":
+            return os.path.join(self.originals_dir, "SFX", audio_file)
+        return os.path.join(self.originals_dir, "Voices", language, audio_file)
+
+    def _source_info(self, record):
+        ancestors = self._chain(record["id"])
+        ancestors_list = [{
+            "id": anc["id"], "name": anc["name"],
+            "volume": anc["props"].get("Volume"), "makeup": anc["props"].get("MakeUpGain"),
+        } for anc in ancestors]
+        ancestors_list.append({"id": None, "name": record["root"], "volume": None, "makeup": None})
+
+        # 与 WAAPI 读取一致：对象自身未设置 Output Bus 时从最近父级继承
+        bus_id = record.get("output_bus")
+        if not bus_id:
+            for anc in ancestors:
+                if anc.get("output_bus"):
+                    bus_id = anc["output_bus"]
+                    break
+
+        bus = self.objects.get(bus_id) if bus_id else None
+        bus_ancestors_list = []
+        if bus:
+            bus_ancestors_list = [{
+                "id": anc["id"], "name": anc["name"],
+                "bus_volume": anc["props"].get("BusVolume"), "volume": anc["props"].get("Volume"),
+            } for anc in self._chain(bus_id)]
+            bus_ancestors_list.append({"id": None, "name": bus["root"], "bus_volume": None, "volume": None})
+
+        return {
+            "id": record["id"],
+            "name": record["name"],
+            "wwise_path": self.wwise_path(record),
+            "file_path": self.source_file(record),
+            "duration": 0,
+            "OutputBus_id": bus_id or "",
+            "OutputBus_Name": bus["name"] if bus else "",
+            "OutputBus_BusVolume": bus["props"].get("BusVolume") if bus else None,
+            "OutputBus_Volume": bus["props"].get("Volume") if bus else None,
+            "OutputBus_ancestors_list": bus_ancestors_list,
+            "ancestors_list": ancestors_list,
+        }
+
+    def audio_files(self, scope=None, progress_callback=None):
+        """scope 为 Wwise 路径前缀（如 \\Actor-Mixer Hierarchy\\Default Work Unit），为空时返回整个工程。"""
+        sources = [r for r in self.objects.values() if r["type"] == "AudioFileSource" and r.get("audio_file")]
+        audio_files = []
+        total = len(sources)
+        for idx, record in enumerate(sources):
+            info = self._source_info(record)
+            if not scope or info["wwise_path"].lower().startswith(scope.lower()):
+                audio_files.append(info)
+            if progress_callback and total:
+                progress_callback(int((idx + 1) / total * 100))
+        return audio_files
+
+
+def load_audio_sources(project_path, scope=None, cache_path=None, progress_callback=None, status_callback=None):
+    index = WwiseProjectIndex(project_path, cache_path=cache_path)
+    index.refresh(status_callback)
+    return index.audio_files(scope, progress_callback)
+
+
+def main(argv):
+    """离线生成响度报告：解析工程、分析音频源并写出 CSV。返回进程退出码。"""
+    import sys
+    from AudioAnalyse.LoudnessBatch import run_loudness_analysis
+    from utils import trace
+    if len(argv) < 2:
+        print("用法: python -m backend.wwise_project <工程.wproj> <输出.csv> [Wwise路径前缀]", file=sys.stderr)
+        return 1
+    project_path, csv_path = argv[0], argv[1]
+    scope = argv[2] if len(argv) > 2 else None
+    try:
+        files = load_audio_sources(project_path, scope)
+        if not files:
+            print("未找到音频源", file=sys.stderr)
+            return 1
+        print(f"共 {len(files)} 个音频源")
+        with trace.job("loudness"):
+            failed_files = run_loudness_analysis(files, csv_path, status_callback=print)
+    except Exception as e:
+        print(f"响度分析失败: {e}", file=sys.stderr)
+        return 1
+    for path, error in failed_files:
+        print(f"分析失败: {path}: {error}", file=sys.stderr)
+    print(f"已写入 {csv_path}")
+    # 部分文件分析失败时报告仍会写出，但以非零状态退出
+    return 2 if failed_files else 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main(sys.argv[1:]))
@@ -25,6 +25,19 @@ class WwiseService:
         返回 Wwise 里当前选中的对象的 originalFilePath 列表。
         放在子线程里调用更安全。
         """
+        objs = self._get_selected_objects(['originalFilePath'])
+        return [o.get("originalFilePath") for o in objs if o.get("originalFilePath")]
+
+    def get_selected_audio_durations(self):
+        """
+        返回 {originalFilePath: duration}，duration 为 WAAPI 原样返回的值
+        （数值或 {"min","max","type"} 字典），供区间排布时免去逐个探测文件。
+        """
+        objs = self._get_selected_objects(['originalFilePath', 'duration'])
+        return {o["originalFilePath"]: o.get("duration")
+                for o in objs if o.get("originalFilePath")}
+
+    def _get_selected_objects(self, returns):
         loop = None
         try:
             # 1) 先做快速端口探测，未开启直接返回友好错误
@@ -44,10 +57,9 @@ class WwiseService:
             with WaapiClient(url=url) as client:
                 result = client.call(
                     "ak.wwise.ui.getSelectedObjects",
-                    options={'return': ['originalFilePath']}
+                    options={'return': returns}
                 )
-                objs = result.get("objects", []) if result else []
-                return [o.get("originalFilePath") for o in objs if o.get("originalFilePath")]
+                return result.get("objects", []) if result else []
 
         except CannotConnectToWaapiException as e:
             raise RuntimeError("无法连接到Wwise，请确保Wwise正在运行并启用WAAPI。") from e
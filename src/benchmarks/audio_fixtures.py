@@ -0,0 +1,74 @@
+"""
+基准测试用的合成音频：噪声 + 扫频正弦 + 包络，按固定种子生成，每次运行内容一致。
+已存在且长度正确的文件不会重复生成。
+"""
+import os
+import numpy as np
+import soundfile as sf
+
+LAYOUTS = {"mono": 1, "stereo": 2, "5.1": 6}
+BLOCK_SECONDS = 10
+
+# (时长秒, 声道布局, 采样率)
+CORPORA = {
+    "quick": [
+        (1, "mono", 48000),
+        (10, "stereo", 48000),
+        (10, "5.1", 48000),
+        (60, "stereo", 44100),
+    ],
+    "full": (
+        [(d, layout, rate) for d in (1, 10) for layout in LAYOUTS for rate in (44100, 48000, 96000)]
+        + [(60, "stereo", rate) for rate in (44100, 48000, 96000)]
+        + [(600, "stereo", 48000), (1800, "mono", 44100), (1800, "stereo", 48000)]
+    ),
+}
+
+
+class Fixture:
+    __slots__ = ("path", "duration", "layout", "samplerate", "channels")
+
+    def __init__(self, path, duration, layout, samplerate):
+        self.path = path
+        self.duration = duration
+        self.layout = layout
+        self.samplerate = samplerate
+        self.channels = LAYOUTS[layout]
+
+
+def _render_block(rng, start, frames, rate, channels):
+    t = (start + np.arange(frames)) / rate
+    # 每 4 秒一个响/轻交替的包络，使门限与 LRA 有实际意义
+    envelope = np.where((t % 4.0) < 2.0, 1.0, 0.2)
+    sweep = np.sin(2 * np.pi * (100 + 50 * (t % 60)) * t)
+    noise = rng.standard_normal((frames, channels)) * 0.05
+    block = noise + (0.2 * sweep * envelope)[:, None]
+    return (block * 0.8).astype(np.float32)
+
+
+def write_fixture(path, duration, layout, rate, seed=0):
+    channels = LAYOUTS[layout]
+    total = int(duration * rate)
+    rng = np.random.default_rng(seed)
+    block = BLOCK_SECONDS * rate
+    with sf.SoundFile(path, "w", samplerate=rate, channels=channels, subtype="PCM_16") as f:
+        for start in range(0, total, block):
+            f.write(_render_block(rng, start, min(block, total - start), rate, channels))
+
+
+def generate_corpus(out_dir, name="quick"):
+    """生成（或复用）语料，返回 Fixture 列表。"""
+    os.makedirs(out_dir, exist_ok=True)
+    fixtures = []
+    for duration, layout, rate in CORPORA[name]:
+        filename = f"{duration}s_{layout.replace('.', '_')}_{rate}.wav"
+        path = os.path.join(out_dir, filename)
+        try:
+            current = sf.info(path).frames == int(duration * rate)
+        except Exception:
+            current = False
+        if not current:
+            # 种子只由参数决定，不同语料中的同名文件内容一致
+            write_fixture(path, duration, layout, rate, seed=duration * 1000 + rate + LAYOUTS[layout])
+        fixtures.append(Fixture(path, duration, layout, rate))
+    return fixtures
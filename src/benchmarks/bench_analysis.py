@@ -0,0 +1,357 @@
+"""
+分析热点的基准测试：响度、2D/3D 频谱、频谱质心。
+
+每项测试直接调用实际的分析函数，并临时包装其内部调用（解码、滤波、STFT、savefig 等）
+统计各阶段耗时，未单独计时的部分计入 gate / render。结果可保存为 JSON 基线并与之前的运行比较。
+
+用法（在 src 目录下）：
+    python -m benchmarks.bench_analysis --corpus quick --save baseline.json
+    python -m benchmarks.bench_analysis --corpus quick --baseline baseline.json
+    python -m benchmarks.bench_analysis --corpus full --precision   # float32 与 float64 的偏差、真峰值、多声道权重
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from contextlib import contextmanager
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import scipy
+import soundfile
+from scipy import signal
+import librosa
+import matplotlib.pyplot as plt
+
+from benchmarks.audio_fixtures import generate_corpus, CORPORA
+from AudioAnalyse import AnalyseLUFS_Game_Wwise as lufs
+from AudioAnalyse import AudioAnalyse as audio_analysis
+
+DEFAULT_THRESHOLD = 0.10   # 比基线慢 10% 以上视为退化
+PRECISION_TOLERANCE = 0.01  # LU / dB，float32 响度与 float64 参考的最大允许偏差
+TRUE_PEAK_TOLERANCE = 1e-4  # dB，快速真峰值与逐块过采样参考实现的最大允许偏差
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def patch(self, owner, attr, stage):
+        """在 with 块内把 owner.attr 替换为计时包装，退出时还原。"""
+        original = getattr(owner, attr)
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - start
+
+        setattr(owner, attr, wrapper)
+        try:
+            yield
+        finally:
+            setattr(owner, attr, original)
+
+
+@contextmanager
+def _patches(timer, patches):
+    if not patches:
+        yield
+        return
+    owner, attr, stage = patches[0]
+    with timer.patch(owner, attr, stage):
+        with _patches(timer, patches[1:]):
+            yield
+
+
+def _run_staged(func, args, patches, remainder):
+    """调用 func(*args)，返回 (结果, 总耗时, 各阶段耗时)；未计时部分记为 remainder 阶段。"""
+    timer = StageTimer()
+    with _patches(timer, patches):
+        start = time.perf_counter()
+        result = func(*args)
+        total = time.perf_counter() - start
+    timer.stages[remainder] = max(0.0, total - sum(timer.stages.values()))
+    return result, total, timer.stages
+
+
+def bench_loudness(fixture, out_dir):
+    return _run_staged(
+        lufs.analyze_loudness_detailed, (fixture.path,),
+        [(lufs.sf, "read", "decode"),
+         (lufs, "k_weighted_power", "filter"),
+         (lufs, "true_peak", "true_peak")],
+        "gate",
+    )
+
+
+def bench_spectrogram_2d(fixture, out_dir):
+    return _run_staged(
+        audio_analysis.plot_spectrogram_2d, (fixture.path, out_dir),
+        [(librosa, "load", "decode"),
+         (librosa, "stft", "stft"),
+         (plt, "savefig", "savefig")],
+        "render",
+    )
+
+
+def bench_spectrogram_3d(fixture, out_dir):
+    return _run_staged(
+        audio_analysis.process_long_audio_3d, (fixture.path, out_dir),
+        [(audio_analysis.sf, "read", "decode"),
+         (signal, "spectrogram", "stft"),
+         (plt, "savefig", "savefig")],
+        "render",
+    )
+
+
+def bench_centroid(fixture, out_dir):
+    return _run_staged(
+        audio_analysis.analyze_audio_file_centroid, (fixture.path, out_dir),
+        [(librosa, "load", "decode"),
+         (librosa.feature, "spectral_centroid", "centroid"),
+         (librosa, "stft", "stft"),
+         (plt, "savefig", "savefig")],
+        "render",
+    )
+
+
+BENCHMARKS = {
+    "loudness": bench_loudness,
+    "spectrogram_2d": bench_spectrogram_2d,
+    "spectrogram_3d": bench_spectrogram_3d,
+    "centroid": bench_centroid,
+}
+
+
+def run_benchmarks(fixtures, names, out_dir, repeat=1, log=print):
+    results = {}
+    for name in names:
+        bench = BENCHMARKS[name]
+        stages = {}
+        wall = 0.0
+        per_file = []
+        for fixture in fixtures:
+            # 多次运行取最快的一次，减少系统抖动
+            best = None
+            for _ in range(max(1, repeat)):
+                _, total, file_stages = bench(fixture, out_dir)
+                if best is None or total < best[0]:
+                    best = (total, file_stages)
+            total, file_stages = best
+            wall += total
+            for stage, seconds in file_stages.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            per_file.append({"file": os.path.basename(fixture.path), "seconds": total})
+            log(f"  {name:<15} {os.path.basename(fixture.path):<28} {total:8.3f}s")
+        audio_seconds = sum(f.duration for f in fixtures)
+        results[name] = {
+            "files": len(fixtures),
+            "audio_seconds": audio_seconds,
+            "wall": wall,
+            "files_per_s": len(fixtures) / wall if wall else None,
+            "audio_s_per_s": audio_seconds / wall if wall else None,
+            "stages": stages,
+            "per_file": per_file,
+        }
+    return results
+
+
+def check_precision(fixtures, dtype=lufs.LOUDNESS_DTYPE, tolerance=PRECISION_TOLERANCE, log=print):
+    """以 float64 为参考比较各响度统计项，返回超出容差的 (文件, 统计项, 偏差)。"""
+    failures = []
+    worst = {}
+    for fixture in fixtures:
+        reference, _ = lufs.analyze_loudness_detailed(fixture.path, dtype="float64")
+        stats, _ = lufs.analyze_loudness_detailed(fixture.path, dtype=dtype)
+        name = os.path.basename(fixture.path)
+        for key in lufs.LOUDNESS_STATS:
+            a, b = reference[key], stats[key]
+            if a is None or b is None or not (np.isfinite(a) and np.isfinite(b)):
+                if a != b:
+                    failures.append((name, key, float("inf")))
+                continue
+            delta = abs(a - b)
+            worst[key] = max(worst.get(key, 0.0), delta)
+            if delta > tolerance:
+                failures.append((name, key, delta))
+    log(f"{dtype} 与 float64 的最大偏差（容差 {tolerance}）：")
+    for key, delta in worst.items():
+        log(f"  {key:<12} {delta:.2e}")
+    for name, key, delta in failures:
+        log(f"  超出容差：{name} {key} {delta:.4f}")
+    return failures
+
+
+def check_true_peak(fixtures, dtype=lufs.LOUDNESS_DTYPE, tolerance=TRUE_PEAK_TOLERANCE, log=print):
+    """true_peak（跳过不可能超过峰值的段）与 true_peak_reference（整段过采样）比较，返回超出容差的 (文件, 偏差)。"""
+    failures = []
+    worst = 0.0
+    for fixture in fixtures:
+        data, _ = soundfile.read(fixture.path, dtype=dtype)
+        delta = abs(lufs.true_peak(data) - lufs.true_peak_reference(data))
+        worst = max(worst, delta)
+        if delta > tolerance:
+            failures.append((os.path.basename(fixture.path), delta))
+    log(f"真峰值与参考实现的最大偏差（容差 {tolerance}）：{worst:.2e}")
+    for name, delta in failures:
+        log(f"  超出容差：{name} TruePeak {delta:.6f}")
+    return failures
+
+
+def check_channel_layouts(out_dir, log=print):
+    """
+    多声道权重：5.1 中只有 LFE 有信号时综合响度为 -inf（LFE 不计入），
+    只有环绕声道有信号时比同样信号的单声道高 1.5 dB（5.1 与四声道），
+    表中没有的声道数（九声道）各声道按 1.0 计，与单声道相同。
+    返回失败描述列表。
+    """
+    rate = 48000
+    t = np.arange(rate * 5) / rate
+    tone = (0.25 * np.sin(2 * np.pi * 997 * t)).astype(np.float32)
+    failures = []
+
+    def analyse(name, channels, channel):
+        """只有第 channel 个声道有信号的文件。"""
+        data = np.zeros((len(tone), channels), dtype=np.float32)
+        data[:, channel] = tone
+        path = os.path.join(out_dir, name)
+        soundfile.write(path, data, rate, subtype="FLOAT")
+        return lufs.analyze_loudness_detailed(path)
+
+    mono, _ = analyse("layout_mono.wav", 1, 0)
+    lfe, _ = analyse("layout_5_1_lfe.wav", 6, 3)
+    if lfe is None or np.isfinite(lfe["LUFS-I"]):
+        failures.append(f"5.1 仅 LFE：LUFS-I 应为 -inf，实际 {lfe and lfe['LUFS-I']}")
+    surround, _ = analyse("layout_5_1_ls.wav", 6, 4)
+    expected = mono["LUFS-I"] + 10 * np.log10(1.41)
+    if surround is None or abs(surround["LUFS-I"] - expected) > PRECISION_TOLERANCE:
+        failures.append(f"5.1 仅 Ls：LUFS-I 应为 {expected:.2f}，实际 {surround and surround['LUFS-I']}")
+    quad, _ = analyse("layout_quad_ls.wav", 4, 2)
+    if quad is None or abs(quad["LUFS-I"] - expected) > PRECISION_TOLERANCE:
+        failures.append(f"四声道仅 Ls：LUFS-I 应为 {expected:.2f}，实际 {quad and quad['LUFS-I']}")
+    quad_front, _ = analyse("layout_quad_l.wav", 4, 0)
+    if quad_front is None or abs(quad_front["LUFS-I"] - mono["LUFS-I"]) > PRECISION_TOLERANCE:
+        failures.append(f"四声道仅 L：LUFS-I 应为 {mono['LUFS-I']:.2f}，实际 {quad_front and quad_front['LUFS-I']}")
+    unknown, _ = analyse("layout_9ch.wav", 9, 8)
+    if unknown is None or abs(unknown["LUFS-I"] - mono["LUFS-I"]) > PRECISION_TOLERANCE:
+        failures.append(f"九声道：LUFS-I 应为 {mono['LUFS-I']:.2f}，实际 {unknown and unknown['LUFS-I']}")
+
+    log("多声道权重：" + ("通过" if not failures else "失败"))
+    for failure in failures:
+        log(f"  {failure}")
+    return failures
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "soundfile": soundfile.__version__,
+        "librosa": librosa.__version__,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def save_results(path, corpus, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"corpus": corpus, "environment": environment(), "results": results},
+                  f, ensure_ascii=False, indent=2)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """返回 (报告行, 退化项)；比较总耗时与每个阶段耗时。"""
+    lines = [f"{'测试':<15} {'阶段':<10} {'基线(s)':>10} {'本次(s)':>10} {'变化':>8}"]
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        rows = [("total", base["wall"], current["wall"])]
+        rows += [(stage, base["stages"].get(stage), seconds) for stage, seconds in current["stages"].items()]
+        for stage, before, after in rows:
+            if not before:
+                continue
+            delta = (after - before) / before
+            mark = ""
+            if delta > threshold:
+                mark = "  变慢"
+                regressions.append((name, stage, delta))
+            elif delta < -threshold:
+                mark = "  变快"
+            lines.append(f"{name:<15} {stage:<10} {before:>10.3f} {after:>10.3f} {delta:>+7.1%}{mark}")
+    return lines, regressions
+
+
+def summary(results):
+    lines = [f"{'测试':<15} {'文件/秒':>9} {'音频秒/秒':>10}  阶段耗时"]
+    for name, r in results.items():
+        stages = ", ".join(f"{k} {v:.3f}s" for k, v in sorted(r["stages"].items(), key=lambda kv: -kv[1]))
+        lines.append(f"{name:<15} {r['files_per_s'] or 0:>9.2f} {r['audio_s_per_s'] or 0:>10.1f}  {stages}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wreaper 分析热点基准测试")
+    parser.add_argument("--corpus", choices=sorted(CORPORA), default="quick")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "wreaper_bench"),
+                        help="合成音频与输出图片目录（语料会被复用）")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help="逗号分隔的测试名：" + ",".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--save", help="保存结果为 JSON 基线")
+    parser.add_argument("--baseline", help="与已保存的基线比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--precision", action="store_true",
+                        help=f"只检查响度的正确性：{lufs.LOUDNESS_DTYPE} 与 float64 参考的偏差、真峰值、多声道权重")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测试：{', '.join(unknown)}")
+
+    print(f"准备语料 {args.corpus} ...")
+    fixtures = generate_corpus(os.path.join(args.work_dir, args.corpus), args.corpus)
+    if args.precision:
+        failures = check_precision(fixtures)
+        failures += check_true_peak(fixtures)
+        failures += check_channel_layouts(args.work_dir)
+        return 1 if failures else 0
+
+    out_dir = os.path.join(args.work_dir, "output")
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = run_benchmarks(fixtures, names, out_dir, args.repeat)
+    print()
+    print("\n".join(summary(results)))
+
+    if args.save:
+        save_results(args.save, args.corpus, results)
+        print(f"\n结果已保存到 {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != args.corpus:
+            print(f"\n注意：基线语料为 {baseline.get('corpus')}，本次为 {args.corpus}")
+        lines, regressions = compare(results, baseline["results"], args.threshold)
+        print()
+        print("\n".join(lines))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
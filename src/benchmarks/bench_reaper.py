@@ -0,0 +1,187 @@
+"""
+Reaper 导入/渲染流程的基准测试：在假 reapy 后端（benchmarks.fake_reapy）上运行 ReaperService，
+统计不同 Item 数量下的桥接调用次数、脚本内 API 调用次数与耗时。
+
+    import_items            open_audio_in_reaper
+    import_regions          open_audioRegion_in_reaper（每个音频一条轨道）
+    import_regions_packed   open_audioRegion_in_reaper（打包到 --tracks 条轨道）
+    render_items            get_selected_items -> plan_renders -> render_item_groups
+    render_regions          get_regions -> plan_renders -> render_region_groups
+渲染两项先在同一工程中完成导入（不计时），与“导入 -> 编辑 -> 覆盖渲染”的使用顺序一致。
+
+用法（在 src 目录下，需要 pip install lupa）：
+    python -m benchmarks.bench_reaper --items 1000,10000 --rpc-latency 0.005
+    python -m benchmarks.bench_reaper --check    # 区间长度取自文件头而不是 WAAPI duration
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+from benchmarks.fake_reapy import FakeReaper, installed
+
+
+def make_sources(work_dir, count, groups, seed=0):
+    """按组分布在各自目录下的 Wwise 源文件路径（无需真实存在，目录需可写）与时长。"""
+    rng = random.Random(seed)
+    dirs = [os.path.join(work_dir, "Originals", "SFX", f"group_{g:02d}") for g in range(groups)]
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    paths = [os.path.join(dirs[i % groups], f"sfx_{i:05d}.wav") for i in range(count)]
+    durations = {p: round(rng.uniform(0.2, 10.0), 3) for p in paths}
+    return paths, durations
+
+
+def bench_import_items(service, reaper, paths, durations, args):
+    return len(service.open_audio_in_reaper(paths))
+
+
+def bench_import_regions(service, reaper, paths, durations, args):
+    return len(service.open_audioRegion_in_reaper(paths, gap=1.0, known_durations=durations))
+
+
+def bench_import_regions_packed(service, reaper, paths, durations, args):
+    return len(service.open_audioRegion_in_reaper(paths, gap=1.0, tracks=args.tracks,
+                                                  known_durations=durations))
+
+
+def prepare_render_items(service, reaper, paths, durations, args):
+    service.open_audio_in_reaper(paths)
+    reaper.SelectAllMediaItems(0, True)
+
+
+def bench_render_items(service, reaper, paths, durations, args):
+    from backend.render_planner import plan_renders
+    items = service.get_selected_items()
+    wwise_map = {os.path.basename(p): p for p in paths}
+    # Take 名不含扩展名，与 WreaperRel.execute_rendering 中一致按文件名匹配
+    wwise_map.update({os.path.splitext(k)[0]: v for k, v in wwise_map.items()})
+    plan = plan_renders(items, wwise_map, 48000, 1)
+    service.render_item_groups(plan.groups)
+    return plan.total
+
+
+def prepare_render_regions(service, reaper, paths, durations, args):
+    service.open_audioRegion_in_reaper(paths, gap=1.0, tracks=args.tracks, known_durations=durations)
+
+
+def bench_render_regions(service, reaper, paths, durations, args):
+    from backend.render_planner import plan_renders
+    wwise_map = {os.path.splitext(os.path.basename(p))[0]: p for p in paths}
+    regions = service.get_regions()
+    plan = plan_renders([(number, name) for number, name, _, _ in regions], wwise_map, 48000, 1)
+    service.render_region_groups(plan.groups)
+    return plan.total
+
+
+# 名称 -> (准备步骤, 计时步骤)
+BENCHMARKS = {
+    "import_items": (None, bench_import_items),
+    "import_regions": (None, bench_import_regions),
+    "import_regions_packed": (None, bench_import_regions_packed),
+    "render_items": (prepare_render_items, bench_render_items),
+    "render_regions": (prepare_render_regions, bench_render_regions),
+}
+
+
+def check_region_durations(work_dir, log=print):
+    """
+    WAAPI duration 含 Sound 的裁剪/音高/循环设置，可能与源文件长度不同：
+    区间长度应取文件头时长，只有文件头不可读时才使用 WAAPI 的值。
+    返回失败描述列表。
+    """
+    import numpy as np
+    import soundfile
+    rate = 48000
+    os.makedirs(work_dir, exist_ok=True)
+    trimmed = os.path.join(work_dir, "trimmed.wav")
+    soundfile.write(trimmed, np.zeros(rate * 2, dtype=np.float32), rate)
+    missing = os.path.join(work_dir, "missing.wav")
+    if os.path.exists(missing):
+        os.remove(missing)
+    # 源文件 2 秒，Sound 经过音高/循环设置后 WAAPI 报告 3.5 秒；missing 没有文件头可读
+    known = {trimmed: {"min": 3.5, "max": 3.5, "type": "OneShot"}, missing: 1.25}
+    expected = {trimmed: 2.0, missing: 1.25}
+    failures = []
+    reaper = FakeReaper(durations={missing: 1.25})
+    with installed(reaper):
+        from backend.reaper_service import ReaperService
+        from backend.reascript_runner import ReaScriptRunner
+        service = ReaperService(ReaScriptRunner(os.path.join(work_dir, "reascript")))
+        regions = service.open_audioRegion_in_reaper([trimmed, missing], gap=1.0, known_durations=known)
+    for path, _, start, end in regions:
+        length = float(end) - float(start)
+        if abs(length - expected[path]) > 1e-6:
+            failures.append(f"{os.path.basename(path)}：区间长度应为 {expected[path]}，实际 {length}")
+    if len(regions) != len(expected):
+        failures.append(f"应创建 {len(expected)} 个区间，实际 {len(regions)}")
+    log("区间时长：" + ("通过" if not failures else "失败"))
+    for failure in failures:
+        log(f"  {failure}")
+    return failures
+
+
+def run(count, names, args, log=print):
+    work_dir = os.path.join(args.work_dir, str(count))
+    paths, durations = make_sources(work_dir, count, args.groups)
+    reaper = FakeReaper(
+        rpc_latency=args.rpc_latency,
+        api_latency=args.api_latency,
+        latencies={"InsertMedia": args.insert_latency},
+        render_latency=args.render_latency,
+        durations=durations,
+    )
+    results = {}
+    log(f"{count} 个音频，{args.groups} 个目录")
+    with installed(reaper):
+        from backend.reaper_service import ReaperService
+        from backend.reascript_runner import ReaScriptRunner
+        service = ReaperService(ReaScriptRunner(os.path.join(work_dir, "reascript")))
+        for name in names:
+            prepare, bench = BENCHMARKS[name]
+            reaper.reset_project()
+            if prepare:
+                prepare(service, reaper, paths, durations, args)
+            reaper.reset_stats()
+            start = time.perf_counter()
+            items = bench(service, reaper, paths, durations, args)
+            wall = time.perf_counter() - start
+            stats = reaper.stats()
+            results[name] = {"items": items, "wall": wall, **stats}
+            log(f"  {name:<22} 条目 {items:>6}  桥接 {stats['total_rpc']:>4}  API {stats['total_api']:>7}  "
+                f"渲染 {stats['renders']:>3} 次  {wall:8.2f}s  {items / wall if wall else 0:9.0f} 条/秒")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reaper 导入/渲染流程基准测试（假 reapy 后端）")
+    parser.add_argument("--items", default="1000,10000", help="逗号分隔的音频数量")
+    parser.add_argument("--groups", type=int, default=20, help="目标目录数（渲染分组数）")
+    parser.add_argument("--tracks", type=int, default=8, help="打包导入的轨道数")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="每次 reapy 桥接调用的延迟（秒）")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="脚本内每次 API 调用的延迟（秒）")
+    parser.add_argument("--insert-latency", type=float, default=0.0, help="每次 InsertMedia 的延迟（秒）")
+    parser.add_argument("--render-latency", type=float, default=0.0, help="渲染每个文件的耗时（秒）")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "wreaper_bench_reaper"))
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help="逗号分隔的测试名：" + ",".join(BENCHMARKS))
+    parser.add_argument("--check", action="store_true", help="只检查区间时长的来源（文件头优先于 WAAPI）")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check_region_durations(os.path.join(args.work_dir, "check")) else 0
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测试：{', '.join(unknown)}")
+
+    for count in args.items.split(","):
+        run(int(count), names, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+WAAPI 相关流程的基准测试：在子进程中启动模拟 WAAPI 服务（benchmarks.mock_waapi），
+统计不同工程规模与单次调用延迟下的调用次数与耗时。
+
+    get_audio_sources   AnalyseLUFS_Game_Wwise.get_audio_sources（选中整个 Default Work Unit）
+    selected_files      WwiseService.get_selected_audio_files
+    double_click        与 LoudnessSearchUI.on_double_click 相同的调用序列（报告窗口依赖 Qt，不直接导入）
+
+用法（在 src 目录下）：
+    python -m benchmarks.bench_waapi --objects 1000,10000,100000 --latency 0.001
+"""
+import sys
+import time
+import asyncio
+import argparse
+import threading
+
+from waapi import WaapiClient
+
+from benchmarks.mock_waapi import MockWaapiProcess, CONTROL_PREFIX
+from AudioAnalyse import AnalyseLUFS_Game_Wwise as lufs
+from backend.wwise_service import WwiseService
+
+
+def control(url, name, **kwargs):
+    """调用模拟服务的 mock.* 控制接口（不计入统计）。"""
+    with WaapiClient(url=url) as client:
+        return client.call(CONTROL_PREFIX + name, kwargs)
+
+
+def bench_get_audio_sources(mock):
+    return len(lufs.get_audio_sources(url=mock.url))
+
+
+def bench_selected_files(mock):
+    control(mock.url, "select", type="AudioFileSource")
+    try:
+        return len(WwiseService(mock.host, mock.port).get_selected_audio_files())
+    finally:
+        control(mock.url, "select")
+
+
+def bench_double_click(mock, clicks=100):
+    paths = control(mock.url, "paths", type="Sound", limit=clicks)["paths"]
+    for wwise_path in paths:
+        # 每次双击新建连接，与报告窗口一致
+        with WaapiClient(url=mock.url) as client:
+            result = client.call("ak.wwise.core.object.get", {
+                "from": {"path": [wwise_path]},
+                "options": {"return": ["id", "parent"]}
+            })
+            info = result["return"][0]
+            client.call("ak.wwise.ui.commands.execute", {
+                "command": "FindInProjectExplorerSelectionChannel1",
+                "objects": [info["id"]]
+            })
+            client.call("ak.wwise.ui.commands.execute", {
+                "command": "OpenInNewTab",
+                "objects": [info["parent"]["id"]]
+            })
+    return len(paths)
+
+
+BENCHMARKS = {
+    "get_audio_sources": bench_get_audio_sources,
+    "selected_files": bench_selected_files,
+    "double_click": bench_double_click,
+}
+
+
+def _in_thread(func, *args, **kwargs):
+    """与程序中一样在工作线程里调用（各自的事件循环）；WwiseService 退出时会关闭它创建的循环。"""
+    result = {}
+
+    def target():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        try:
+            result["value"] = func(*args, **kwargs)
+        except Exception as e:
+            result["error"] = e
+
+    worker = threading.Thread(target=target)
+    worker.start()
+    worker.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def run(objects, depth, latency, names, log=print):
+    start = time.perf_counter()
+    results = {}
+    with MockWaapiProcess(latency=latency, objects=objects, depth=depth) as mock:
+        info = _in_thread(control, mock.url, "project")
+        log(f"工程 {info['objects']} 个对象 / {info['sources']} 个音频源"
+            f"（启动 {time.perf_counter() - start:.2f}s），延迟 {latency * 1000:.1f}ms")
+        for name in names:
+            _in_thread(control, mock.url, "resetStats")
+            start = time.perf_counter()
+            items = _in_thread(BENCHMARKS[name], mock)
+            wall = time.perf_counter() - start
+            stats = _in_thread(control, mock.url, "stats")
+            results[name] = {"items": items, "wall": wall, **stats}
+            per_call = wall / stats["total_calls"] * 1000 if stats["total_calls"] else 0
+            log(f"  {name:<18} 条目 {items:>7}  调用 {stats['total_calls']:>7}  "
+                f"{wall:8.2f}s  每次调用 {per_call:.2f}ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WAAPI 流程基准测试（模拟服务）")
+    parser.add_argument("--objects", default="1000,10000", help="逗号分隔的工程规模")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.0, help="每次调用的延迟（秒）")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help="逗号分隔的测试名：" + ",".join(BENCHMARKS))
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测试：{', '.join(unknown)}")
+
+    for size in args.objects.split(","):
+        run(int(size), args.depth, args.latency, names)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
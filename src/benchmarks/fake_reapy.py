@@ -0,0 +1,450 @@
+"""
+进程内的假 reapy / ReaScript 后端，用于在没有 Reaper 的情况下测量导入与渲染流程。
+
+FakeReaper 维护一个简化的工程模型（轨道、Item、区间、渲染矩阵、渲染设置），实现
+ReaperService 的脚本中用到的 ReaScript API 子集。Python 侧经 reapy 桥接的调用（rpc）
+与脚本内的 API 调用（api）分别计数，并可分别注入延迟；渲染命令 41824 只记录渲染任务，
+按文件数模拟耗时。
+
+ReaScriptRunner 注册的 Lua 脚本通过 lupa 原样执行（pip install lupa），
+reaper.* 调用转发给 FakeReaper，因此测量的是实际发送给 Reaper 的脚本。
+
+    reaper = FakeReaper(rpc_latency=0.005)
+    with installed(reaper):
+        from backend.reaper_service import ReaperService
+        ReaperService().open_audio_in_reaper(paths)
+    print(reaper.stats())
+"""
+import os
+import sys
+import time
+import types
+import bisect
+import itertools
+from collections import Counter
+from contextlib import contextmanager
+
+from backend.audio_probe import probe_duration
+
+RENDER_COMMAND = 41824          # File: Render project, using the most recent render settings
+RENDER_SOURCE_REGION_MATRIX = 8
+RENDER_SOURCE_SELECTED_ITEMS = 32
+DEFAULT_ITEM_LENGTH = 1.0
+
+
+class Track:
+    __slots__ = ("index", "name")
+
+    def __init__(self, index, name=""):
+        self.index = index
+        self.name = name
+
+
+class Take:
+    __slots__ = ("item", "name", "path")
+
+    def __init__(self, item, path):
+        self.item = item
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+
+
+class Item:
+    __slots__ = ("index", "guid", "track", "position", "length", "take")
+
+    def __init__(self, index, guid, track, position, length, path):
+        self.index = index
+        self.guid = guid
+        self.track = track
+        self.position = position
+        self.length = length
+        self.take = Take(self, path)
+
+
+class Marker:
+    __slots__ = ("isrgn", "pos", "end", "name", "number", "color")
+
+    def __init__(self, isrgn, pos, end, name, number, color):
+        self.isrgn = isrgn
+        self.pos = pos
+        self.end = end
+        self.name = name
+        self.number = number
+        self.color = color
+
+
+class FakeReaper:
+    """
+    rpc_latency：每次 reapy 桥接调用的延迟（秒）；
+    api_latency：脚本内每次 API 调用的延迟，latencies 可按函数名单独指定（如 {"InsertMedia": 0.001}）；
+    render_latency：渲染每个输出文件的耗时；
+    durations：{路径: 时长}，InsertMedia 的 Item 长度，缺省时读取文件头，再缺省为 1 秒。
+    """
+
+    def __init__(self, rpc_latency=0.0, api_latency=0.0, latencies=None, render_latency=0.0, durations=None):
+        self.rpc_latency = rpc_latency
+        self.api_latency = api_latency
+        self.latencies = dict(latencies or {})
+        self.render_latency = render_latency
+        self.durations = dict(durations or {})
+        self.rpc_calls = Counter()
+        self.api_calls = Counter()
+        self.reset_project()
+
+    def reset_project(self):
+        self.master = Track(-1, "MASTER")
+        self.tracks = []
+        self.selected_track = None
+        self.items = []             # 按插入顺序
+        self._ordered = None        # 按工程顺序（轨道、位置）排列的 Item，与 Reaper 的 GetMediaItem 编号一致
+        self._selection = set()
+        self._selected_list = None  # 按工程顺序排列的选中 Item，选择变化时失效
+        self.markers = []           # 按位置排序
+        self._marker_keys = []
+        self._next_number = {True: 1, False: 1}
+        self.render_matrix = {}     # 区间编号 -> [Track]
+        self.project_info = {}
+        self.config_vars = {}
+        self.cursor = 0.0
+        self.renders = []
+        self.commands = Counter()
+        self.undo_blocks = 0
+        self._scripts = {}          # 命令 ID -> 脚本路径
+        self._command_ids = itertools.count(50000)
+        self._guids = itertools.count(1)
+
+    def reset_stats(self):
+        self.rpc_calls.clear()
+        self.api_calls.clear()
+        self.renders = []
+
+    def stats(self):
+        return {
+            "rpc_calls": dict(self.rpc_calls),
+            "total_rpc": sum(self.rpc_calls.values()),
+            "api_calls": dict(self.api_calls),
+            "total_api": sum(self.api_calls.values()),
+            "renders": len(self.renders),
+            "rendered_files": sum(len(r["files"]) for r in self.renders),
+        }
+
+    def _delay(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    # ---- 调用入口 ----
+    def rpc(self, name):
+        """经 reapy 桥接调用的函数（reascript_api.<name>）。"""
+        func = getattr(self, name, None)
+        if func is None or name.startswith("_"):
+            raise AttributeError(f"FakeReaper 未实现 {name}")
+
+        def call(*args):
+            self.rpc_calls[name] += 1
+            self._delay(self.rpc_latency)
+            return func(*args)
+        return call
+
+    def api(self, name):
+        """脚本内 reaper.<name>。"""
+        func = getattr(self, name)
+        latency = self.latencies.get(name, self.api_latency)
+
+        def call(*args):
+            self.api_calls[name] += 1
+            self._delay(latency)
+            return func(*args)
+        return call
+
+    def run_script(self, path):
+        try:
+            from lupa import LuaRuntime
+        except ImportError as e:
+            raise RuntimeError("执行 ReaScript 需要 lupa（pip install lupa）") from e
+        lua = LuaRuntime(unpack_returned_tuples=True)
+        table = lua.table()
+        for name in API_FUNCTIONS:
+            table[name] = self.api(name)
+        lua.globals().reaper = table
+        with open(path, "r", encoding="utf-8") as f:
+            lua.execute(f.read())
+
+    # ---- 通用 ----
+    def GetAppVersion(self):
+        return "7.0/fake"
+
+    def ShowConsoleMsg(self, msg):
+        pass
+
+    def AddRemoveReaScript(self, add, section_id, script_path, commit):
+        if add:
+            command_id = next(self._command_ids)
+            self._scripts[command_id] = script_path
+            return command_id
+        for command_id, path in list(self._scripts.items()):
+            if path == script_path:
+                del self._scripts[command_id]
+        return 0
+
+    def Main_OnCommand(self, command, flag):
+        self.commands[command] += 1
+        if command in self._scripts:
+            self.run_script(self._scripts[command])
+        elif command == RENDER_COMMAND:
+            self._render()
+
+    def Undo_BeginBlock(self):
+        pass
+
+    def Undo_EndBlock(self, desc, flags):
+        self.undo_blocks += 1
+
+    def PreventUIRefresh(self, count):
+        pass
+
+    def UpdateArrange(self):
+        pass
+
+    def SNM_GetIntConfigVar(self, name, default):
+        return int(self.config_vars.get(name, default))
+
+    def SNM_SetIntConfigVar(self, name, value):
+        self.config_vars[name] = int(value)
+        return True
+
+    def SNM_GetDoubleConfigVar(self, name, default):
+        return float(self.config_vars.get(name, default))
+
+    def SNM_SetDoubleConfigVar(self, name, value):
+        self.config_vars[name] = float(value)
+        return True
+
+    # ---- 光标与轨道 ----
+    def GetCursorPosition(self):
+        return self.cursor
+
+    def SetEditCurPos(self, time_pos, move_view, seek_play):
+        self.cursor = float(time_pos)
+
+    def CountTracks(self, proj):
+        return len(self.tracks)
+
+    def GetTrack(self, proj, index):
+        return self.tracks[index] if 0 <= index < len(self.tracks) else None
+
+    def GetMasterTrack(self, proj):
+        return self.master
+
+    def InsertTrackAtIndex(self, index, want_defaults):
+        self.tracks.insert(index, Track(index))
+        for i, track in enumerate(self.tracks[index:], index):
+            track.index = i
+        self._ordered = None
+        self._selected_list = None
+
+    def SetOnlyTrackSelected(self, track):
+        self.selected_track = track
+
+    # ---- Item ----
+    def _length(self, path):
+        length = self.durations.get(path)
+        if length is None:
+            length = probe_duration(path, DEFAULT_ITEM_LENGTH)
+        return float(length)
+
+    def InsertMedia(self, path, mode):
+        """mode 0：插入到选中轨道；mode 1：插入到新轨道。插入后只选中新 Item，光标移到其末尾。"""
+        if mode == 1 or not self.tracks:
+            self.InsertTrackAtIndex(len(self.tracks), True)
+            self.SetOnlyTrackSelected(self.tracks[-1])
+        track = self.selected_track or self.tracks[-1]
+        item = Item(len(self.items), "{%08X-0000-0000-0000-000000000000}" % next(self._guids),
+                    track, self.cursor, self._length(path), path)
+        self.items.append(item)
+        self._ordered = None
+        self._select({item})
+        self.cursor = item.position + item.length
+        return 1
+
+    def _select(self, items):
+        self._selection = set(items)
+        self._selected_list = None
+
+    def _selected(self):
+        if self._selected_list is None:
+            self._selected_list = sorted(self._selection, key=self._project_key)
+        return self._selected_list
+
+    @staticmethod
+    def _project_key(item):
+        return item.track.index, item.position, item.index
+
+    def _project_order(self):
+        if self._ordered is None:
+            self._ordered = sorted(self.items, key=self._project_key)
+        return self._ordered
+
+    def CountMediaItems(self, proj):
+        return len(self.items)
+
+    def GetMediaItem(self, proj, index):
+        items = self._project_order()
+        return items[index] if 0 <= index < len(items) else None
+
+    def CountSelectedMediaItems(self, proj):
+        return len(self._selection)
+
+    def GetSelectedMediaItem(self, proj, index):
+        selected = self._selected()
+        return selected[index] if 0 <= index < len(selected) else None
+
+    def GetMediaItemInfo_Value(self, item, param):
+        return {"D_POSITION": item.position, "D_LENGTH": item.length,
+                "B_UISEL": float(item in self._selection)}.get(param, 0.0)
+
+    def GetSetMediaItemInfo_String(self, item, param, value, set_new):
+        if param == "GUID":
+            return True, item.guid
+        return False, ""
+
+    def GetActiveTake(self, item):
+        return item.take
+
+    def GetTakeName(self, take):
+        return take.name
+
+    def IsMediaItemSelected(self, item):
+        return item in self._selection
+
+    def SetMediaItemSelected(self, item, selected):
+        if selected:
+            self._selection.add(item)
+        else:
+            self._selection.discard(item)
+        self._selected_list = None
+
+    def SelectAllMediaItems(self, proj, selected):
+        self._select(self.items if selected else ())
+
+    # ---- 标记与区间 ----
+    def AddProjectMarker2(self, proj, isrgn, pos, rgnend, name, wantidx, color):
+        isrgn = bool(isrgn)
+        if wantidx is None or wantidx < 0:
+            wantidx = self._next_number[isrgn]
+        self._next_number[isrgn] = max(self._next_number[isrgn], int(wantidx) + 1)
+        marker = Marker(isrgn, float(pos), float(rgnend), name, int(wantidx), color)
+        key = (marker.pos, len(self.markers))
+        i = bisect.bisect(self._marker_keys, key)
+        self._marker_keys.insert(i, key)
+        self.markers.insert(i, marker)
+        return marker.number
+
+    def CountProjectMarkers(self, proj):
+        regions = sum(1 for m in self.markers if m.isrgn)
+        return len(self.markers), len(self.markers) - regions, regions
+
+    def EnumProjectMarkers3(self, proj, index):
+        if not 0 <= index < len(self.markers):
+            return 0, False, 0.0, 0.0, "", 0, 0
+        m = self.markers[index]
+        return index + 1, m.isrgn, m.pos, m.end, m.name, m.number, m.color
+
+    def SetRegionRenderMatrix(self, proj, region_index, track, flag):
+        tracks = self.render_matrix.setdefault(region_index, [])
+        if flag > 0 and track not in tracks:
+            tracks.append(track)
+        elif flag < 0 and track in tracks:
+            tracks.remove(track)
+
+    def EnumRegionRenderMatrix(self, proj, region_index, index):
+        tracks = self.render_matrix.get(region_index, [])
+        return tracks[index] if 0 <= index < len(tracks) else None
+
+    # ---- 渲染 ----
+    def GetSetProjectInfo(self, proj, desc, value, is_set):
+        if is_set:
+            self.project_info[desc] = value
+        return self.project_info.get(desc, 0.0)
+
+    def GetSetProjectInfo_String(self, proj, desc, value, is_set):
+        if is_set:
+            self.project_info[desc] = value
+        return True, self.project_info.get(desc, "")
+
+    def _render(self):
+        source = int(self.project_info.get("RENDER_SETTINGS", 0))
+        if source & RENDER_SOURCE_SELECTED_ITEMS:
+            files = [item.take.name for item in self._selected()]
+        elif source & RENDER_SOURCE_REGION_MATRIX:
+            files = [m.name for m in self.markers
+                     if m.isrgn and self.render_matrix.get(m.number)]
+        else:
+            files = ["project"]
+        self.renders.append({
+            "dir": self.project_info.get("RENDER_FILE", ""),
+            "pattern": self.project_info.get("RENDER_PATTERN", ""),
+            "srate": self.project_info.get("RENDER_SRATE"),
+            "channels": self.project_info.get("RENDER_CHANNELS"),
+            "files": files,
+        })
+        self._delay(self.render_latency * len(files))
+
+
+API_FUNCTIONS = [
+    name for name, value in vars(FakeReaper).items()
+    if callable(value) and name[:1].isupper()
+]
+
+
+# ---- 替换 reapy ----
+_saved = None
+
+
+def install(reaper):
+    """
+    把 reapy 与 reapy.reascript_api 替换为转发到 reaper 的假模块，
+    并更新已导入的 backend 模块中引用的 rpp / reapy。
+    """
+    global _saved
+    api = types.ModuleType("reapy.reascript_api")
+    api.__getattr__ = reaper.rpc
+    package = types.ModuleType("reapy")
+    package.reascript_api = api
+    package.reconnect = lambda: None
+
+    if _saved is None:
+        _saved = {"modules": {name: sys.modules.get(name) for name in ("reapy", "reapy.reascript_api")},
+                  "attrs": []}
+    sys.modules["reapy"] = package
+    sys.modules["reapy.reascript_api"] = api
+    for name in ("backend.reascript_runner", "backend.reaper_service", "WreaperRel", "ForWwise.WwiseHelp"):
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        for attr, value in (("rpp", api), ("reapy", package)):
+            if hasattr(module, attr):
+                _saved["attrs"].append((module, attr, getattr(module, attr)))
+                setattr(module, attr, value)
+
+
+def uninstall():
+    global _saved
+    if _saved is None:
+        return
+    for module, attr, value in reversed(_saved["attrs"]):
+        setattr(module, attr, value)
+    for name, module in _saved["modules"].items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    _saved = None
+
+
+@contextmanager
+def installed(reaper):
+    install(reaper)
+    try:
+        yield reaper
+    finally:
+        uninstall()
@@ -0,0 +1,455 @@
+"""
+本地模拟 WAAPI 服务：WAMP (wamp.2.json) over WebSocket，提供合成的 Wwise 工程层级，
+用于在没有 Wwise 的情况下对 get_audio_sources 等 WAAPI 相关流程做基准测试。
+
+支持的调用（只实现代码中实际用到的形式）：
+    ak.wwise.ui.getSelectedObjects       options.return 可含 originalFilePath
+    ak.wwise.core.object.get             from: id/path，transform: ancestors/descendants/children/parent
+    ak.wwise.ui.commands.execute         只计数
+    ak.wwise.core.getInfo
+    mock.*                               控制调用：stats / resetStats / project / select / paths / publish
+每次调用可注入固定延迟（模拟 Wwise 的处理耗时），并按 URI 统计调用次数。
+
+单独运行（在 src 目录下），可直接让主程序连接：
+    python -m benchmarks.mock_waapi --objects 100000 --latency 0.002 --port 8080
+"""
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import socket
+import argparse
+import multiprocessing
+from collections import Counter
+
+import txaio
+from autobahn.asyncio.websocket import WebSocketServerProtocol, WebSocketServerFactory
+
+# WAMP 消息类型
+HELLO, WELCOME, ABORT, GOODBYE, ERROR = 1, 2, 3, 6, 8
+SUBSCRIBE, SUBSCRIBED, UNSUBSCRIBE, UNSUBSCRIBED, EVENT = 32, 33, 34, 35, 36
+CALL, RESULT = 48, 50
+
+ERR_INVALID_PROCEDURE = "ak.wwise.invalid_procedure"
+ERR_INVALID_ARGUMENTS = "ak.wwise.invalid_arguments"
+CONTROL_PREFIX = "mock."
+
+AM_ROOT = "\\Actor-Mixer Hierarchy"
+BUS_ROOT = "\\Master-Mixer Hierarchy"
+
+
+def _guid(rng):
+    return "{%08X-%04X-%04X-%04X-%012X}" % (
+        rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(16),
+        rng.getrandbits(16), rng.getrandbits(48))
+
+
+def _gain(rng, chance):
+    """大部分对象不改增益，少数取 -12..+6 dB 的 0.5 步进值。"""
+    if rng.random() >= chance:
+        return 0
+    return rng.randrange(-24, 13) / 2
+
+
+class SyntheticProject:
+    """
+    合成工程：
+    - 总线树：Master Audio Bus 下 bus_depth 层、每层 bus_fanout 个子总线；
+    - 对象树：Actor-Mixer Hierarchy\\Default Work Unit 下 depth 层 ActorMixer，
+      最底层每个容器 sounds_per_container 个 Sound，每个 Sound 一个 AudioFileSource。
+    对象总数按 objects 截断；分支数自动取能容纳 objects 的最小值。
+    只有第一层 ActorMixer 与少量 Sound 设置了 OutputBus，其余依赖继承回退。
+    """
+
+    def __init__(self, objects=10000, depth=6, bus_depth=4, bus_fanout=3,
+                 sounds_per_container=4, originals_dir="C:\\WwiseProject\\Originals", seed=0):
+        self.rng = random.Random(seed)
+        self.originals_dir = originals_dir
+        self.objects = {}
+        self.by_path = {}
+        self.leaf_buses = []
+        self.sources = 0
+
+        bus_wu = self._add_root(BUS_ROOT, "WorkUnit", "Default Work Unit")
+        master = self._add("Master Audio Bus", "Bus", bus_wu, {"@BusVolume": 0, "@Volume": 0})
+        self._build_buses(master, 1, bus_depth, bus_fanout)
+
+        am_wu = self._add_root(AM_ROOT, "WorkUnit", "Default Work Unit")
+        self.work_unit = am_wu["id"]
+        per_leaf = 1 + 2 * sounds_per_container
+        fanout = max(2, math.ceil((max(objects, 1) / per_leaf) ** (1.0 / max(depth, 1))))
+        self._budget = objects
+        self._build_mixers(am_wu, 1, depth, fanout, sounds_per_container)
+
+    def _add_root(self, root_path, kind, name):
+        root = self._add(root_path.lstrip("\\"), "Folder", None, {})
+        return self._add(name, kind, root, {})
+
+    def _add(self, name, kind, parent, props, bus=None):
+        obj = {
+            "id": _guid(self.rng),
+            "name": name,
+            "type": kind,
+            "path": (parent["path"] if parent else "") + "\\" + name,
+            "parent": parent["id"] if parent else None,
+            "children": [],
+            "props": props,
+            "bus": bus,
+        }
+        self.objects[obj["id"]] = obj
+        self.by_path[obj["path"]] = obj
+        if parent:
+            parent["children"].append(obj["id"])
+        return obj
+
+    def _build_buses(self, parent, level, depth, fanout):
+        if level > depth:
+            self.leaf_buses.append(parent["id"])
+            return
+        for i in range(fanout):
+            bus = self._add(f"{parent['name']}_{i}" if level > 1 else f"Bus_{i}", "Bus", parent,
+                            {"@BusVolume": _gain(self.rng, 0.5), "@Volume": _gain(self.rng, 0.3)})
+            self._build_buses(bus, level + 1, depth, fanout)
+
+    def _build_mixers(self, parent, level, depth, fanout, sounds):
+        for i in range(fanout):
+            if self._budget <= 0:
+                return
+            self._budget -= 1
+            bus = self.rng.choice(self.leaf_buses) if level == 1 else None
+            mixer = self._add(f"{parent['name'] if level > 1 else 'AM'}_{i}", "ActorMixer", parent,
+                              {"@Volume": _gain(self.rng, 0.3), "@MakeUpGain": _gain(self.rng, 0.2)},
+                              bus)
+            if level < depth:
+                self._build_mixers(mixer, level + 1, depth, fanout, sounds)
+            else:
+                self._add_sounds(mixer, sounds)
+
+    def _add_sounds(self, parent, count):
+        for i in range(count):
+            if self._budget < 2:
+                return
+            self._budget -= 2
+            name = f"{parent['name']}_S{i}"
+            bus = self.rng.choice(self.leaf_buses) if self.rng.random() < 0.1 else None
+            sound = self._add(name, "Sound", parent,
+                              {"@Volume": _gain(self.rng, 0.5), "@MakeUpGain": _gain(self.rng, 0.1)}, bus)
+            source = self._add(name, "AudioFileSource", sound, {})
+            source["wav"] = f"{self.originals_dir}\\SFX\\{name}.wav"
+            source["duration"] = round(self.rng.uniform(0.2, 30.0), 3)
+            self.sources += 1
+
+    # ---- 查询 ----
+    def ancestors(self, obj):
+        """从最近父级到根。"""
+        result = []
+        parent = obj["parent"]
+        while parent:
+            node = self.objects[parent]
+            result.append(node)
+            parent = node["parent"]
+        return result
+
+    def descendants(self, obj):
+        """先序深度优先。"""
+        result = []
+        stack = list(reversed(obj["children"]))
+        while stack:
+            node = self.objects[stack.pop()]
+            result.append(node)
+            stack.extend(reversed(node["children"]))
+        return result
+
+    def field(self, obj, name):
+        if name in ("id", "name", "type", "path"):
+            return obj[name]
+        if name == "parent":
+            parent = self.objects.get(obj["parent"])
+            return {"id": parent["id"], "name": parent["name"]} if parent else None
+        if name in ("originalWavFilePath", "originalFilePath"):
+            return obj.get("wav")
+        if name == "duration":
+            return obj.get("duration")
+        if name == "OutputBus":
+            bus = self.objects.get(obj["bus"]) if obj["bus"] else None
+            return {"id": bus["id"], "name": bus["name"]} if bus else None
+        if name.startswith("@"):
+            return obj["props"].get(name)
+        return None
+
+    def describe(self, obj, fields):
+        out = {}
+        for name in fields:
+            value = self.field(obj, name)
+            if value is not None:
+                out[name] = value
+        return out
+
+
+class MockWaapiServer:
+    """
+    在当前线程的事件循环中提供服务（serve_forever 阻塞）。
+    autobahn/txaio 使用进程级的全局事件循环，与 WaapiClient 同进程会互相干扰，
+    因此基准测试通过 MockWaapiProcess 在独立进程中运行，统计与选择通过 mock.* 调用控制。
+    """
+
+    def __init__(self, project, host="127.0.0.1", port=8080, latency=0.0, jitter=0.0, selection=None):
+        self.project = project
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.selection = list(selection) if selection else [project.work_unit]
+        self.calls = Counter()
+        self.commands = Counter()
+        self.bytes_sent = 0
+        self._subscriptions = {}     # sub_id -> (protocol, topic)
+        self._ids = iter(range(1, 1 << 53))
+        self._loop = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/waapi"
+
+    def reset_stats(self):
+        self.calls.clear()
+        self.commands.clear()
+        self.bytes_sent = 0
+
+    def stats(self):
+        return {"calls": dict(self.calls), "total_calls": sum(self.calls.values()),
+                "commands": dict(self.commands), "bytes_sent": self.bytes_sent}
+
+    def serve_forever(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        txaio.config.loop = loop
+        self._loop = loop
+        server = self
+
+        class Protocol(WebSocketServerProtocol):
+            def onConnect(self, request):
+                return "wamp.2.json" if "wamp.2.json" in request.protocols else None
+
+            def onMessage(self, payload, isBinary):
+                asyncio.ensure_future(server._handle(self, json.loads(payload.decode("utf-8"))))
+
+            def onClose(self, wasClean, code, reason):
+                server._drop_subscriptions(self)
+
+        factory = WebSocketServerFactory(protocols=["wamp.2.json"], loop=loop)
+        factory.protocol = Protocol
+        listener = loop.run_until_complete(loop.create_server(factory, self.host, self.port))
+        try:
+            loop.run_forever()
+        finally:
+            listener.close()
+            loop.run_until_complete(listener.wait_closed())
+            loop.close()
+
+    # ---- WAMP ----
+    def _send(self, proto, message):
+        data = json.dumps(message).encode("utf-8")
+        self.bytes_sent += len(data)
+        proto.sendMessage(data)
+
+    async def _handle(self, proto, msg):
+        kind = msg[0]
+        if kind == HELLO:
+            self._send(proto, [WELCOME, next(self._ids), {"roles": {"broker": {}, "dealer": {}}}])
+        elif kind == GOODBYE:
+            self._send(proto, [GOODBYE, {}, "wamp.close.goodbye_and_out"])
+        elif kind == CALL:
+            request, options, procedure = msg[1], msg[2], msg[3]
+            kwargs = msg[5] if len(msg) > 5 else {}
+            control = procedure.startswith(CONTROL_PREFIX)
+            if not control:
+                self.calls[procedure] += 1
+                if self.latency or self.jitter:
+                    await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+            try:
+                result = self.dispatch(procedure, kwargs, options or {})
+            except LookupError as e:
+                self._send(proto, [ERROR, CALL, request, {}, e.args[0], [], {"message": e.args[1]}])
+            else:
+                self._send(proto, [RESULT, request, {}, [], result])
+        elif kind == SUBSCRIBE:
+            sub_id = next(self._ids)
+            self._subscriptions[sub_id] = (proto, msg[3])
+            self._send(proto, [SUBSCRIBED, msg[1], sub_id])
+        elif kind == UNSUBSCRIBE:
+            self._subscriptions.pop(msg[2], None)
+            self._send(proto, [UNSUBSCRIBED, msg[1]])
+
+    def _drop_subscriptions(self, proto):
+        for sub_id in [k for k, (p, _) in self._subscriptions.items() if p is proto]:
+            del self._subscriptions[sub_id]
+
+    def publish(self, topic, **kwargs):
+        """向订阅了 topic 的客户端推送事件。"""
+        for sub_id, (proto, sub_topic) in list(self._subscriptions.items()):
+            if sub_topic == topic:
+                self._send(proto, [EVENT, sub_id, next(self._ids), {}, [], kwargs])
+
+    # ---- WAAPI ----
+    def dispatch(self, procedure, kwargs, options):
+        if procedure == "ak.wwise.core.object.get":
+            return self._object_get(kwargs, options)
+        if procedure == "ak.wwise.ui.getSelectedObjects":
+            fields = options.get("return", ["id", "name", "type", "path"])
+            objs = [self.project.objects[i] for i in self.selection if i in self.project.objects]
+            return {"objects": [self.project.describe(o, fields) for o in objs]}
+        if procedure == "ak.wwise.ui.commands.execute":
+            self.commands[kwargs.get("command")] += 1
+            return {}
+        if procedure == "ak.wwise.core.getInfo":
+            return {"displayName": "Wwise (mock)", "version": {"displayName": "v2023.1.0", "year": 2023}}
+        if procedure.startswith(CONTROL_PREFIX):
+            return self._control(procedure[len(CONTROL_PREFIX):], kwargs)
+        raise LookupError(ERR_INVALID_PROCEDURE, f"未实现的调用：{procedure}")
+
+    def _object_get(self, kwargs, options):
+        source = kwargs.get("from") or {}
+        project = self.project
+        if "id" in source:
+            objs = [project.objects[i] for i in source["id"] if i in project.objects]
+        elif "path" in source:
+            objs = [project.by_path[p] for p in source["path"] if p in project.by_path]
+        else:
+            raise LookupError(ERR_INVALID_ARGUMENTS, "from 只支持 id / path")
+
+        for step in kwargs.get("transform", []):
+            for select in step.get("select", []):
+                if select == "ancestors":
+                    objs = [a for o in objs for a in project.ancestors(o)]
+                elif select == "descendants":
+                    objs = [d for o in objs for d in project.descendants(o)]
+                elif select == "children":
+                    objs = [project.objects[c] for o in objs for c in o["children"]]
+                elif select == "parent":
+                    objs = [project.objects[o["parent"]] for o in objs if o["parent"]]
+                else:
+                    raise LookupError(ERR_INVALID_ARGUMENTS, f"不支持的 select：{select}")
+
+        fields = options.get("return", ["id", "name"])
+        return {"return": [project.describe(o, fields) for o in objs]}
+
+    def _control(self, name, kwargs):
+        """mock.* 控制调用，不计入统计、不加延迟。"""
+        if name == "stats":
+            return self.stats()
+        if name == "resetStats":
+            self.reset_stats()
+            return {}
+        if name == "project":
+            return {"objects": len(self.project.objects), "sources": self.project.sources,
+                    "workUnit": self.project.work_unit}
+        if name == "select":
+            # {"type": "AudioFileSource", "limit": N} 或 {"id": [...]}；无参数时恢复为整个 Work Unit
+            if "id" in kwargs:
+                self.selection = list(kwargs["id"])
+            elif "type" in kwargs:
+                ids = [o["id"] for o in self.project.objects.values() if o["type"] == kwargs["type"]]
+                self.selection = ids[:kwargs.get("limit") or None]
+            else:
+                self.selection = [self.project.work_unit]
+            return {"count": len(self.selection)}
+        if name == "paths":
+            objs = [o for o in self.project.objects.values() if o["type"] == kwargs.get("type")]
+            return {"paths": [o["path"] for o in objs[:kwargs.get("limit") or None]]}
+        if name == "publish":
+            self.publish(kwargs["topic"], **kwargs.get("kwargs", {}))
+            return {}
+        raise LookupError(ERR_INVALID_PROCEDURE, f"未实现的控制调用：{name}")
+
+
+def _serve_process(project_kwargs, host, port, latency, jitter):
+    project = SyntheticProject(**project_kwargs)
+    MockWaapiServer(project, host, port, latency, jitter).serve_forever()
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class MockWaapiProcess:
+    """在子进程中运行 MockWaapiServer；port=None 时自动选择空闲端口。"""
+
+    def __init__(self, host="127.0.0.1", port=None, latency=0.0, jitter=0.0, timeout=120, **project_kwargs):
+        self.host = host
+        self.port = port or _free_port(host)
+        self.latency = latency
+        self.jitter = jitter
+        self.timeout = timeout
+        self.project_kwargs = project_kwargs
+        self._process = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/waapi"
+
+    def start(self):
+        # spawn：不继承父进程里 txaio 的全局事件循环
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve_process,
+            args=(self.project_kwargs, self.host, self.port, self.latency, self.jitter),
+            daemon=True,
+        )
+        self._process.start()
+        # 等待合成工程生成完毕、端口开始监听
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if not self._process.is_alive():
+                raise RuntimeError("模拟 WAAPI 服务启动失败")
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                if s.connect_ex((self.host, self.port)) == 0:
+                    return self
+            time.sleep(0.05)
+        self.stop()
+        raise TimeoutError("模拟 WAAPI 服务启动超时")
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="模拟 WAAPI 服务（合成工程）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--objects", type=int, default=10000, help="Actor-Mixer 层级对象总数")
+    parser.add_argument("--depth", type=int, default=6, help="ActorMixer 嵌套层数")
+    parser.add_argument("--bus-depth", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="每次调用的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    project = SyntheticProject(args.objects, args.depth, args.bus_depth, seed=args.seed)
+    print(f"合成工程：{len(project.objects)} 个对象，{project.sources} 个音频源，"
+          f"{time.perf_counter() - start:.2f}s")
+    server = MockWaapiServer(project, args.host, args.port, args.latency, args.jitter)
+    print(f"监听 {server.url}，Ctrl+C 退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,11 @@
 APP_VERSION = "1.4.2"
 CONFIG_FILE = "reaperconfig.txt"
+LOUDNESS_CACHE_FILE = "loudness_cache.json"  # 实时响度索引的文件响度缓存
+WWU_INDEX_CACHE_FILE = "wwu_index_cache.json"  # 离线 Wwise 工程解析缓存（按工作单元）
+LOG_DIR = "logs"  # 耗时追踪等诊断输出目录
+ANALYSIS_WORKERS = 8  # 响度分析进程数
+ANALYSIS_MEMORY_FRACTION = 0.5  # 响度分析执行中任务的预计内存上限（占可用内存的比例）
+NEAR_DUPLICATE_DETECTION = False  # 响度分析时计算频谱峰值指纹并报告近似重复（每个文件的分析耗时多约 35%）
 
 
 # 更新相关
@@ -0,0 +1,165 @@
+import queue
+import asyncio
+import psutil
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5.QtCore import QThread, pyqtSignal
+from waapi import WaapiClient, CannotConnectToWaapiException
+from AudioAnalyse import AnalyseLUFS_Game_Wwise as lufs_game_wwise
+from backend.audio_probe import probe
+from backend.loudness_index import WATCHED_PROPERTIES, analyse_file
+from backend.scheduler import Job, MemoryBudgetScheduler
+from utils.config import ANALYSIS_WORKERS, ANALYSIS_MEMORY_FRACTION
+from utils import trace
+
+
+class LiveLoudnessThread(QThread):
+    """
+    后台订阅 WAAPI 变化并维护 LoudnessIndex，只把受影响的行发给报告界面：
+      - 音量类属性变化：只重算引用该对象的行，不重新解码
+      - 子对象增删 / Output Bus 变化：只重新查询相关音频源
+      - 音频重新导入：只重新分析文件已变化的音频
+    """
+    rows_updated = pyqtSignal(list, list)   # 更新/新增的行, 已移除的 wwise_path
+    status = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self._events = queue.Queue()
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def _on_event(self, kind):
+        def handler(*args, **kwargs):
+            self._events.put((kind, kwargs))
+        return handler
+
+    def _emit_sources(self, source_ids, removed_paths=()):
+        rows = self.index.rows(source_ids)
+        if rows or removed_paths:
+            self.rows_updated.emit(rows, list(removed_paths))
+
+    def _analyse_stale(self):
+        stale = self.index.stale_paths()
+        if stale:
+            self._analyse_paths(stale)
+            self.index.cache.save()
+        self.status.emit("实时更新中")
+
+    def _analyse_paths(self, paths):
+        # 与已缓存文件内容相同的直接复用，其余交给进程池并发解码
+        pending, errors = self.index.reuse_cached(paths)
+        reused = [p for p in paths if p not in pending and p not in errors]
+        if reused:
+            self._emit_sources(self.index.sources_for_paths(reused))
+        for path, error in errors.items():
+            self.status.emit(f"分析失败: {path}: {error}")
+        if not pending:
+            return
+
+        jobs = []
+        for path in pending:
+            info = probe(path)
+            cost = lufs_game_wwise.estimate_memory(info.frames, info.channels, info.samplerate) if info else 0
+            jobs.append(Job(path, cost, (path,)))
+        total = len(jobs)
+        workers = min(ANALYSIS_WORKERS, total)
+        budget = int(psutil.virtual_memory().available * ANALYSIS_MEMORY_FRACTION)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scheduler = MemoryBudgetScheduler(executor, workers, budget, submit=trace.submit)
+            scheduled = scheduler.run(analyse_file, jobs)
+            for finished, (job, future) in enumerate(scheduled, 1):
+                if self._stopped:
+                    scheduled.close()
+                    return
+                stats, error = trace.result(future)
+                error = self.index.store(job.key, stats, error, pending[job.key])
+                if error:
+                    self.status.emit(f"分析失败: {job.key}: {error}")
+                else:
+                    self.status.emit(f"分析({finished}/{total}): {job.key}")
+                    self._emit_sources(self.index.sources_for_paths([job.key]))
+
+    def _refetch_under(self, client, obj_ids):
+        """重新查询 obj_ids 及其后代中的音频源，替换索引中的旧条目。"""
+        old_paths = self.index.sources_under(obj_ids)
+        fresh = []
+        for obj in lufs_game_wwise.find_audio_sources(client, list(obj_ids)):
+            fresh.extend(lufs_game_wwise.fetch_source_info(client, obj["id"]))
+        fresh_ids = {a["id"] for a in fresh}
+        removed = set(old_paths) - fresh_ids
+        removed_paths = [old_paths[sid] for sid in removed]
+        affected = self.index.replace_sources(fresh, removed_ids=removed)
+        self._emit_sources(affected - removed, removed_paths)
+
+    def _in_scope(self, obj_id) -> bool:
+        return obj_id in self.index.root_ids or self.index.contains_object(obj_id)
+
+    def _handle(self, client, kind, kwargs):
+        obj = kwargs.get("object") or {}
+        if kind == "property":
+            affected = self.index.set_property(obj.get("id"), kwargs.get("property"), kwargs.get("new"))
+            self._emit_sources(affected)
+        elif kind == "reference":
+            if self._in_scope(obj.get("id")):
+                self._refetch_under(client, {obj.get("id")})
+        elif kind == "child":
+            parent = (kwargs.get("parent") or {}).get("id")
+            child = (kwargs.get("child") or {}).get("id")
+            if parent and self._in_scope(parent):
+                self._refetch_under(client, {parent} | ({child} if child else set()))
+        elif kind == "imported":
+            self._analyse_stale()
+
+    def run(self):
+        try:
+            try:
+                asyncio.set_event_loop(asyncio.new_event_loop())
+            except Exception:
+                pass
+            with WaapiClient() as client:
+                # 1) 初次建立索引：当前选中对象下的全部音频源
+                if not self.index.sources:
+                    self.status.emit("正在获取Wwise音频对象...")
+                    result = client.call("ak.wwise.ui.getSelectedObjects")
+                    self.index.root_ids = [o['id'] for o in (result or {}).get('objects', [])]
+                    audio_files = []
+                    for obj in lufs_game_wwise.find_audio_sources(client, self.index.root_ids):
+                        audio_files.extend(lufs_game_wwise.fetch_source_info(client, obj["id"]))
+                    self.index.load(audio_files)
+                self._emit_sources(list(self.index.sources))
+
+                # 2) 订阅变化
+                for prop in WATCHED_PROPERTIES:
+                    client.subscribe("ak.wwise.core.object.propertyChanged", self._on_event("property"),
+                                     {"property": prop, "return": ["id"]})
+                client.subscribe("ak.wwise.core.object.referenceChanged", self._on_event("reference"),
+                                 {"return": ["id"]})
+                client.subscribe("ak.wwise.core.object.childAdded", self._on_event("child"),
+                                 {"return": ["id"]})
+                client.subscribe("ak.wwise.core.object.childRemoved", self._on_event("child"),
+                                 {"return": ["id"]})
+                client.subscribe("ak.wwise.core.audio.imported", self._on_event("imported"))
+
+                # 3) 补齐缺失或已变化文件的响度
+                self._analyse_stale()
+
+                # 4) 处理变化事件
+                while not self._stopped:
+                    try:
+                        kind, kwargs = self._events.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    try:
+                        self._handle(client, kind, kwargs)
+                    except Exception as e:
+                        self.status.emit(f"处理变化失败: {e}")
+        except CannotConnectToWaapiException:
+            self.failed.emit("无法连接到Wwise，请确保Wwise已启动并启用WAAPI。")
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.index.cache.save()
@@ -0,0 +1,188 @@
+"""
+“分析下一个操作”：菜单中预先开启后，下一次触发的菜单项/按钮连同它启动的后台线程、
+进程池任务一起用 cProfile 采样，结束后合并写入 LOG_DIR/profile_<操作>_<时间>.prof
+（pstats 格式，可用 snakeviz / python -m pstats 打开）和同名 .txt 热点表。
+
+    action(name)   包住菜单项的处理函数（主线程）
+    worker         装饰 QThread.run
+    进程池任务     经 trace.submit / trace.result 提交与取回，统计随结果返回
+
+后台线程、进程池任务全部结束并空闲 IDLE_GRACE 秒后会话结束，
+中间由信号串起来的下一步（如取到音频列表后再开始分析）仍算在同一次操作内。
+"""
+import os
+import time
+import pstats
+import cProfile
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+from utils.config import LOG_DIR
+
+IDLE_GRACE = 1.0        # 秒
+POLL_INTERVAL = 200     # 毫秒
+
+_armed = None           # 已开启时为结束回调（可为 lambda path: None）
+_session = None
+_lock = threading.Lock()
+
+
+def arm(on_finished=None):
+    """开启：下一次 action() 开始分析；on_finished(path) 在会话结束时于主线程调用。"""
+    global _armed
+    _armed = on_finished or (lambda path: None)
+
+
+def disarm():
+    global _armed
+    _armed = None
+
+
+def armed() -> bool:
+    return _armed is not None
+
+
+def active() -> bool:
+    return _session is not None
+
+
+class _StatsHolder:
+    """pstats.Stats 可接受带 create_stats() / stats 的对象；用于合并子进程传回的统计。"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class _Session:
+    def __init__(self, name, on_finished):
+        self.name = name
+        self.on_finished = on_finished
+        self.main = cProfile.Profile()
+        self.profiles = []          # 已结束的线程分析与子进程统计
+        self.running = 0            # 运行中的后台线程数
+        self.idle_since = None
+        self.timer = None
+
+    def enter(self):
+        with _lock:
+            self.running += 1
+            self.idle_since = None
+
+    def leave(self, profile):
+        with _lock:
+            self.running -= 1
+            if profile is not None:
+                self.profiles.append(profile)
+
+    def add(self, stats):
+        with _lock:
+            self.profiles.append(_StatsHolder(stats))
+
+    def watch(self):
+        """处理函数返回后在主线程轮询，等后台工作结束。"""
+        from PyQt5.QtCore import QTimer
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._poll)
+        self.timer.start(POLL_INTERVAL)
+
+    def _poll(self):
+        with _lock:
+            if self.running:
+                self.idle_since = None
+                return
+            now = time.perf_counter()
+            if self.idle_since is None:
+                self.idle_since = now
+            if now - self.idle_since < IDLE_GRACE:
+                return
+        self.timer.stop()
+        self.finish()
+
+    def finish(self):
+        global _session
+        self.main.disable()
+        _session = None
+        path = None
+        try:
+            path = export(self.name, [self.main] + self.profiles)
+        except OSError as e:
+            print(f"[profile] 导出失败: {e}")
+        self.on_finished(path)
+
+
+def export(name, profiles, log_dir=LOG_DIR):
+    """合并各线程/进程的统计，写出 .prof 与按累计耗时排序的 .txt，返回 .prof 路径。"""
+    os.makedirs(log_dir, exist_ok=True)
+    base = os.path.join(log_dir, f"profile_{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    stats = pstats.Stats(profiles[0])
+    if len(profiles) > 1:
+        stats.add(*profiles[1:])
+    stats.dump_stats(base + ".prof")
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        pstats.Stats(base + ".prof", stream=f).sort_stats("cumulative").print_stats(60)
+    print(f"[profile] {name} 已写入 {base}.prof")
+    return base + ".prof"
+
+
+@contextmanager
+def action(name):
+    """包住一次菜单操作；仅在 arm() 之后的第一次调用时开始分析。"""
+    global _armed, _session
+    if _armed is None or _session is not None:
+        yield
+        return
+    session = _Session(name, _armed)
+    _armed = None
+    _session = session
+    session.main.enable()
+    try:
+        yield
+    finally:
+        session.watch()
+
+
+def worker(run):
+    """装饰 QThread.run：分析会话进行中时该线程单独采样，结束后交给会话合并。"""
+    @wraps(run)
+    def wrapper(*args, **kwargs):
+        session = _session
+        if session is None:
+            return run(*args, **kwargs)
+        session.enter()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 的 cProfile 基于 sys.monitoring，同一时间只能有一个且覆盖所有线程，
+            # 主线程的分析已包含本线程
+            profile = None
+        try:
+            return run(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+            session.leave(profile)
+    return wrapper
+
+
+# ---- 进程池（由 trace.submit / trace.result 调用）----
+def call_profiled(func, args):
+    """在子进程中分析一次调用，返回 (结果, 可序列化的统计)。"""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        value = func(*args)
+    finally:
+        profile.disable()
+    profile.create_stats()
+    return value, profile.stats
+
+
+def add_stats(stats):
+    session = _session
+    if session is not None and stats:
+        session.add(stats)
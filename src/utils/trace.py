@@ -0,0 +1,235 @@
+"""
+可选的分阶段耗时追踪。
+
+span 记录名称、耗时、计数/字节数以及所在进程与线程；job 结束时把期间的 span
+导出为 Chrome trace JSON（chrome://tracing 或 ui.perfetto.dev 打开）和汇总表，写入 LOG_DIR。
+默认关闭（环境变量 WREAPER_TRACE=1 或菜单“记录耗时追踪”开启），关闭时 span() 只返回空对象。
+
+进程池中的任务用 submit / result 代替 executor.submit / future.result，
+子进程中记录的 span（以及 utils.profiler 的分析统计）随结果一并返回并合并到主进程。
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from utils.config import LOG_DIR
+from utils import profiler
+
+_enabled = os.environ.get("WREAPER_TRACE", "") not in ("", "0")
+_events = []
+_thread_names = {}      # (pid, tid) -> 线程名
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+class _NullSpan:
+    def add(self, **counters):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = None
+
+    def add(self, **counters):
+        """累加计数（如 bytes、calls），汇总表按名称求和。"""
+        for key, value in counters.items():
+            self.args[key] = self.args.get(key, 0) + value
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        record(self.name, self.cat, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+
+def span(name, cat="app", **args):
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, cat, args)
+
+
+def record(name, cat, start, duration, args=None):
+    """直接记录一个已完成的 span（start 为 perf_counter 时刻）。"""
+    thread = threading.current_thread()
+    key = (os.getpid(), thread.ident)
+    event = {"name": name, "cat": cat, "ts": start, "dur": duration,
+             "pid": key[0], "tid": key[1], "args": args or {}}
+    with _lock:
+        _thread_names.setdefault(key, thread.name)
+        _events.append(event)
+
+
+def drain():
+    """取出并清空已记录的 span。"""
+    with _lock:
+        events = list(_events)
+        _events.clear()
+        names = dict(_thread_names)
+    return events, names
+
+
+def merge(events, names=None):
+    with _lock:
+        _events.extend(events)
+        if names:
+            for key, name in names.items():
+                _thread_names.setdefault(tuple(key), name)
+
+
+class CallSpans:
+    """包装带 call(uri, ...) 方法的客户端（如 WaapiClient），每次调用记录一个 span。"""
+
+    def __init__(self, target, cat):
+        self._target = target
+        self._cat = cat
+
+    def call(self, uri, *args, **kwargs):
+        with span(uri, self._cat, calls=1):
+            return self._target.call(uri, *args, **kwargs)
+
+
+# ---- 进程池 ----
+class _Traced:
+    __slots__ = ("value", "events", "names", "sent", "profile")
+
+    def __init__(self, value, events, names, sent, profile=None):
+        self.value = value
+        self.events = events
+        self.names = names
+        self.sent = sent
+        self.profile = profile
+
+
+def _traced_call(func, args, tracing=True, profiling=False):
+    global _enabled
+    _enabled = tracing
+    drain()
+    profile = None
+    try:
+        if profiling:
+            value, profile = profiler.call_profiled(func, args)
+        else:
+            value = func(*args)
+    finally:
+        events, names = drain()
+    return _Traced(value, events, names, time.perf_counter(), profile)
+
+
+def submit(executor, func, *args):
+    """executor.submit；开启追踪或处于“分析下一个操作”会话时，子进程的 span / 分析统计随结果返回。"""
+    profiling = profiler.active()
+    if not _enabled and not profiling:
+        return executor.submit(func, *args)
+    return executor.submit(_traced_call, func, args, _enabled, profiling)
+
+
+def result(future):
+    """future.result()；子进程的 span 合并到本进程，并记录结果回传（序列化 + 排队）耗时。"""
+    value = future.result()
+    if not isinstance(value, _Traced):
+        return value
+    profiler.add_stats(value.profile)
+    if value.events:
+        merge(value.events, value.names)
+    received = time.perf_counter()
+    if _enabled:
+        record("ipc.result", "ipc", value.sent, max(0.0, received - value.sent))
+    return value.value
+
+
+# ---- 导出 ----
+def chrome_trace(events, names):
+    if not events:
+        return {"traceEvents": []}
+    origin = min(e["ts"] for e in events)
+    out = []
+    for (pid, tid), name in names.items():
+        out.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    for e in events:
+        out.append({
+            "name": e["name"], "cat": e["cat"], "ph": "X",
+            "ts": (e["ts"] - origin) * 1e6, "dur": e["dur"] * 1e6,
+            "pid": e["pid"], "tid": e["tid"], "args": e["args"],
+        })
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+
+def summary(events):
+    """按名称汇总：次数、总/平均/最大耗时、字节数、涉及的进程数。"""
+    stats = {}
+    for e in events:
+        s = stats.setdefault(e["name"], {"cat": e["cat"], "count": 0, "total": 0.0, "max": 0.0,
+                                          "bytes": 0, "pids": set()})
+        s["count"] += 1
+        s["total"] += e["dur"]
+        s["max"] = max(s["max"], e["dur"])
+        s["bytes"] += e["args"].get("bytes", 0) or 0
+        s["pids"].add(e["pid"])
+    lines = [f"{'阶段':<36} {'次数':>7} {'总耗时(s)':>10} {'平均(ms)':>9} {'最大(ms)':>9} {'MB':>9} {'进程':>4}"]
+    for name, s in sorted(stats.items(), key=lambda kv: -kv[1]["total"]):
+        lines.append(f"{name[:36]:<36} {s['count']:>7} {s['total']:>10.3f} "
+                     f"{s['total'] / s['count'] * 1000:>9.2f} {s['max'] * 1000:>9.2f} "
+                     f"{s['bytes'] / 1e6:>9.1f} {len(s['pids']):>4}")
+    return "\n".join(lines)
+
+
+def export(job_name, events, names, log_dir=LOG_DIR):
+    """写出 trace_<job>_<时间>.json 与同名 .txt 汇总，返回 json 路径。"""
+    os.makedirs(log_dir, exist_ok=True)
+    base = os.path.join(log_dir, f"trace_{job_name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(events, names), f, ensure_ascii=False)
+    table = summary(events)
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(table + "\n")
+    print(f"[trace] {job_name}\n{table}\n[trace] 已写入 {base}.json")
+    return base + ".json"
+
+
+@contextmanager
+def job(name, log_dir=LOG_DIR):
+    """
+    一次长任务：结束时导出期间记录的全部 span（包括开始前尚未导出的，如任务前的查询）。
+    未开启追踪时不做任何事。
+    """
+    if not _enabled:
+        yield
+        return
+    try:
+        with span(name, "job"):
+            yield
+    finally:
+        events, names = drain()
+        try:
+            export(name, events, names, log_dir)
+        except OSError as e:
+            print(f"[trace] 导出失败: {e}")